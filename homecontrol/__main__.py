@@ -2,9 +2,13 @@ from apscheduler.schedulers.background import BackgroundScheduler
 
 from .config import config
 from .controllers.controller import Controller
+from .controllers.rules import Rules
 from .data.network import Network
 from .data.weather import Weather
+from .smart_interfaces.hue.event_stream import EventStream
+from .smart_interfaces.hue.mood_scenes import MoodScenes
 from .smart_interfaces.hue.sensor import Sensor
+from .simulation import Simulation, Trace
 from .utils.arg_parser import parse_args
 from .utils.config_gateway import ConfigGateway
 from .utils.thread import start_thread
@@ -20,17 +24,32 @@ def main():
     config.hue = config_gateway.get_hue()
     config.location = config_gateway.get_location()
     config.unifi = config_gateway.get_unifi()
-    config.add_args_settings(parse_args())
+    args = parse_args()
+    config.add_args_settings(args)
+
+    if args.simulate is not None:
+        trace = Trace.load(args.simulate) if args.simulate else Trace.synthetic()
+        Simulation(trace).run()
+        return
 
     # Start home-control
-    start_thread(Sensor.update_all, seconds_between_calls=5)
+    if config.hue.event_stream:
+        EventStream().start()
+    if config.unifi.event_stream:
+        Network.start_event_stream()
+    if config.hue.mood_scenes:
+        MoodScenes.sync()
+    Rules.reload_if_changed()
+    start_thread(Rules.reload_if_changed, seconds_between_calls=10)
+    start_thread(Sensor.update_all, seconds_between_calls=0)
     start_thread(Network.update, seconds_between_calls=5)
-    start_thread(Controller.update_all, seconds_between_calls=1, delay=10)
+    start_thread(Controller.update_all, seconds_between_calls=0, delay=10)
 
     # Weather
     Weather.update()
     scheduler = BackgroundScheduler()
     scheduler.add_job(Weather.update, "cron", minute=3)
+    scheduler.add_job(Controller.print_stats, "interval", minutes=15)
     scheduler.start()
 
     # Run Web API
@@ -54,12 +54,26 @@ class General:
         self.port: int = 5001
         self.log_level: TealLevel = TealLevel.info
         self.stats_file: Optional[str] = None
+        self.controller_update_interval: float = 300
+        self.rules_file: str = f"~/.{_app_name}-rules.cfg"
+        self.neighbour_table: bool = False
 
 
 class Hue:
     def __init__(self):
         self.host: str = ""
         self.username: str = ""
+        self.timeout: float = 5
+        self.retries: int = 2
+        self.retry_backoff: float = 0.2
+        self.max_connections: int = 4
+        self.state_max_age: float = 5
+        self.light_commands_per_second: float = 10
+        self.group_commands_per_second: float = 1
+        self.event_stream: bool = False
+        self.event_stream_max_age: float = 300
+        self.mood_scenes: bool = False
+        self.priority_hold_time: float = 600
 
 
 class Location:
@@ -79,6 +93,13 @@ class Unifi:
         self.port: int = 8444
         self.site_id: str = "default"
         self.guest_inactive_time: int = 300
+        self.timeout: float = 10
+        self.verify_ssl: bool = True
+        self.ca_file: str = ""
+        self.session_file: str = f"~/.{_app_name}-unifi-session.json"
+        self.user_groups_ttl: float = 3600
+        self.event_stream: bool = False
+        self.event_stream_poll_interval: float = 60
 
 
 config = Config()
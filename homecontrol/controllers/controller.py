@@ -1,17 +1,39 @@
 from __future__ import annotations
 
-from datetime import time
+import threading
+import time as timer
+from datetime import datetime, time, timedelta
 from enum import Enum
-from time import sleep
-from typing import List, Optional, Union
+from typing import Any, Callable, Iterable, List, Optional, Set, Tuple, Union
 
 from tealprint import TealPrint
 
+from ..config import config
 from ..core.entities.color import Color
 from ..data.network import Network
+from ..smart_interfaces import SmartInterfaces
+from ..smart_interfaces.hue.api import Api
+from ..smart_interfaces.hue.dispatcher import Batch, Dispatcher
+from ..smart_interfaces.hue.interface import HueInterface
+from ..smart_interfaces.hue.reconciler import Reconciler
+from ..smart_interfaces.hue.shadow_state import ShadowState
+from ..smart_interfaces.interface import Interface
+from ..utils.clock import Clock
+from ..utils.context import Context
+from ..utils.histogram import Histogram
+from ..utils.inputs import Inputs
 from ..utils.time import Day, Days, Time
 
 
+_MAX_RAMP_SEGMENT = timedelta(minutes=30)
+"""Longest transition sent to the bridge at once (the bridge allows up to ~109 minutes)"""
+_RAMP_START_DELAY = timedelta(seconds=5)
+"""Wait before starting a ramp after turning on, so the lights are turned on at the current value first"""
+_MIN_UPDATE_WAIT = 0.1
+"""Shortest wait between passes, so the controller thread never spins"""
+_ramps = threading.local()
+
+
 class States(Enum):
     initial = "initial"
     on = "on"
@@ -33,86 +55,294 @@ def calculate_ambient() -> States:
     return States.off
 
 
+class ControllerStats:
+    """How long update() takes and how much a controller changes"""
+
+    def __init__(self) -> None:
+        self.update_time = Histogram()
+        self.state_changes = 0
+        self.brightness_changes = 0
+        self.color_changes = 0
+        self.bridge_calls = 0
+        """Commands to lights and groups, before they are merged with the commands of other controllers"""
+
+    def __str__(self) -> str:
+        return (
+            f"update: {self.update_time}, changes: {self.state_changes} state, "
+            f"{self.brightness_changes} brightness, {self.color_changes} color, bridge calls: {self.bridge_calls}"
+        )
+
+
 class Controller:
     controllers: List[Controller] = []
+    tick_time = Histogram()
+    """Time of one pass over all controllers, including sending the commands"""
 
-    def __init__(self, name: str, only_apply_when_on: bool = False) -> None:
+    def __init__(self, name: str, only_apply_when_on: bool = False, priority: int = 0, register: bool = True) -> None:
         """
         params:
           only_apply_when_on(bool): Only change dim/color if the light is currently turned on
+          priority(int): When several controllers change the same light at the same time, the highest priority wins
+          register(bool): Add it to Controller.controllers, so it's updated by update_all()
         """
         self.state: States = States.initial
         self.brightness: Union[float, int, None] = None
         self.color: Optional[Color] = None
         self.name = name
         self.only_apply_when_on = only_apply_when_on
-        Controller.controllers.append(self)
+        self.priority = priority
+        self._inputs: Optional[Set[str]] = None
+        self._next_change: Optional[datetime] = None
+        self._ramp_segment: Optional[_RampSegment] = None
+        self._last_update: float = 0
+        self.stats = ControllerStats()
+        if register:
+            Controller.controllers.append(self)
 
     @staticmethod
     def update_all() -> None:
-        while True:
+        """Wait until an input has changed or the time passes a boundary (e.g. the start or end of a Time.between()),
+        then update the controllers that depend on it.
+        All controllers are updated at least every config.general.controller_update_interval seconds.
+        """
+        changed = Inputs.wait_for_changes(Controller.time_until_next_update())
+        Controller.update_changed(changed)
+
+    @staticmethod
+    def update_changed(changed: Set[str]) -> None:
+        """Update the controllers that depend on the changed inputs, or have passed a time boundary"""
+        start = timer.perf_counter()
+
+        # All controllers see the same time and inputs, and the commands of all controllers
+        # are merged into one target per light
+        with Context.take(Clock.now()) as context, Reconciler.collect():
             for controller in Controller.controllers:
-                last_state = controller.state
-                last_brightness = controller.brightness
-                last_color = controller.color
+                if controller._should_update(changed, context.now):
+                    with Reconciler.priority(controller.priority):
+                        try:
+                            controller._update()
+                        except Exception:
+                            TealPrint.error(f"❗ {controller.name} failed to update", print_exception=True)
+                            controller._update_failed()
+
+        Controller.tick_time.observe(timer.perf_counter() - start)
+
+    @staticmethod
+    def print_stats() -> None:
+        """Print how long the controllers take and how much they change, and the stats of the bridge calls"""
+        TealPrint.verbose(f"📊 Controllers, pass: {Controller.tick_time}", push_indent=True)
+        for controller in Controller.controllers:
+            TealPrint.verbose(f"{controller.name}: {controller.stats}")
+        for method, api_stats in Api.stats.items():
+            TealPrint.verbose(f"Hue API {method}: {api_stats}")
+        TealPrint.verbose(f"Hue commands: {ShadowState.stats}")
+        for priority, lane_stats in Dispatcher.stats.items():
+            TealPrint.verbose(f"Hue {priority.name} lane: {lane_stats}")
+        TealPrint.pop_indent()
+
+    @staticmethod
+    def time_until_next_update() -> float:
+        """Seconds until the first controller passes a time boundary or needs to be updated anyway"""
+        now = Clock.now()
+        interval = config.general.controller_update_interval
+        now_monotonic = Clock.monotonic()
+        wait_time = interval
+        for controller in Controller.controllers:
+            wait_time = min(wait_time, controller._last_update + interval - now_monotonic)
+            if controller._next_change:
+                wait_time = min(wait_time, (controller._next_change - now).total_seconds())
+        return max(_MIN_UPDATE_WAIT, wait_time)
+
+    def _should_update(self, changed: Set[str], now: datetime) -> bool:
+        if self._inputs is None:
+            return True
+        if Clock.monotonic() - self._last_update >= config.general.controller_update_interval:
+            return True
+        if self._next_change and now >= self._next_change:
+            return True
+        return not self._inputs.isdisjoint(changed)
+
+    def _update_failed(self) -> None:
+        """Don't try again until the next controller_update_interval, so the others still get updated"""
+        self._inputs = set()
+        self._next_change = None
+        self._last_update = Clock.monotonic()
+
+    def _update(self) -> None:
+        last_state = self.state
+        last_brightness = self.brightness
+        last_color = self.color
+
+        self.state = States.off
+        _ramps.brightness = None
+        _ramps.color = None
+        bridge_calls = Reconciler.added()
+        start = timer.perf_counter()
+        with Inputs.record() as reads:
+            self.update()
+            self.stats.update_time.observe(timer.perf_counter() - start)
+            brightness_ramp: Optional[_Ramp] = _ramps.brightness
+            color_ramp: Optional[_Ramp] = _ramps.color
+            drifted = self._has_ramp_drifted()
+        self._inputs = reads.inputs
+        self._next_change = reads.next_change
+        self._last_update = Clock.monotonic()
+        TealPrint.debug(f"{self.name}: Updated, depends on {sorted(reads.inputs)}, next change at {reads.next_change}")
+
+        # Controller state updated
+        if self.state != last_state:
+            TealPrint.debug(f"{self.name}: State changed from {last_state} -> {self.state}")
+            self.stats.state_changes += 1
+            if self.state == States.off:
+                self.turn_off()
+            elif self.state == States.on:
+                self.turn_on()
+
+        # Let the bridge do the ramps
+        ramping = self.state == States.on and (brightness_ramp or color_ramp)
+        if ramping:
+            self._update_ramp(brightness_ramp, color_ramp, just_turned_on=self.state != last_state, drifted=drifted)
+        else:
+            self._ramp_segment = None
 
-                controller.state = States.off
-                controller.update()
+        if self.color != last_color and not (ramping and color_ramp):
+            self.colorize()
 
-                # Controller state updated
-                if controller.state != last_state:
-                    TealPrint.debug(f"{controller.name}: State changed from {last_state} -> {controller.state}")
-                    if controller.state == States.off:
-                        controller.turn_off()
-                    elif controller.state == States.on:
-                        controller.turn_on()
+        # Brightness updated
+        if self.brightness != last_brightness and not (ramping and brightness_ramp):
+            self.dim()
+
+        if self.color != last_color:
+            self.stats.color_changes += 1
+        if self.brightness != last_brightness:
+            self.stats.brightness_changes += 1
+        self.stats.bridge_calls += Reconciler.added() - bridge_calls
+
+    def _update_ramp(
+        self, brightness_ramp: Optional[_Ramp], color_ramp: Optional[_Ramp], just_turned_on: bool, drifted: bool
+    ) -> None:
+        """Send one long transition to where the ramp is at the end of the segment, instead of changing the
+        brightness/color every minute. Only sent again when the segment ends, or if the lights have drifted
+        from it (e.g. changed manually)."""
+        now = Clock.now()
+        ramps = (brightness_ramp.end if brightness_ramp else None, color_ramp.end if color_ramp else None)
+
+        if just_turned_on:
+            self._ramp_segment = None
+            self._set_next_change(now + _RAMP_START_DELAY)
+            return
+
+        segment = self._ramp_segment
+        if segment and segment.ramps == ramps and now < segment.end and not drifted:
+            self._set_next_change(segment.end)
+            return
+
+        end = min([ramp.end for ramp in [brightness_ramp, color_ramp] if ramp] + [now + _MAX_RAMP_SEGMENT])
+        if end <= now:
+            self._ramp_segment = None
+            return
+
+        segment = _RampSegment(
+            end,
+            ramps,
+            brightness=brightness_ramp.value_at(end) if brightness_ramp else None,
+            color=color_ramp.value_at(end) if color_ramp else None,
+        )
+        self._ramp_segment = segment
+        self._set_next_change(segment.end)
+
+        transition_time = (segment.end - now).total_seconds()
+        TealPrint.info(
+            f"🌅 Ramping {self.name} to brightness {segment.brightness}, color {segment.color} "
+            + f"until {segment.end:%H:%M}",
+            push_indent=True,
+        )
+        fields = ["on"]
+        if segment.brightness is not None:
+            fields.append("bri")
+        if segment.color:
+            fields.extend(HueInterface.color_body(segment.color).keys())
+        with Dispatcher.batch() as batch:
+            for interface in self._get_folded_interfaces(only_applicable=True, fields=fields):
+                if segment.brightness is not None:
+                    interface.dim(segment.brightness, transition_time=transition_time)
+                if segment.color:
+                    interface.color(segment.color, transition_time=transition_time)
+        self._check_batch(batch, "ramp")
+        TealPrint.pop_indent()
 
-                if controller.color != last_color:
-                    controller.colorize()
+    def _has_ramp_drifted(self) -> bool:
+        segment = self._ramp_segment
+        if not segment:
+            return False
 
-                # Brightness updated
-                if controller.brightness != last_brightness:
-                    controller.dim()
+        for interface_enum in self._get_interfaces():
+            if not interface_enum.value.is_set_to(segment.brightness, segment.color):
+                TealPrint.verbose(f"↪ {self.name}: {interface_enum.value.name} has drifted from the ramp")
+                return True
+        return False
 
-            sleep(1)
+    def _set_next_change(self, next_change: datetime) -> None:
+        if self._next_change is None or next_change < self._next_change:
+            self._next_change = next_change
 
     def turn_on(self) -> None:
         TealPrint.info("⚪ Turning on " + self.name, push_indent=True)
 
-        for interface_enum in self._get_interfaces():
-            interface_enum.value.turn_on()
-        if self.brightness:
-            self.dim(transition_time=0)
-        if self.color:
-            self.colorize()
+        with Dispatcher.batch() as batch:
+            for interface in self._get_folded_interfaces():
+                interface.turn_on()
+            if self.brightness:
+                self.dim(transition_time=0)
+            if self.color:
+                self.colorize()
+        self._check_batch(batch, "turn on")
 
         TealPrint.pop_indent()
 
     def turn_off(self) -> None:
         TealPrint.info("⚫ Turning off " + self.name, push_indent=True)
-        for interface_enum in self._get_interfaces():
-            interface_enum.value.turn_off()
+        with Dispatcher.batch() as batch:
+            for interface in self._get_folded_interfaces():
+                interface.turn_off()
+        self._check_batch(batch, "turn off")
         TealPrint.pop_indent()
 
     def dim(self, transition_time: float = 60):
         if self.state == States.on and self.brightness:
             TealPrint.info(f"🔅 Dimming {self.name} to {self.brightness}", push_indent=True)
-            for interface_enum in self._get_interfaces():
-                if self._should_apply(interface_enum):
-                    interface_enum.value.dim(
+            with Dispatcher.batch() as batch:
+                for interface in self._get_folded_interfaces(only_applicable=True, fields=["on", "bri"]):
+                    interface.dim(
                         self.brightness,
                         transition_time=transition_time,
                     )
+            self._check_batch(batch, "dim")
             TealPrint.pop_indent()
 
     def colorize(self):
         if self.state == States.on and self.color:
             TealPrint.info(f"🚦 Colorize {self.name} to {self.color}", push_indent=True)
-            for interface_enum in self._get_interfaces():
-                if self._should_apply(interface_enum):
-                    interface_enum.value.color(self.color)
+            with Dispatcher.batch() as batch:
+                fields = ["on", *HueInterface.color_body(self.color).keys()]
+                for interface in self._get_folded_interfaces(only_applicable=True, fields=fields):
+                    interface.color(self.color)
+            self._check_batch(batch, "colorize")
             TealPrint.pop_indent()
 
+    def _check_batch(self, batch: Batch, action: str) -> None:
+        if not batch.success:
+            TealPrint.warning(f"⚠ {self.name}: Failed to {action} some of the lights")
+
+    def _get_folded_interfaces(self, only_applicable: bool = False, fields: Iterable[str] = ("on",)) -> List[Interface]:
+        """Get the interfaces to send commands to, lights that make up a whole group are replaced by the group
+        if all its lights support the fields of the command"""
+        interfaces: List[Interface] = []
+        for interface_enum in self._get_interfaces():
+            if not only_applicable or self._should_apply(interface_enum):
+                interfaces.append(interface_enum.value)
+        return SmartInterfaces.fold_groups(interfaces, fields)
+
     def _should_apply(self, interface_enum: Enum) -> bool:
         should_apply = True
         if self.only_apply_when_on:
@@ -136,16 +366,60 @@ class Controller:
         TealPrint.error(f"❗ Not implemented {self.name}._update()")
 
 
+class _Ramp:
+    """A brightness or color that changes linearly until end"""
+
+    def __init__(self, end: datetime, value_at: Callable[[datetime], Any]) -> None:
+        self.end = end
+        self.value_at = value_at
+
+
+class _RampSegment:
+    """The part of a ramp that's sent to the bridge as one transition"""
+
+    def __init__(
+        self,
+        end: datetime,
+        ramps: Tuple[Optional[datetime], Optional[datetime]],
+        brightness: Optional[float],
+        color: Optional[Color],
+    ) -> None:
+        self.end = end
+        self.ramps = ramps
+        self.brightness = brightness
+        self.color = color
+
+
 def calculate_dynamic_brightness(
     time_start: time, time_end: time, brightness_start: float, brightness_end: float
 ) -> float:
-    percentage = Time.percentage_between(time_start, time_end)
+    """The brightness between the start and end time.
+    When called in Controller.update(), the controller lets the bridge ramp the brightness instead."""
+    # The ramp is sent as long transitions, no need to update every minute
+    with Inputs.ignore():
+        percentage = Time.percentage_between(time_start, time_end)
+
+    _, end = Time.datetimes_between(time_start, time_end)
+    _ramps.brightness = _Ramp(
+        end, lambda at: _diff(brightness_start, brightness_end, Time.percentage_at(time_start, time_end, at))
+    )
     return _diff(brightness_start, brightness_end, percentage)
 
 
 def calculate_dynamic_color(time_start: time, time_end: time, color_start: Color, color_end: Color) -> Color:
-    percentage = Time.percentage_between(time_start, time_end)
+    """The color between the start and end time.
+    When called in Controller.update(), the controller lets the bridge ramp the color instead."""
+    with Inputs.ignore():
+        percentage = Time.percentage_between(time_start, time_end)
+
+    _, end = Time.datetimes_between(time_start, time_end)
+    _ramps.color = _Ramp(
+        end, lambda at: _interpolate_color(color_start, color_end, Time.percentage_at(time_start, time_end, at))
+    )
+    return _interpolate_color(color_start, color_end, percentage)
+
 
+def _interpolate_color(color_start: Color, color_end: Color, percentage: float) -> Color:
     color = Color()
 
     if color_start.x and color_end.x:
@@ -1,4 +1,8 @@
+from datetime import datetime, time, timedelta
+from enum import Enum
+
 import pytest
+from dateutil import tz
 from mockito import ANY, spy2, unstub, verify
 from tealprint import TealPrint
 
@@ -38,3 +42,176 @@ def test_diff_when_out_of_bounds(name, percentage):
 
     verify(TealPrint).error(ANY)
     unstub()
+
+
+def test_only_updates_when_read_input_changed():
+    from ..data.network.device import Device
+    from ..utils.inputs import Inputs
+    from .controller import Controller, States
+
+    class DeviceController(Controller):
+        def __init__(self, device: Device) -> None:
+            super().__init__("Device controller")
+            self.device = device
+            self.updates = 0
+
+        def _get_interfaces(self):
+            return []
+
+        def update(self):
+            self.updates += 1
+            if self.device.is_on():
+                self.state = States.on
+
+    device = Device("Controller test device", False)
+    controller = DeviceController(device)
+    Controller.controllers.remove(controller)
+
+    now = datetime.now(tz.tzlocal())
+    assert controller._should_update(set(), now)
+    controller._update()
+    assert controller.updates == 1
+    assert controller.state == States.on
+
+    assert not controller._should_update({Inputs.TIME, Inputs.device("Other device")}, now)
+    assert controller._should_update({Inputs.device(device.name)}, now)
+    assert controller.stats.update_time.count == 1
+    assert controller.stats.state_changes == 1
+
+
+def test_failing_controller_waits_until_next_interval():
+    from .controller import Controller
+
+    class FailingController(Controller):
+        def __init__(self) -> None:
+            super().__init__("Failing controller")
+            self.updates = 0
+
+        def _get_interfaces(self):
+            return []
+
+        def update(self):
+            self.updates += 1
+            raise RuntimeError("Bad bridge response")
+
+    class CountingController(Controller):
+        def __init__(self) -> None:
+            super().__init__("Counting controller")
+            self.updates = 0
+
+        def _get_interfaces(self):
+            return []
+
+        def update(self):
+            self.updates += 1
+
+    spy2(TealPrint.error)
+    original = list(Controller.controllers)
+    failing = FailingController()
+    counting = CountingController()
+    Controller.controllers = [failing, counting]
+    try:
+        Controller.update_changed(set())
+        Controller.update_changed(set())
+    finally:
+        Controller.controllers = original
+
+    assert failing.updates == 1
+    assert counting.updates == 1
+    assert not failing._should_update(set(), datetime.now(tz.tzlocal()))
+    verify(TealPrint, times=1).error(ANY, print_exception=True)
+    unstub()
+
+
+def test_updates_at_next_time_boundary():
+    from ..utils.inputs import Inputs
+    from .controller import Controller
+
+    class TimeController(Controller):
+        def __init__(self) -> None:
+            super().__init__("Time controller")
+
+        def _get_interfaces(self):
+            return []
+
+        def update(self):
+            Inputs.read_time(datetime(2022, 1, 1, 17, tzinfo=tz.tzlocal()))
+
+    controller = TimeController()
+    Controller.controllers.remove(controller)
+    controller._update()
+
+    assert not controller._should_update(set(), datetime(2022, 1, 1, 16, 59, tzinfo=tz.tzlocal()))
+    assert controller._should_update(set(), datetime(2022, 1, 1, 17, tzinfo=tz.tzlocal()))
+
+
+def _create_ramp_controller(time_start: time, time_end: time):
+    from ..smart_interfaces.interface import Interface
+    from .controller import Controller, States, calculate_dynamic_brightness
+
+    class RecordingInterface(Interface):
+        def __init__(self) -> None:
+            super().__init__("Ramp light")
+            self.dims = []
+
+        def dim(self, value, transition_time=1):
+            self.dims.append((value, transition_time))
+
+    interface = RecordingInterface()
+
+    class RampDevices(Enum):
+        light = interface
+
+    class RampController(Controller):
+        def __init__(self) -> None:
+            super().__init__("Ramp controller")
+
+        def _get_interfaces(self):
+            return [RampDevices.light]
+
+        def update(self):
+            self.state = States.on
+            self.brightness = calculate_dynamic_brightness(time_start, time_end, 0.6, 0.2)
+
+    controller = RampController()
+    Controller.controllers.remove(controller)
+    return controller, interface
+
+
+def test_ramp_is_sent_as_long_transitions():
+    import time_machine
+
+    controller, interface = _create_ramp_controller(time(19), time(22))
+    start = datetime(2022, 1, 1, 20, tzinfo=tz.tzlocal())
+
+    # Turned on at the current brightness
+    with time_machine.travel(start, tick=False):
+        controller._update()
+    assert interface.dims == [(0.47, 0)]
+
+    # Then one long transition towards the end of the segment
+    with time_machine.travel(start + timedelta(seconds=10), tick=False):
+        controller._update()
+    assert interface.dims[1] == (0.4, 1800)
+
+    # Nothing more until the segment ends
+    with time_machine.travel(start + timedelta(minutes=5), tick=False):
+        controller._update()
+    assert len(interface.dims) == 2
+    assert controller._next_change == start + timedelta(minutes=30, seconds=10)
+
+
+def test_ramp_over_midnight():
+    import time_machine
+
+    controller, interface = _create_ramp_controller(time(22), time(2))
+    start = datetime(2022, 1, 1, 23, tzinfo=tz.tzlocal())
+
+    with time_machine.travel(start, tick=False):
+        controller._update()
+    assert interface.dims == [(0.5, 0)]
+
+    # The ramp ends tomorrow, so it's still ramping before midnight
+    with time_machine.travel(start + timedelta(seconds=10), tick=False):
+        controller._update()
+    assert interface.dims[1] == (0.45, 1800)
@@ -7,6 +7,8 @@ from ..smart_interfaces.devices import Devices
 from ..smart_interfaces.groups import Groups
 from ..smart_interfaces.hue.light_sensor import LightLevels
 from ..smart_interfaces.sensors import Sensors
+from ..utils.clock import Clock
+from ..utils.inputs import Inputs
 from ..utils.time import Date, Time
 from .controller import Controller, States
 
@@ -32,7 +34,8 @@ class ControlChristmasLightsWhenNotHome(Controller):
     """Turn on Christmas decorations when no-one is home"""
 
     def __init__(self) -> None:
-        super().__init__("Christmas Lights when not home")
+        # Overrides the controllers that turn off the lights when we leave
+        super().__init__("Christmas Lights when not home", priority=1)
         self.delayed_turn_on: Optional[datetime] = None
 
     def _get_interfaces(self) -> List[Enum]:
@@ -64,10 +67,14 @@ class ControlChristmasLightsWhenNotHome(Controller):
 
         # Start delayed turn on
         if not self.delayed_turn_on:
-            self.delayed_turn_on = datetime.now()
-        elif datetime.now() - self.delayed_turn_on > timedelta(minutes=1):
+            self.delayed_turn_on = Clock.now()
+        elif Clock.now() - self.delayed_turn_on > timedelta(minutes=1):
             self.state = States.on
 
+        # Check again when the delay has passed
+        if self.state != States.on:
+            Inputs.read_time(self.delayed_turn_on + timedelta(minutes=1, seconds=1))
+
     def turn_off(self) -> None:
         """Don't turn off if it was because someone came home. Then we want to leave it on"""
         self.delayed_turn_on = None
@@ -2,6 +2,7 @@ from datetime import datetime, time, timedelta
 from enum import Enum
 from typing import List
 
+from dateutil import tz
 from tealprint import TealPrint
 
 from ..core.entities.color import Color
@@ -10,6 +11,7 @@ from ..smart_interfaces.devices import Devices
 from ..smart_interfaces.groups import Groups
 from ..smart_interfaces.hue.light_sensor import LightLevels
 from ..smart_interfaces.sensors import Sensors
+from ..utils.clock import Clock
 from ..utils.time import Time
 from .controller import (
     Controller,
@@ -130,7 +132,7 @@ class ControlLedStrip(Controller):
 
     def __init__(self):
         super().__init__("LED Strip")
-        self.turned_off_time = datetime(2010, 1, 1)
+        self.turned_off_time = datetime(2010, 1, 1, tzinfo=tz.tzlocal())
 
     def _get_interfaces(self) -> List[Enum]:
         return [Devices.led_strip]
@@ -157,7 +159,7 @@ class ControlLedStrip(Controller):
     def turn_on(self) -> None:
         """Only turn on if it was on recently"""
         TealPrint.verbose(f"💡 {self.name}: Trying to turn it on", push_indent=True)
-        diff_time = datetime.now() - self.turned_off_time
+        diff_time = Clock.now() - self.turned_off_time
         TealPrint.verbose(f"⏲ {diff_time} since stopped, should be max {ControlLedStrip.MAX_DIFF_TIME}")
         TealPrint.pop_indent()
         if diff_time < ControlLedStrip.MAX_DIFF_TIME:
@@ -165,5 +167,5 @@ class ControlLedStrip(Controller):
 
     def turn_off(self) -> None:
         if Devices.led_strip.value.is_on():
-            self.turned_off_time = datetime.now()
+            self.turned_off_time = Clock.now()
             super().turn_off()
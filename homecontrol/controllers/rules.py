@@ -0,0 +1,468 @@
+from __future__ import annotations
+
+import configparser
+import re
+from bisect import bisect_right
+from datetime import datetime, time, timedelta
+from enum import Enum
+from pathlib import Path
+from typing import Callable, Dict, List, Optional, Sequence, Tuple, Union
+
+from blulib.config_parser import ConfigParser
+from tealprint import TealPrint
+
+from ..config import config
+from ..core.entities.color import Color
+from ..data.network import GuestOf, Network
+from ..data.network.device import Device
+from ..smart_interfaces.devices import Devices
+from ..smart_interfaces.groups import Groups
+from ..smart_interfaces.hue.light_sensor import LightLevels, LightSensor
+from ..smart_interfaces.sensors import Sensors
+from ..utils.clock import Clock
+from ..utils.inputs import Inputs
+from ..utils.time import Days
+from .controller import Controller, States, calculate_dynamic_brightness, calculate_dynamic_color
+
+_TIME_REGEX = re.compile(r"^(\d{1,2}):(\d{2})\s*-\s*(\d{1,2}):(\d{2})$")
+_DATE_REGEX = re.compile(r"^(\d{1,2})-(\d{1,2})\s*\.\.\s*(\d{1,2})-(\d{1,2})$")
+_LIGHT_LEVEL_REGEX = re.compile(r"^(\w+)\s*(<=|>=)\s*(\w+)$")
+_RAMP_SEPARATOR = "->"
+_GUESTS = "guests"
+"""Prefix for guest groups in on/off; 'guests' is any guest, 'guests_matteus' the guests of Matteus"""
+
+
+class _Condition:
+    """A node in the condition tree of a rule"""
+
+    def matches(self, now: datetime) -> bool:
+        raise NotImplementedError()
+
+    def boundaries(self) -> List[time]:
+        """Times of the day when the condition can change by itself"""
+        return []
+
+
+class _All(_Condition):
+    def __init__(self, conditions: List[_Condition]) -> None:
+        self.conditions = conditions
+
+    def matches(self, now: datetime) -> bool:
+        return all(condition.matches(now) for condition in self.conditions)
+
+    def boundaries(self) -> List[time]:
+        return [boundary for condition in self.conditions for boundary in condition.boundaries()]
+
+
+class _Any(_All):
+    def matches(self, now: datetime) -> bool:
+        return any(condition.matches(now) for condition in self.conditions)
+
+
+class _Not(_Condition):
+    def __init__(self, condition: _Condition) -> None:
+        self.condition = condition
+
+    def matches(self, now: datetime) -> bool:
+        return not self.condition.matches(now)
+
+    def boundaries(self) -> List[time]:
+        return self.condition.boundaries()
+
+
+class _TimeWindow(_Condition):
+    def __init__(self, start: time, end: time) -> None:
+        self.start = start
+        self.end = end
+
+    def matches(self, now: datetime) -> bool:
+        now_time = now.time()
+        # Same day
+        if self.start <= self.end:
+            return self.start <= now_time < self.end
+        else:  # Over midnight
+            return self.start <= now_time or now_time < self.end
+
+    def boundaries(self) -> List[time]:
+        return [self.start, self.end]
+
+
+class _Weekdays(_Condition):
+    def __init__(self, days: List[Days]) -> None:
+        self.days = {day.value for day in days}
+
+    def matches(self, now: datetime) -> bool:
+        return now.weekday() in self.days
+
+    def boundaries(self) -> List[time]:
+        return [time(0)]
+
+
+class _DateRange(_Condition):
+    def __init__(self, start: Tuple[int, int], end: Tuple[int, int]) -> None:
+        self.start = start
+        self.end = end
+
+    def matches(self, now: datetime) -> bool:
+        today = (now.month, now.day)
+        # Same year
+        if self.start <= self.end:
+            return self.start <= today <= self.end
+        else:  # Across the year
+            return self.start <= today or today <= self.end
+
+    def boundaries(self) -> List[time]:
+        return [time(0)]
+
+
+class _DeviceOn(_Condition):
+    def __init__(self, device: Device) -> None:
+        self.device = device
+
+    def matches(self, now: datetime) -> bool:
+        return self.device.is_on()
+
+
+class _GuestsHome(_Condition):
+    def __init__(self, guest_of: Sequence[GuestOf]) -> None:
+        self.guest_of = tuple(guest_of)
+
+    def matches(self, now: datetime) -> bool:
+        return Network.is_guest_home(*self.guest_of)
+
+
+class _LightLevel(_Condition):
+    def __init__(self, sensor: LightSensor, or_below: bool, level: LightLevels) -> None:
+        self.sensor = sensor
+        self.or_below = or_below
+        self.level = level
+
+    def matches(self, now: datetime) -> bool:
+        if self.or_below:
+            return self.sensor.is_level_or_below(self.level)
+        return self.sensor.is_level_or_above(self.level)
+
+
+Brightness = Union[float, int]
+
+
+class Rule:
+    """Sets the state, brightness and/or color of its controller when all its conditions match"""
+
+    def __init__(
+        self,
+        name: str,
+        condition: _Condition,
+        time_window: Optional[_TimeWindow] = None,
+        state: Optional[States] = None,
+        brightness: Optional[Tuple[Brightness, Optional[Brightness]]] = None,
+        color: Optional[Tuple[Color, Optional[Color]]] = None,
+    ) -> None:
+        """
+        params:
+          brightness/color: the value, or the start and end value of a ramp over the time window
+        """
+        self.name = name
+        self.condition = condition
+        self.time_window = time_window
+        self.state = state
+        self.brightness = brightness
+        self.color = color
+
+    def apply(self, controller: Controller) -> None:
+        if self.state:
+            controller.state = self.state
+
+        if self.brightness:
+            start, end = self.brightness
+            if end is not None and self.time_window:
+                controller.brightness = calculate_dynamic_brightness(
+                    self.time_window.start, self.time_window.end, start, end
+                )
+            else:
+                controller.brightness = start
+
+        if self.color:
+            start_color, end_color = self.color
+            if end_color is not None and self.time_window:
+                controller.color = calculate_dynamic_color(
+                    self.time_window.start, self.time_window.end, start_color, end_color
+                )
+            else:
+                controller.color = start_color
+
+
+class RuleController(Controller):
+    """A controller from the rules file. Lights are off unless a rule turns them on.
+    The rules are checked in order, and a later matching rule overrides what earlier rules have set.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        interfaces: List[Enum],
+        rules: List[Rule],
+        priority: int = 0,
+        only_apply_when_on: bool = False,
+        register: bool = True,
+    ) -> None:
+        super().__init__(name, only_apply_when_on=only_apply_when_on, priority=priority, register=register)
+        self.interfaces = interfaces
+        self.rules = rules
+        self._boundaries = sorted({boundary for rule in rules for boundary in rule.condition.boundaries()})
+
+    def _get_interfaces(self) -> List[Enum]:
+        return self.interfaces
+
+    def update(self):
+        now = Clock.now()
+        if self._boundaries:
+            Inputs.read_time(self._next_boundary(now))
+
+        for rule in self.rules:
+            if rule.condition.matches(now):
+                TealPrint.debug(f"{self.name}: Rule {rule.name} matches")
+                rule.apply(self)
+
+    def _next_boundary(self, now: datetime) -> datetime:
+        index = bisect_right(self._boundaries, now.time().replace(microsecond=0))
+        if index < len(self._boundaries):
+            return datetime.combine(now.date(), self._boundaries[index], tzinfo=now.tzinfo)
+        return datetime.combine(now.date() + timedelta(days=1), self._boundaries[0], tzinfo=now.tzinfo)
+
+
+class Rules:
+    """Controllers from the rules file (config.general.rules_file), reloaded when the file changes.
+
+    [Controller name]
+    interfaces = billy, cylinder
+
+    [Controller name: Rule name]
+    time = 19:00-22:00
+    on = mobile_matteus, guests_matteus
+    state = on
+    brightness = 0.6 -> 0.2
+    """
+
+    controllers: List[RuleController] = []
+    _modified_time: Optional[float] = None
+
+    @staticmethod
+    def reload_if_changed() -> None:
+        path = Path(config.general.rules_file).expanduser()
+        modified_time = path.stat().st_mtime if path.exists() else None
+        if modified_time == Rules._modified_time:
+            return
+        Rules._modified_time = modified_time
+
+        try:
+            controllers = Rules.load(path) if modified_time else []
+        except (ValueError, configparser.Error) as e:
+            TealPrint.warning(f"⚠ Invalid rules in {path}, keeping the old rules: {e}")
+            return
+
+        # Swap in a new list instead of changing it, it may be iterated in the controller thread
+        old_controllers = Rules.controllers
+        Controller.controllers = [
+            controller for controller in Controller.controllers if controller not in old_controllers
+        ] + controllers
+        Rules.controllers = controllers
+        TealPrint.info(f"📜 Loaded {len(controllers)} controllers from {path}")
+        Inputs.changed(Inputs.RULES)
+
+    @staticmethod
+    def load(path: Path) -> List[RuleController]:
+        """Compile the controllers in the rules file. They aren't added to Controller.controllers.
+
+        Raises:
+            ValueError: if a rule is invalid
+            configparser.Error: if the file can't be parsed
+        """
+        parser = ConfigParser()
+        parser.read(path)
+
+        # Parse and check everything before creating any controller
+        specs: Dict[str, _ControllerSpec] = {}
+        for section_name in parser.sections():
+            section = parser[section_name]
+            controller_name, _, rule_name = (part.strip() for part in section_name.partition(":"))
+
+            if not rule_name:
+                specs[controller_name] = _parse_controller(controller_name, section)
+            elif controller_name in specs:
+                specs[controller_name].rules.append(_parse_rule(section_name, section))
+            else:
+                raise ValueError(f"[{section_name}] no [{controller_name}] section before the rule")
+
+        return [
+            RuleController(
+                spec.name,
+                spec.interfaces,
+                spec.rules,
+                priority=spec.priority,
+                only_apply_when_on=spec.only_apply_when_on,
+                register=False,
+            )
+            for spec in specs.values()
+        ]
+
+
+class _ControllerSpec:
+    """A parsed controller section, before the controller is created"""
+
+    def __init__(self, name: str, interfaces: List[Enum], priority: int, only_apply_when_on: bool) -> None:
+        self.name = name
+        self.interfaces = interfaces
+        self.priority = priority
+        self.only_apply_when_on = only_apply_when_on
+        self.rules: List[Rule] = []
+
+
+def _parse_controller(section_name: str, section) -> _ControllerSpec:
+    interfaces = _parse_interfaces(section_name, section.get("interfaces", ""))
+    try:
+        priority = section.getint("priority", 0)
+        only_apply_when_on = section.getboolean("only_apply_when_on", False)
+    except ValueError as e:
+        raise ValueError(f"[{section_name}] {e}")
+    return _ControllerSpec(section_name, interfaces, priority, only_apply_when_on)
+
+
+def _parse_interfaces(section_name: str, value: str) -> List[Enum]:
+    interfaces: List[Enum] = []
+    for name in _split(value):
+        interface: Optional[Enum] = None
+        if name in Devices.__members__:
+            interface = Devices[name]
+        elif name in Groups.__members__:
+            interface = Groups[name]
+        else:
+            interface = Devices.from_name(name) or Groups.from_name(name)
+
+        if not interface:
+            raise ValueError(f"[{section_name}] unknown light or group: {name}")
+        interfaces.append(interface)
+
+    if len(interfaces) == 0:
+        raise ValueError(f"[{section_name}] no interfaces")
+    return interfaces
+
+
+def _parse_rule(section_name: str, section) -> Rule:
+    conditions: List[_Condition] = []
+    time_window: Optional[_TimeWindow] = None
+
+    if "time" in section:
+        match = _TIME_REGEX.match(section["time"].strip())
+        if not match:
+            raise ValueError(f"[{section_name}] time should be HH:MM-HH:MM, was {section['time']}")
+        start_hour, start_minute, end_hour, end_minute = (int(group) for group in match.groups())
+        time_window = _TimeWindow(time(start_hour, start_minute), time(end_hour, end_minute))
+        conditions.append(time_window)
+
+    if "weekdays" in section:
+        days = _parse_enums(section_name, "weekdays", section["weekdays"], Days)
+        conditions.append(_Weekdays(days))
+
+    if "dates" in section:
+        match = _DATE_REGEX.match(section["dates"].strip())
+        if not match:
+            raise ValueError(f"[{section_name}] dates should be MM-DD..MM-DD, was {section['dates']}")
+        start_month, start_day, end_month, end_day = (int(group) for group in match.groups())
+        conditions.append(_DateRange((start_month, start_day), (end_month, end_day)))
+
+    if "on" in section:
+        conditions.append(_Any(_parse_presence(section_name, section["on"])))
+
+    if "off" in section:
+        conditions.append(_Not(_Any(_parse_presence(section_name, section["off"]))))
+
+    if "light_level" in section:
+        match = _LIGHT_LEVEL_REGEX.match(section["light_level"].strip())
+        sensor = getattr(Sensors, match.group(1), None) if match else None
+        if not match or not isinstance(sensor, LightSensor) or match.group(3) not in LightLevels.__members__:
+            raise ValueError(
+                f"[{section_name}] light_level should be '<sensor> <= <level>' or '>=', was {section['light_level']}"
+            )
+        conditions.append(_LightLevel(sensor, match.group(2) == "<=", LightLevels[match.group(3)]))
+
+    state: Optional[States] = None
+    if "state" in section:
+        state = _parse_enums(section_name, "state", section["state"], States)[0]
+
+    brightness = None
+    if "brightness" in section:
+        brightness = _parse_ramp(section_name, "brightness", section["brightness"], _parse_brightness, time_window)
+
+    color = None
+    if "color" in section:
+        color = _parse_ramp(section_name, "color", section["color"], _parse_color, time_window)
+
+    return Rule(section_name, _All(conditions), time_window, state, brightness, color)
+
+
+def _parse_presence(section_name: str, value: str) -> List[_Condition]:
+    conditions: List[_Condition] = []
+    for name in _split(value):
+        prefix, _, guest_of = name.partition("_")
+        if name == _GUESTS:
+            conditions.append(_GuestsHome([]))
+        elif prefix == _GUESTS and guest_of in GuestOf.__members__:
+            conditions.append(_GuestsHome([GuestOf[guest_of]]))
+        elif isinstance(getattr(Network, name, None), Device):
+            conditions.append(_DeviceOn(getattr(Network, name)))
+        else:
+            raise ValueError(f"[{section_name}] unknown device or guest group: {name}")
+    return conditions
+
+
+def _parse_ramp(
+    section_name: str, key: str, value: str, parse: Callable[[str], object], time_window: Optional[_TimeWindow]
+) -> Tuple:
+    try:
+        if _RAMP_SEPARATOR not in value:
+            return parse(value), None
+
+        if not time_window:
+            raise ValueError("a ramp needs a time")
+        start, end = value.split(_RAMP_SEPARATOR)
+        return parse(start), parse(end)
+    except ValueError as e:
+        raise ValueError(f"[{section_name}] invalid {key} '{value}': {e}")
+
+
+def _parse_brightness(value: str) -> float:
+    value = value.strip()
+    if value.endswith("%"):
+        brightness = float(value[:-1]) / 100
+    # Both 1 and 1.0 look right, but would be the bridge's 1 (almost off) and full brightness
+    elif "." in value:
+        brightness = float(value)
+    else:
+        raise ValueError("should be 0.0-1.0 or a percentage like 60%")
+
+    if not 0 <= brightness <= 1:
+        raise ValueError("should be between 0.0 and 1.0 (0%-100%)")
+    return brightness
+
+
+def _parse_color(value: str) -> Color:
+    parts = value.split(",")
+    if len(parts) != 2:
+        raise ValueError("should be x, y")
+    return Color.from_xy(float(parts[0]), float(parts[1]))
+
+
+def _parse_enums(section_name: str, key: str, value: str, enum: type) -> List:
+    values = []
+    for name in _split(value):
+        if name not in enum.__members__:
+            raise ValueError(f"[{section_name}] unknown {key}: {name}")
+        values.append(enum[name])
+    if len(values) == 0:
+        raise ValueError(f"[{section_name}] no {key}")
+    return values
+
+
+def _split(value: str) -> List[str]:
+    return [part.strip() for part in value.replace("\n", ",").split(",") if part.strip()]
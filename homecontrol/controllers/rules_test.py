@@ -0,0 +1,148 @@
+from datetime import datetime, time
+
+import pytest
+from dateutil import tz
+
+from ..config import config
+from ..data.network import Network
+from ..smart_interfaces.devices import Devices
+from ..utils.clock import Clock
+from .controller import Controller, States
+from .rules import Rules, _parse_brightness
+
+_RULES = """
+[Reading]
+interfaces = billy, Cylinder lamp
+
+[Reading: home in the evening]
+time = 19:00-23:00
+on = mobile_matteus, guests_matteus
+state = on
+brightness = 0.6
+
+[Reading: weekend]
+weekdays = saturday, sunday
+brightness = 0.8
+"""
+
+
+@pytest.fixture
+def rules_file(tmp_path):
+    path = tmp_path / "rules.cfg"
+    path.write_text(_RULES)
+    yield path
+    Controller.controllers = [controller for controller in Controller.controllers if controller not in Rules.controllers]
+    Rules.controllers = []
+    Rules._modified_time = None
+
+
+def test_compile_rules(rules_file):
+    controllers = Rules.load(rules_file)
+    Rules.controllers = controllers
+
+    assert len(controllers) == 1
+    controller = controllers[0]
+    assert controller.name == "Reading"
+    assert controller._get_interfaces() == [Devices.billy, Devices.cylinder]
+    assert [rule.name for rule in controller.rules] == ["Reading: home in the evening", "Reading: weekend"]
+    assert controller._boundaries == [time(0), time(19), time(23)]
+
+
+@pytest.mark.parametrize(
+    "name,now,home,expected_state,expected_brightness,expected_next_change",
+    [
+        ("evening and home", datetime(2022, 12, 1, 20), True, States.on, 0.6, datetime(2022, 12, 1, 23)),
+        ("evening and away", datetime(2022, 12, 1, 20), False, States.off, None, datetime(2022, 12, 1, 23)),
+        ("before the evening", datetime(2022, 12, 1, 18), True, States.off, None, datetime(2022, 12, 1, 19)),
+        ("after the evening", datetime(2022, 12, 1, 23, 30), True, States.off, None, datetime(2022, 12, 2)),
+        ("later rules override", datetime(2022, 12, 3, 20), True, States.on, 0.8, datetime(2022, 12, 3, 23)),
+    ],
+)
+def test_evaluate_rules(name, now, home, expected_state, expected_brightness, expected_next_change, rules_file):
+    print(name)
+    controller = Rules.load(rules_file)[0]
+    Rules.controllers = [controller]
+    if home:
+        Network.mobile_matteus.turned_on()
+    else:
+        Network.mobile_matteus.turned_off()
+
+    Clock.simulate(now)
+    try:
+        controller.state = States.off
+        controller.update()
+        assert controller.state == expected_state
+        assert controller.brightness == expected_brightness
+        assert controller._next_boundary(Clock.now()) == expected_next_change.replace(tzinfo=tz.tzlocal())
+    finally:
+        Clock.reset()
+        Network.mobile_matteus.turned_on()
+
+
+def test_reload_when_changed(rules_file):
+    rules_file_before = config.general.rules_file
+    config.general.rules_file = str(rules_file)
+    try:
+        Rules.reload_if_changed()
+        first = Rules.controllers
+        assert len(first) == 1 and first[0] in Controller.controllers
+
+        # Invalid rules keep the old ones
+        rules_file.write_text(_RULES + "\n[Reading: invalid]\ntime = evening\n")
+        Rules._modified_time = 0
+        Rules.reload_if_changed()
+        assert Rules.controllers == first
+
+        rules_file.write_text(_RULES.replace("[Reading", "[Hallway"))
+        Rules._modified_time = 0
+        Rules.reload_if_changed()
+        assert [controller.name for controller in Rules.controllers] == ["Hallway"]
+        assert first[0] not in Controller.controllers
+    finally:
+        config.general.rules_file = rules_file_before
+
+
+@pytest.mark.parametrize(
+    "name,invalid",
+    [
+        ("invalid priority after a valid controller", "\n[Hallway]\ninterfaces = billy\npriority = high\n"),
+        ("duplicate section", "\n[Reading]\ninterfaces = billy\n"),
+        ("not a config file", "\nbrightness 0.6\n"),
+        ("whole number brightness", "\n[Reading: bright]\nbrightness = 1\n"),
+    ],
+)
+def test_invalid_reload_keeps_the_old_controllers(name, invalid, rules_file):
+    print(name)
+    rules_file_before = config.general.rules_file
+    config.general.rules_file = str(rules_file)
+    try:
+        Rules.reload_if_changed()
+        controllers_before = list(Controller.controllers)
+
+        rules_file.write_text(_RULES + invalid)
+        Rules._modified_time = 0
+        Rules.reload_if_changed()
+
+        assert Controller.controllers == controllers_before
+    finally:
+        config.general.rules_file = rules_file_before
+
+
+@pytest.mark.parametrize(
+    "name,value,expected",
+    [
+        ("fraction", "0.6", 0.6),
+        ("full", "1.0", 1.0),
+        ("percentage", "60%", 0.6),
+        ("whole number", "1", None),
+        ("bridge value", "200", None),
+        ("over 100%", "120%", None),
+    ],
+)
+def test_parse_brightness(name, value, expected):
+    print(name)
+    if expected is None:
+        with pytest.raises(ValueError):
+            _parse_brightness(value)
+    else:
+        assert _parse_brightness(value) == pytest.approx(expected)
@@ -3,8 +3,11 @@ from tealprint import TealPrint
 from .device import Device
 from .guest_of import GuestOf
 from .ip_device import IpDevice
+from .neighbour_device import NeighbourDevice
+from .presence import Person, Presence
 from .unifi_device import UnifiDevice
 from .unifi_device import api as _unifi_api
+from .unifi_events import UnifiEvents
 
 
 class Network:
@@ -41,22 +44,42 @@ class Network:
         mac_address="5e:0b:26:29:41:6d",
         max_off_time=420,
     )
+    # The same phones seen in this host's neighbour table, when General.neighbour_table is on
+    neighbour_matteus = NeighbourDevice(
+        name="Neighbour Matteus",
+        mac_address="fa:2f:79:bf:01:f4",
+        max_off_time=240,
+    )
+    neighbour_emma = NeighbourDevice(
+        name="Neighbour Emma",
+        mac_address="5e:0b:26:29:41:6d",
+        max_off_time=420,
+    )
+
+    # Add more devices with lower weights to be more sure someone is home, see Person
+    matteus = Person("Matteus", {mobile_matteus: 1.0, neighbour_matteus: 0.8})
+    emma = Person("Emma", {mobile_emma: 1.0, neighbour_emma: 0.8})
 
     @staticmethod
     def is_matteus_home() -> bool:
-        return Network.mobile_matteus.is_on()
+        return Network.matteus.is_home()
 
     @staticmethod
     def is_emma_home() -> bool:
-        return Network.mobile_emma.is_on()
+        return Network.emma.is_home()
 
     @staticmethod
     def is_someone_home() -> bool:
-        return Network.mobile_matteus.is_on() or Network.mobile_emma.is_on() or Network.is_guest_home()
+        return Presence.is_someone_home()
 
     @staticmethod
     def is_guest_home(*guest_of: GuestOf) -> bool:
-        return _unifi_api.is_guest_active(*guest_of)
+        return Presence.is_guest_home(*guest_of)
+
+    @staticmethod
+    def start_event_stream() -> None:
+        """Get clients connecting and disconnecting from UniFi as they happen"""
+        UnifiEvents(_unifi_api).start()
 
     @staticmethod
     def update() -> None:
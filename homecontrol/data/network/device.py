@@ -1,20 +1,24 @@
 from __future__ import annotations
 
-from typing import List
+from typing import Callable, Dict, List, Type
 
 from tealprint import TealPrint
 
+from ...utils.context import Context
+from ...utils.inputs import Inputs
 from ..stats import Stats
 
 
 class Device:
     _devices: List[Device] = []
+    _listeners: List[Callable[[Device], None]] = []
 
     def __init__(self, name: str, log: bool) -> None:
         self.name: str = name
         self._on: bool = True
         self._log: bool = log
         Device._devices.append(self)
+        Context.add_source(Inputs.device(self.name), self._is_on)
 
     def turned_on(self) -> None:
         if not self._on:
@@ -22,6 +26,7 @@ class Device:
             if self._log:
                 Stats.log("device", f'{{"power":"on","device":"{self.name}"}}')
             self._on = True
+            self._changed()
 
     def turned_off(self) -> None:
         if self._on:
@@ -29,14 +34,42 @@ class Device:
             if self._log:
                 Stats.log("device", f'{{"power":"off","device":"{self.name}"}}')
             self._on = False
+            self._changed()
+
+    def _changed(self) -> None:
+        for listener in Device._listeners:
+            try:
+                listener(self)
+            except Exception as e:
+                TealPrint.warning(f"⚠ Failed to handle change of device {self.name}: {e}")
+        Inputs.changed(Inputs.device(self.name))
+
+    @staticmethod
+    def add_listener(listener: Callable[[Device], None]) -> None:
+        """Called with the device every time it's turned on or off"""
+        Device._listeners.append(listener)
 
     def is_on(self) -> bool:
+        Inputs.read(Inputs.device(self.name))
+        return Context.get(Inputs.device(self.name), self._is_on)
+
+    def _is_on(self) -> bool:
         return self._on
 
     def update(self) -> None:
         pass
 
+    @classmethod
+    def update_many(cls, devices: List[Device]) -> None:
+        """Update devices of this type together. Calls update() on each by default"""
+        for device in devices:
+            device.update()
+
     @staticmethod
     def update_all() -> None:
+        by_type: Dict[Type[Device], List[Device]] = {}
         for device in Device._devices:
-            device.update()
+            by_type.setdefault(type(device), []).append(device)
+
+        for device_type, devices in by_type.items():
+            device_type.update_many(devices)
@@ -0,0 +1,187 @@
+from __future__ import annotations
+
+import json
+import queue
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Dict, List, Optional
+
+from ...utils.websocket import OPCODE_CLOSE, OPCODE_TEXT, accept_key, encode_frame
+
+
+class FakeUnifi:
+    """A local stand-in for the UniFi controller to test against without a real controller.
+
+    Serves /api/login, the clients (stat/sta) and user groups (list/usergroup) of a site, and the site's websocket
+    events on /wss/s/<site>/events over plain http. Requests without the cookie from the last login get a 401.
+
+    connect(), roam() and disconnect() change the clients and push the events like the real controller does.
+    """
+
+    def __init__(self, host: str = "127.0.0.1", port: int = 0, site_id: str = "default") -> None:
+        self._server = ThreadingHTTPServer((host, port), _Handler)
+        self._server.daemon_threads = True
+        self._server.unifi = self  # type: ignore
+        self._thread: Optional[threading.Thread] = None
+        self._streams: List[queue.Queue] = []
+        self._lock = threading.Lock()
+        self._session = ""
+        self.site_id = site_id
+        self.logins = 0
+        self.requests: List[str] = []
+        self.clients: Dict[str, Dict[str, Any]] = {}
+        self.user_groups: List[Dict[str, str]] = [{"_id": "default", "name": "Default"}]
+
+    @property
+    def url(self) -> str:
+        address = self._server.server_address
+        return f"http://{address[0]}:{address[1]}"
+
+    def start(self) -> FakeUnifi:
+        self._thread = threading.Thread(target=self._server.serve_forever, name="FakeUnifi", daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        self.close_streams()
+        self._server.shutdown()
+        self._server.server_close()
+
+    # --- Clients ---
+    def connect(self, mac: str, usergroup_id: str = "", key: str = "EVT_WU_Connected") -> None:
+        with self._lock:
+            self.clients[mac] = {"mac": mac, "last_seen": int(time.time()), "usergroup_id": usergroup_id}
+        self.send_events([{"key": key, "user": mac, "time": int(time.time() * 1000)}])
+
+    def roam(self, mac: str) -> None:
+        with self._lock:
+            self.clients[mac]["last_seen"] = int(time.time())
+        self.send_events([{"key": "EVT_WU_Roam", "user": mac, "time": int(time.time() * 1000)}])
+
+    def disconnect(self, mac: str) -> None:
+        with self._lock:
+            self.clients.pop(mac, None)
+        self.send_events([{"key": "EVT_WU_Disconnected", "user": mac, "time": int(time.time() * 1000)}])
+
+    def expire_session(self) -> None:
+        """The next requests get a 401 until logging in again"""
+        with self._lock:
+            self._session = ""
+
+    def count(self, path: str) -> int:
+        """Number of requests to paths that end with path"""
+        with self._lock:
+            return len([request for request in self.requests if request.endswith(path)])
+
+    def _login(self) -> str:
+        with self._lock:
+            self.logins += 1
+            self._session = f"session-{self.logins}"
+            return self._session
+
+    def _is_logged_in(self, cookie: str) -> bool:
+        with self._lock:
+            return self._session != "" and f"unifises={self._session}" in cookie
+
+    def _get(self, path: str) -> Optional[List[Dict[str, Any]]]:
+        with self._lock:
+            self.requests.append(path)
+            if path == f"/api/s/{self.site_id}/stat/sta":
+                return [dict(client) for client in self.clients.values()]
+            if path == f"/api/s/{self.site_id}/list/usergroup":
+                return [dict(group) for group in self.user_groups]
+        return None
+
+    # --- Websocket ---
+    @property
+    def stream_count(self) -> int:
+        with self._lock:
+            return len(self._streams)
+
+    def send_events(self, events: List[Dict[str, Any]], message: str = "events") -> None:
+        """Push a message to all connected websockets"""
+        data = json.dumps({"meta": {"rc": "ok", "message": message}, "data": events})
+        with self._lock:
+            for stream in self._streams:
+                stream.put(data)
+
+    def close_streams(self) -> None:
+        with self._lock:
+            for stream in self._streams:
+                stream.put(None)
+
+    def _add_stream(self) -> queue.Queue:
+        stream: queue.Queue = queue.Queue()
+        with self._lock:
+            self._streams.append(stream)
+        return stream
+
+    def _remove_stream(self, stream: queue.Queue) -> None:
+        with self._lock:
+            if stream in self._streams:
+                self._streams.remove(stream)
+
+
+class _Handler(BaseHTTPRequestHandler):
+    @property
+    def unifi(self) -> FakeUnifi:
+        return self.server.unifi  # type: ignore
+
+    def do_POST(self) -> None:
+        self.rfile.read(int(self.headers.get("Content-Length", 0)))
+        if self.path != "/api/login":
+            self._send_json(404, {"meta": {"rc": "error", "msg": "api.err.NotFound"}, "data": []})
+            return
+
+        session = self.unifi._login()
+        self.send_response(200)
+        self.send_header("Set-Cookie", f"unifises={session}; Path=/")
+        self.send_header("X-CSRF-Token", f"csrf-{session}")
+        self.send_header("Content-Length", "0")
+        self.end_headers()
+
+    def do_GET(self) -> None:
+        if not self.unifi._is_logged_in(self.headers.get("Cookie", "")):
+            self._send_json(401, {"meta": {"rc": "error", "msg": "api.err.LoginRequired"}, "data": []})
+        elif self.path == f"/wss/s/{self.unifi.site_id}/events":
+            self._websocket()
+        else:
+            data = self.unifi._get(self.path)
+            if data is None:
+                self._send_json(404, {"meta": {"rc": "error", "msg": "api.err.NotFound"}, "data": []})
+            else:
+                self._send_json(200, {"meta": {"rc": "ok"}, "data": data})
+
+    def _websocket(self) -> None:
+        self.send_response(101)
+        self.send_header("Upgrade", "websocket")
+        self.send_header("Connection", "Upgrade")
+        self.send_header("Sec-WebSocket-Accept", accept_key(self.headers.get("Sec-WebSocket-Key", "")))
+        self.end_headers()
+        self.close_connection = True
+
+        stream = self.unifi._add_stream()
+        try:
+            while True:
+                message = stream.get()
+                if message is None:
+                    self.wfile.write(encode_frame(OPCODE_CLOSE, b"\x03\xe8", mask=False))
+                    return
+                self.wfile.write(encode_frame(OPCODE_TEXT, message.encode(), mask=False))
+                self.wfile.flush()
+        except (BrokenPipeError, ConnectionResetError):
+            pass
+        finally:
+            self.unifi._remove_stream(stream)
+
+    def _send_json(self, status: int, body: Any) -> None:
+        data = json.dumps(body).encode()
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def log_message(self, format: str, *args: Any) -> None:
+        pass
@@ -1,12 +1,12 @@
-import sys
-from subprocess import DEVNULL, CalledProcessError, run
-from time import time
+from __future__ import annotations
+
+from typing import List
 
 from tealprint import TealPrint
-from tealprint.tealprint import TealLevel
 
-from ...config import config
+from ...utils.clock import Clock
 from .device import Device
+from .prober import Probe, Prober
 
 
 class IpDevice(Device):
@@ -27,32 +27,34 @@ class IpDevice(Device):
         self._off_times = off_times
         self._off_times_check = off_times
         self._updates_every = updates_every
-        self._timeout = str(timeout)
+        self._timeout = timeout
         self._last_update = 0
 
     def update(self) -> None:
-        # Only update the devices every 15 seconds (we don't want to ping so often)
-        elapsed_time = time() - self._last_update
-        if elapsed_time >= self._updates_every:
-            self._ping_device()
-            self._last_update = time()
+        IpDevice.update_many([self])
 
-    def _ping_device(self) -> None:
-        last_off_time = self._off_times
+    @classmethod
+    def update_many(cls, devices: List[Device]) -> None:
+        """Probe all devices that are due at the same time, so an offline device doesn't hold up the others"""
+        # Only update the devices every 15 seconds (we don't want to ping so often)
+        due: List[IpDevice] = []
+        for device in devices:
+            if isinstance(device, IpDevice) and Clock.time() - device._last_update >= device._updates_every:
+                due.append(device)
+        if len(due) == 0:
+            return
 
-        try:
-            out = DEVNULL
+        reachable = Prober.probe([Probe(device.ip, device._timeout) for device in due])
+        for device in due:
+            device._set_reachable(reachable.get(device.ip, False))
+            device._last_update = Clock.time()
 
-            if config.general.log_level == TealLevel.debug:
-                out = sys.stdout
+    def _set_reachable(self, reachable: bool) -> None:
+        last_off_time = self._off_times
 
-            run(
-                ["ping", "-c", "1", "-W", self._timeout, self.ip],
-                check=True,
-                stdout=out,
-            )
+        if reachable:
             self._off_times = 0
-        except CalledProcessError:
+        else:
             self._off_times += 1
 
         if last_off_time >= self._off_times_check and self._off_times == 0:
@@ -0,0 +1,39 @@
+import pytest
+from mockito import ANY, unstub, verify, when
+
+from .ip_device import IpDevice
+from .prober import Prober
+
+
+@pytest.mark.parametrize(
+    "name,results,expected_on",
+    [
+        ("stays on when unreachable fewer times than off_times", [False, False], True),
+        ("turns off when unreachable more than off_times", [False, False, False], False),
+        ("turns on again when reachable", [False, False, False, True], True),
+    ],
+)
+def test_off_times_hysteresis(name, results, expected_on):
+    print(name)
+    device = IpDevice("10.0.0.1", "Hysteresis test", updates_every=0, off_times=2)
+    device._off_times = 0
+
+    for result in results:
+        when(Prober).probe(ANY).thenReturn({"10.0.0.1": result})
+        device.update()
+
+    assert device.is_on() == expected_on
+    unstub()
+
+
+def test_probes_due_devices_together():
+    first = IpDevice("10.0.0.2", "First", updates_every=0)
+    second = IpDevice("10.0.0.3", "Second", updates_every=0)
+    not_due = IpDevice("10.0.0.4", "Not due", updates_every=3600)
+    not_due._last_update = 10**12
+    when(Prober).probe(ANY).thenReturn({})
+
+    IpDevice.update_many([first, second, not_due])
+
+    verify(Prober, times=1).probe(ANY)
+    unstub()
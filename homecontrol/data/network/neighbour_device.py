@@ -0,0 +1,119 @@
+from __future__ import annotations
+
+import json
+import subprocess
+from typing import Any, Dict, List, Optional
+
+from tealprint import TealPrint
+
+from ...config import config
+from ...utils.clock import Clock
+from .device import Device
+
+_PRESENT_STATES = {"REACHABLE", "DELAY", "PROBE", "PERMANENT"}
+"""Confirmed lately, or being confirmed now. STALE and FAILED entries keep their address but might be long gone"""
+
+
+class Neighbour:
+    def __init__(self, ip: str, mac_address: str, states: List[str]) -> None:
+        self.ip = ip
+        self.mac_address = mac_address
+        self.states = states
+
+    @property
+    def present(self) -> bool:
+        return any(state in _PRESENT_STATES for state in self.states)
+
+
+class NeighbourTable:
+    """The kernel's neighbour (ARP) table; which devices on the local network this host has talked to lately.
+
+    Read with `ip -j neigh show`, as /proc/net/arp doesn't have the state of the entries.
+    """
+
+    command = ["ip", "-j", "neigh", "show"]
+    timeout = 5
+
+    @staticmethod
+    def read() -> List[Neighbour]:
+        try:
+            result = subprocess.run(
+                NeighbourTable.command,
+                capture_output=True,
+                text=True,
+                timeout=NeighbourTable.timeout,
+                check=True,
+            )
+            entries: Any = json.loads(result.stdout or "[]")
+        except (OSError, subprocess.SubprocessError, ValueError) as e:
+            TealPrint.warning(f"⚠ Could not read the neighbour table with {' '.join(NeighbourTable.command)}: {e}")
+            return []
+
+        neighbours: List[Neighbour] = []
+        for entry in entries if isinstance(entries, list) else []:
+            if not isinstance(entry, dict) or "dst" not in entry or "lladdr" not in entry:
+                continue
+            neighbours.append(Neighbour(entry["dst"], entry["lladdr"].lower(), entry.get("state", [])))
+        return neighbours
+
+
+class NeighbourDevice(Device):
+    """A device is on when it's a confirmed entry in the kernel's neighbour table, found by its MAC or IP address.
+
+    Only sees devices that this host has talked to lately. It doesn't send anything on the network itself,
+    the kernel confirms the entries while there's traffic to the device. Always off unless General.neighbour_table
+    is turned on.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        mac_address: Optional[str] = None,
+        ip: Optional[str] = None,
+        log: bool = False,
+        max_off_time: int = 300,
+    ) -> None:
+        """
+        params:
+          max_off_time(int): Seconds since it was last confirmed in the table before it's turned off
+        """
+        if not mac_address and not ip:
+            raise ValueError("A mac_address or ip is needed")
+        super().__init__(name, log)
+        self._mac_address = mac_address.lower() if mac_address else None
+        self._ip = ip
+        self._max_off_time = max_off_time
+        self._last_seen: Optional[float] = None
+        # Not seen until it's in the table
+        self._on = False
+
+    def update(self) -> None:
+        NeighbourDevice.update_many([self])
+
+    @classmethod
+    def update_many(cls, devices: List[Device]) -> None:
+        """Read the neighbour table once for all devices"""
+        if not config.general.neighbour_table:
+            for device in devices:
+                device.turned_off()
+            return
+
+        by_mac: Dict[str, Neighbour] = {}
+        by_ip: Dict[str, Neighbour] = {}
+        for neighbour in NeighbourTable.read():
+            if neighbour.present:
+                by_mac[neighbour.mac_address] = neighbour
+                by_ip[neighbour.ip] = neighbour
+
+        now = Clock.time()
+        for device in devices:
+            if not isinstance(device, NeighbourDevice):
+                continue
+
+            if (device._mac_address and device._mac_address in by_mac) or (device._ip and device._ip in by_ip):
+                device._last_seen = now
+
+            if device._last_seen is not None and now - device._last_seen <= device._max_off_time:
+                device.turned_on()
+            else:
+                device.turned_off()
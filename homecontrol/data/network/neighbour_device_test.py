@@ -0,0 +1,103 @@
+import json
+from datetime import timedelta
+
+import pytest
+
+from ...config import config
+from ...utils.clock import Clock
+from .device import Device
+from .neighbour_device import NeighbourDevice, NeighbourTable
+
+_NEIGHBOURS = [
+    {"dst": "192.168.0.2", "dev": "eth0", "lladdr": "AA:BB:CC:00:00:02", "state": ["REACHABLE"]},
+    {"dst": "192.168.0.3", "dev": "eth0", "state": ["INCOMPLETE"]},
+    {"dst": "192.168.0.4", "dev": "eth0", "lladdr": "aa:bb:cc:00:00:04", "state": ["DELAY"]},
+    {"dst": "192.168.0.5", "dev": "eth0", "lladdr": "aa:bb:cc:00:00:05", "state": ["STALE"]},
+    {"dst": "192.168.0.6", "dev": "eth0", "lladdr": "aa:bb:cc:00:00:06", "state": ["FAILED"]},
+]
+
+
+@pytest.fixture
+def neighbour_file(tmp_path):
+    path = tmp_path / "neighbours.json"
+    path.write_text(json.dumps(_NEIGHBOURS))
+    original = (NeighbourTable.command, config.general.neighbour_table)
+    NeighbourTable.command = ["cat", str(path)]
+    config.general.neighbour_table = True
+    yield path
+    NeighbourTable.command, config.general.neighbour_table = original
+
+
+def test_read_neighbour_table(neighbour_file):
+    neighbours = NeighbourTable.read()
+
+    assert [(neighbour.ip, neighbour.mac_address, neighbour.present) for neighbour in neighbours] == [
+        ("192.168.0.2", "aa:bb:cc:00:00:02", True),
+        ("192.168.0.4", "aa:bb:cc:00:00:04", True),
+        ("192.168.0.5", "aa:bb:cc:00:00:05", False),
+        ("192.168.0.6", "aa:bb:cc:00:00:06", False),
+    ]
+
+
+def test_read_fails_without_the_command(neighbour_file):
+    NeighbourTable.command = ["/nonexistent/ip", "-j", "neigh", "show"]
+
+    assert NeighbourTable.read() == []
+
+
+@pytest.mark.parametrize(
+    "name,mac_address,ip,expected_on",
+    [
+        ("on when found by mac", "aa:bb:cc:00:00:02", None, True),
+        ("on when found by ip", None, "192.168.0.4", True),
+        ("off when incomplete", None, "192.168.0.3", False),
+        ("off when stale", "aa:bb:cc:00:00:05", None, False),
+        ("off when failed", None, "192.168.0.6", False),
+        ("off when missing", "aa:bb:cc:00:00:09", None, False),
+    ],
+)
+def test_update_from_neighbour_table(name, mac_address, ip, expected_on, neighbour_file):
+    print(name)
+    device = NeighbourDevice("Neighbour test", mac_address=mac_address, ip=ip)
+
+    device.update()
+
+    assert device.is_on() == expected_on
+
+
+def test_stays_on_until_max_off_time(neighbour_file):
+    device = NeighbourDevice("Neighbour timeout test", ip="192.168.0.2", max_off_time=60)
+    device.update()
+    neighbour_file.write_text(json.dumps([dict(_NEIGHBOURS[0], state=["STALE"])]))
+
+    Clock.simulate(Clock.now())
+    try:
+        device.update()
+        assert device.is_on()
+
+        Clock.simulate(Clock.now() + timedelta(seconds=61))
+        device.update()
+        assert not device.is_on()
+    finally:
+        Clock.reset()
+
+
+@pytest.mark.parametrize(
+    "name,enabled,expected_on",
+    [
+        ("on when the neighbour table is used", True, True),
+        ("off when the neighbour table isn't used", False, False),
+    ],
+)
+def test_update_all_devices(name, enabled, expected_on, neighbour_file):
+    print(name)
+    config.general.neighbour_table = enabled
+    original = Device._devices
+    Device._devices = []
+    try:
+        device = NeighbourDevice("Neighbour update all test", mac_address="aa:bb:cc:00:00:04")
+        Device.update_all()
+    finally:
+        Device._devices = original
+
+    assert device.is_on() == expected_on
@@ -0,0 +1,194 @@
+from __future__ import annotations
+
+import threading
+from types import MappingProxyType
+from typing import Callable, Dict, List, Mapping
+
+from tealprint import TealPrint
+
+from ...utils.context import Context
+from ...utils.inputs import Inputs
+from .device import Device
+from .guest_of import GuestOf
+from .unifi_device import api as _unifi_api
+
+_SOMEONE = "someone"
+_GUESTS = "guests"
+
+
+class Person:
+    """Someone living here, who is home when the devices that are on give enough confidence.
+
+    Each device has a weight; how sure we are that the person is home when it's on. The confidence is
+    1 - (1 - weight1) * (1 - weight2) * ... of the devices that are on. To not flicker between home and away,
+    the person comes home when it reaches home_confidence, and leaves when it drops below away_confidence.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        devices: Dict[Device, float],
+        home_confidence: float = 0.7,
+        away_confidence: float = 0.3,
+    ) -> None:
+        if name in (_SOMEONE, _GUESTS):
+            raise ValueError(f"'{name}' can't be used as the name of a person")
+        if away_confidence > home_confidence:
+            raise ValueError(f"away_confidence ({away_confidence}) is higher than home_confidence ({home_confidence})")
+        self.name = name
+        self.devices = devices
+        self.home_confidence = home_confidence
+        self.away_confidence = away_confidence
+        Presence.add(self)
+
+    def is_home(self) -> bool:
+        return Presence.is_home(self.name)
+
+    def calculate_confidence(self) -> float:
+        not_home = 1.0
+        for device, weight in self.devices.items():
+            if device._is_on():
+                not_home *= 1 - weight
+        return 1 - not_home
+
+
+class PresenceState:
+    """Who's home, calculated every time a device or guest group changes"""
+
+    __slots__ = ("people", "confidence", "guests", "someone_home", "any_guest_home")
+
+    def __init__(self, people: Dict[str, bool], confidence: Dict[str, float], guests: Dict[GuestOf, bool]) -> None:
+        self.people: Mapping[str, bool] = MappingProxyType(people)
+        self.confidence: Mapping[str, float] = MappingProxyType(confidence)
+        self.guests: Mapping[GuestOf, bool] = MappingProxyType(guests)
+        self.any_guest_home = any(guests.values())
+        self.someone_home = self.any_guest_home or any(people.values())
+
+
+class Presence:
+    """Combines the network devices and UniFi guest groups into who's home.
+
+    It's only calculated when a source changes, so asking who's home is a lookup. Controllers reading it are
+    updated when it changes through Inputs.presence(); others can subscribe with add_listener().
+    """
+
+    _lock = threading.RLock()
+    _people: Dict[str, Person] = {}
+    _people_by_device: Dict[Device, List[Person]] = {}
+    _state = PresenceState({}, {}, {guest_of: False for guest_of in GuestOf})
+    _listeners: List[Callable[[str, bool], None]] = []
+
+    @staticmethod
+    def add(person: Person) -> None:
+        with Presence._lock:
+            Presence._people[person.name] = person
+            for device in person.devices:
+                Presence._people_by_device.setdefault(device, []).append(person)
+            Presence._update([person], Presence._state.guests)
+
+    @staticmethod
+    def add_listener(listener: Callable[[str, bool], None]) -> None:
+        """Called with the Inputs key (Inputs.presence()) and the new value every time someone comes or leaves"""
+        Presence._listeners.append(listener)
+
+    @staticmethod
+    def is_home(name: str) -> bool:
+        Inputs.read(Inputs.presence(name))
+        return Presence._get().people.get(name, False)
+
+    @staticmethod
+    def get_confidence(name: str) -> float:
+        Inputs.read(Inputs.presence(name))
+        return Presence._get().confidence.get(name, 0.0)
+
+    @staticmethod
+    def is_someone_home() -> bool:
+        Inputs.read(Inputs.presence(_SOMEONE))
+        return Presence._get().someone_home
+
+    @staticmethod
+    def is_guest_home(*guest_of_list: GuestOf) -> bool:
+        """Checks if a guest is home
+
+        Args:
+            guest_of_list (GuestOf): the guest groups to check. If empty, it checks all guest groups.
+        """
+        state = Presence._get()
+        if len(guest_of_list) == 0:
+            Inputs.read(Inputs.presence(_GUESTS))
+            return state.any_guest_home
+
+        for guest_of in guest_of_list:
+            Inputs.read(Inputs.presence(_guests_key(guest_of)))
+        return any(state.guests[guest_of] for guest_of in guest_of_list)
+
+    @staticmethod
+    def _get() -> PresenceState:
+        return Context.get(Inputs.PRESENCE, Presence._get_state)
+
+    @staticmethod
+    def _get_state() -> PresenceState:
+        return Presence._state
+
+    @staticmethod
+    def _device_changed(device: Device) -> None:
+        with Presence._lock:
+            people = Presence._people_by_device.get(device)
+            if people:
+                Presence._update(people, Presence._state.guests)
+
+    @staticmethod
+    def _guests_changed(guests: Dict[GuestOf, bool]) -> None:
+        with Presence._lock:
+            Presence._update([], guests)
+
+    @staticmethod
+    def _update(people: List[Person], guests: Mapping[GuestOf, bool]) -> None:
+        """Calculate the people that might have changed. Call with the lock held"""
+        old = Presence._state
+        is_home = dict(old.people)
+        confidence = dict(old.confidence)
+        for person in people:
+            confidence[person.name] = person.calculate_confidence()
+            was_home = is_home.get(person.name, False)
+            if not was_home and confidence[person.name] >= person.home_confidence:
+                is_home[person.name] = True
+            elif was_home and confidence[person.name] < person.away_confidence:
+                is_home[person.name] = False
+            else:
+                is_home[person.name] = was_home
+
+        new = PresenceState(is_home, confidence, dict(guests))
+        Presence._state = new
+
+        changes: Dict[str, bool] = {}
+        for name, home in new.people.items():
+            if old.people.get(name, False) != home:
+                TealPrint.info(f"🏠 {name} is {'home' if home else 'away'}")
+                changes[name] = home
+        for guest_of, home in new.guests.items():
+            if old.guests.get(guest_of, False) != home:
+                changes[_guests_key(guest_of)] = home
+        if old.any_guest_home != new.any_guest_home:
+            changes[_GUESTS] = new.any_guest_home
+        if old.someone_home != new.someone_home:
+            TealPrint.info(f"🏠 {'Someone is home' if new.someone_home else 'Everyone has left'}")
+            changes[_SOMEONE] = new.someone_home
+
+        for name, home in changes.items():
+            input = Inputs.presence(name)
+            for listener in Presence._listeners:
+                try:
+                    listener(input, home)
+                except Exception as e:
+                    TealPrint.warning(f"⚠ Failed to handle presence change of {name}: {e}")
+            Inputs.changed(input)
+
+
+def _guests_key(guest_of: GuestOf) -> str:
+    return f"{_GUESTS}.{guest_of.name}"
+
+
+Context.add_source(Inputs.PRESENCE, Presence._get_state)
+Device.add_listener(Presence._device_changed)
+_unifi_api.add_listener(Presence._guests_changed)
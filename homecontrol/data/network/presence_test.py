@@ -0,0 +1,84 @@
+from typing import List, Tuple
+
+import pytest
+
+from ...utils.inputs import Inputs
+from .device import Device
+from .guest_of import GuestOf
+from .presence import Person, Presence
+
+
+@pytest.fixture
+def no_guests():
+    Presence._guests_changed({guest_of: False for guest_of in GuestOf})
+    yield
+    Presence._guests_changed({guest_of: False for guest_of in GuestOf})
+
+
+@pytest.mark.parametrize(
+    "name,changes,expected_home",
+    [
+        ("home when the mobile is on", [("mobile", True)], True),
+        ("not home from only the computer", [("mobile", False), ("computer", True)], False),
+        ("home from the computer and tv together", [("mobile", False), ("computer", True), ("tv", True)], True),
+        ("stays home when only the computer is left", [("computer", True), ("mobile", False)], True),
+        ("away when everything is off", [("mobile", False), ("computer", False)], False),
+    ],
+)
+def test_confidence_with_hysteresis(name: str, changes: List[Tuple[str, bool]], expected_home: bool) -> None:
+    print(name)
+    devices = {device: Device(f"{name} {device}", False) for device in ["mobile", "computer", "tv"]}
+    person = Person(f"Person {name}", {devices["mobile"]: 0.9, devices["computer"]: 0.5, devices["tv"]: 0.5})
+    # Devices start on
+    for device in ["computer", "tv"]:
+        devices[device].turned_off()
+
+    for device, on in changes:
+        if on:
+            devices[device].turned_on()
+        else:
+            devices[device].turned_off()
+
+    assert person.is_home() == expected_home
+
+
+def test_guest_groups(no_guests) -> None:
+    Presence._guests_changed({GuestOf.both: False, GuestOf.matteus: True, GuestOf.emma: False})
+
+    assert Presence.is_guest_home()
+    assert Presence.is_guest_home(GuestOf.both, GuestOf.matteus)
+    assert not Presence.is_guest_home(GuestOf.emma)
+    assert Presence.is_someone_home()
+
+
+def test_only_changes_are_sent_to_listeners_and_controllers(no_guests) -> None:
+    mobile = Device("Listener mobile", False)
+    Person("Listener", {mobile: 1.0})
+    changes: List[Tuple[str, bool]] = []
+    Presence.add_listener(lambda input, home: changes.append((input, home)))
+    Inputs.wait_for_changes(0)
+
+    mobile.turned_off()
+    Presence._guests_changed({GuestOf.both: False, GuestOf.matteus: False, GuestOf.emma: True})
+    Presence._guests_changed({GuestOf.both: False, GuestOf.matteus: False, GuestOf.emma: True})
+    Presence._listeners.pop()
+
+    assert changes == [
+        (Inputs.presence("Listener"), False),
+        (Inputs.presence("guests.emma"), True),
+        (Inputs.presence("guests"), True),
+    ]
+    assert {input for input, _ in changes}.issubset(Inputs.wait_for_changes(0))
+
+
+def test_queries_read_their_input() -> None:
+    with Inputs.record() as reads:
+        Presence.is_home("Someone")
+        Presence.is_guest_home(GuestOf.emma)
+
+    assert reads.inputs == {Inputs.presence("Someone"), Inputs.presence("guests.emma")}
+
+
+def test_reserved_name() -> None:
+    with pytest.raises(ValueError):
+        Person("someone", {})
@@ -0,0 +1,183 @@
+from __future__ import annotations
+
+import errno
+import os
+import selectors
+import socket
+import struct
+import time
+from typing import Dict, List, Optional, Tuple
+
+from tealprint import TealPrint
+
+_ICMP_ECHO_REQUEST = 8
+_ICMP_ECHO_REPLY = 0
+_TCP_PORTS = (80, 443, 22)
+"""Ports tried when ICMP isn't allowed. A refused connection also means the device is up"""
+
+
+class Probe:
+    def __init__(self, ip: str, timeout: float) -> None:
+        self.ip = ip
+        self.timeout = timeout
+
+
+class Prober:
+    """Checks if many IP devices are reachable at the same time, each with its own timeout.
+
+    Sends ICMP echo requests from one socket. Unprivileged ICMP sockets need net.ipv4.ping_group_range to include
+    the user, raw sockets need root or CAP_NET_RAW. If neither is allowed, it tries to connect to a few TCP ports.
+    """
+
+    _sequence = 0
+
+    @staticmethod
+    def probe(probes: List[Probe]) -> Dict[str, bool]:
+        """Probe all IPs at once. Returns if each IP is reachable"""
+        if len(probes) == 0:
+            return {}
+
+        # Probe each IP once, with the longest timeout
+        by_ip: Dict[str, Probe] = {}
+        for probe in probes:
+            if probe.ip not in by_ip or probe.timeout > by_ip[probe.ip].timeout:
+                by_ip[probe.ip] = probe
+        probes = list(by_ip.values())
+
+        icmp_socket = Prober._open_icmp_socket()
+        if icmp_socket:
+            with icmp_socket:
+                return Prober._probe_icmp(icmp_socket, probes)
+        return Prober._probe_tcp(probes)
+
+    @staticmethod
+    def _open_icmp_socket() -> Optional[socket.socket]:
+        for type in [socket.SOCK_DGRAM, socket.SOCK_RAW]:
+            try:
+                return socket.socket(socket.AF_INET, type, socket.IPPROTO_ICMP)
+            except OSError:
+                pass
+        TealPrint.debug("ICMP sockets aren't allowed, probing with TCP instead")
+        return None
+
+    @staticmethod
+    def _probe_icmp(icmp_socket: socket.socket, probes: List[Probe]) -> Dict[str, bool]:
+        reachable = {probe.ip: False for probe in probes}
+        start = time.monotonic()
+        deadlines = {probe.ip: start + probe.timeout for probe in probes}
+        identifier = os.getpid() & 0xFFFF
+        sequences: Dict[int, str] = {}
+
+        for probe in probes:
+            Prober._sequence = (Prober._sequence + 1) & 0xFFFF
+            sequences[Prober._sequence] = probe.ip
+            try:
+                icmp_socket.sendto(_echo_request(identifier, Prober._sequence), (probe.ip, 0))
+            except OSError as e:
+                TealPrint.debug(f"Failed to send ICMP echo to {probe.ip}: {e}")
+                deadlines.pop(probe.ip)
+
+        icmp_socket.setblocking(False)
+        with selectors.DefaultSelector() as selector:
+            selector.register(icmp_socket, selectors.EVENT_READ)
+            while deadlines:
+                now = time.monotonic()
+                deadlines = {ip: deadline for ip, deadline in deadlines.items() if deadline > now}
+                if not deadlines:
+                    break
+
+                if not selector.select(min(deadlines.values()) - now):
+                    continue
+
+                try:
+                    packet, (ip, _) = icmp_socket.recvfrom(1024)
+                except OSError:
+                    continue
+
+                # Raw sockets get all ICMP messages; unprivileged ICMP sockets only the replies, with another id
+                is_raw = icmp_socket.type == socket.SOCK_RAW
+                reply = _parse_echo_reply(packet, is_raw)
+                if not reply or (is_raw and reply[0] != identifier):
+                    continue
+                if sequences.get(reply[1]) == ip and ip in deadlines:
+                    reachable[ip] = True
+                    deadlines.pop(ip)
+
+        return reachable
+
+    @staticmethod
+    def _probe_tcp(probes: List[Probe]) -> Dict[str, bool]:
+        reachable = {probe.ip: False for probe in probes}
+        start = time.monotonic()
+        deadlines: Dict[socket.socket, Tuple[str, float]] = {}
+
+        with selectors.DefaultSelector() as selector:
+            for probe in probes:
+                for port in _TCP_PORTS:
+                    tcp_socket = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+                    tcp_socket.setblocking(False)
+                    result = tcp_socket.connect_ex((probe.ip, port))
+                    if result in (0, errno.ECONNREFUSED):
+                        reachable[probe.ip] = True
+                        tcp_socket.close()
+                    elif result in (errno.EINPROGRESS, errno.EWOULDBLOCK):
+                        selector.register(tcp_socket, selectors.EVENT_WRITE)
+                        deadlines[tcp_socket] = (probe.ip, start + probe.timeout)
+                    else:
+                        tcp_socket.close()
+
+            while deadlines:
+                now = time.monotonic()
+                for tcp_socket, (ip, deadline) in list(deadlines.items()):
+                    if deadline <= now or reachable[ip]:
+                        Prober._close(selector, tcp_socket, deadlines)
+                if not deadlines:
+                    break
+
+                timeout = min(deadline for _, deadline in deadlines.values()) - now
+                for key, _ in selector.select(timeout):
+                    tcp_socket = key.fileobj
+                    ip, _ = deadlines[tcp_socket]
+                    result = tcp_socket.getsockopt(socket.SOL_SOCKET, socket.SO_ERROR)
+                    if result in (0, errno.ECONNREFUSED):
+                        reachable[ip] = True
+                    Prober._close(selector, tcp_socket, deadlines)
+
+        return reachable
+
+    @staticmethod
+    def _close(
+        selector: selectors.BaseSelector, tcp_socket: socket.socket, deadlines: Dict[socket.socket, Tuple[str, float]]
+    ) -> None:
+        selector.unregister(tcp_socket)
+        tcp_socket.close()
+        deadlines.pop(tcp_socket)
+
+
+def _echo_request(identifier: int, sequence: int) -> bytes:
+    header = struct.pack("!BBHHH", _ICMP_ECHO_REQUEST, 0, 0, identifier, sequence)
+    payload = b"home-control"
+    checksum = _checksum(header + payload)
+    return struct.pack("!BBHHH", _ICMP_ECHO_REQUEST, 0, checksum, identifier, sequence) + payload
+
+
+def _parse_echo_reply(packet: bytes, has_ip_header: bool) -> Optional[Tuple[int, int]]:
+    """The identifier and sequence number of an echo reply, or None if it's another ICMP message"""
+    if has_ip_header:
+        header_length = (packet[0] & 0x0F) * 4
+        packet = packet[header_length:]
+    if len(packet) < 8:
+        return None
+    type, _, _, identifier, sequence = struct.unpack("!BBHHH", packet[:8])
+    if type != _ICMP_ECHO_REPLY:
+        return None
+    return identifier, sequence
+
+
+def _checksum(data: bytes) -> int:
+    if len(data) % 2:
+        data += b"\0"
+    total = sum(struct.unpack(f"!{len(data) // 2}H", data))
+    total = (total >> 16) + (total & 0xFFFF)
+    total += total >> 16
+    return ~total & 0xFFFF
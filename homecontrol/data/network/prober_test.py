@@ -0,0 +1,41 @@
+import socket
+import struct
+
+from mockito import unstub, when
+
+from .prober import Probe, Prober, _checksum, _echo_request, _parse_echo_reply
+
+
+def test_echo_request_has_valid_checksum():
+    packet = _echo_request(0x1234, 7)
+
+    assert _checksum(packet) == 0
+    assert struct.unpack("!BBHHH", packet[:8])[3:] == (0x1234, 7)
+
+
+def test_parse_echo_reply():
+    reply = b"\x00" + _echo_request(0x1234, 7)[1:]
+
+    assert _parse_echo_reply(reply, has_ip_header=False) == (0x1234, 7)
+    assert _parse_echo_reply(_echo_request(0x1234, 7), has_ip_header=False) is None
+
+
+def test_tcp_probe_all_at_once():
+    with socket.socket(socket.AF_INET, socket.SOCK_STREAM) as server:
+        server.bind(("127.0.0.1", 0))
+        server.listen()
+
+        reachable = Prober._probe_tcp([Probe("127.0.0.1", 1)])
+
+    assert reachable == {"127.0.0.1": True}
+
+
+def test_probe_same_ip_twice_when_sending_fails():
+    with socket.socket(socket.AF_INET, socket.SOCK_DGRAM) as udp_socket:
+        when(Prober)._open_icmp_socket().thenReturn(udp_socket)
+
+        # Not a valid address, sending fails
+        reachable = Prober.probe([Probe("256.0.0.1", 1), Probe("256.0.0.1", 2)])
+
+    assert reachable == {"256.0.0.1": False}
+    unstub()
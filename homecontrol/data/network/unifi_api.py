@@ -1,11 +1,14 @@
-from time import time
-from typing import Any, Dict, Union
+import threading
+from typing import Callable, Dict, List, Optional, Union
 
-from pyunifi.controller import Controller
 from tealprint import TealPrint
 
 from ...config import config
+from ...utils.clock import Clock
+from ...utils.context import Context
+from ...utils.inputs import Inputs
 from .guest_of import GuestOf
+from .unifi_client import Client, UnifiClient
 
 
 class _UserGroup:
@@ -19,72 +22,173 @@ class _UserGroup:
 
 class UnifiApi:
     def __init__(self) -> None:
-        self._controller: Controller
-        self._clients: Dict[str, Any] = {}
+        self._client: Optional[UnifiClient] = None
+        self._clients: Dict[str, Client] = {}
+        self._tracked: Dict[str, List[Callable[[], None]]] = {}
+        self._group_ids: Dict[str, str] = {}
+        """The user group of the clients in the last poll and the tracked clients, to know which guest group is home
+        from an event"""
         self._usergroups: Dict[str, _UserGroup] = {}
+        self._lock = threading.RLock()
+        self._push_updates = False
+        self._last_poll: Optional[float] = None
+        self._listeners: List[Callable[[Dict[GuestOf, bool]], None]] = []
+        Context.add_source(Inputs.GUESTS, self._get_guests_home)
+
+    def track(self, mac_address: str, on_change: Optional[Callable[[], None]] = None) -> None:
+        """Keep the client with this mac address, other clients are only used for the guest groups
+
+        Args:
+            on_change: Called when an event says the client connected
+        """
+        listeners = self._tracked.setdefault(mac_address, [])
+        if on_change:
+            listeners.append(on_change)
+
+    def add_listener(self, listener: Callable[[Dict[GuestOf, bool]], None]) -> None:
+        """Called with which guest groups are home every time a guest group comes or leaves"""
+        self._listeners.append(listener)
+
+    def get_unifi_client(self) -> UnifiClient:
+        if self._client is None:
+            self._client = UnifiClient()
+        return self._client
 
     def update(self) -> None:
         try:
-            if getattr(self, "_controller", None) is None:
-                self._init_controller()
-
-            self._update_user_groups()
-            self._update_clients()
+            if self._should_poll():
+                self.get_unifi_client()
+                self._update_user_groups()
+                self._update_clients()
+                self._last_poll = Clock.time()
             self._update_last_active()
         except Exception:
             TealPrint.error("❗ Something went wrong connecting to UNIFI", print_exception=True)
 
-    def _init_controller(self) -> None:
-        self._controller = Controller(
-            config.unifi.host,
-            config.unifi.username,
-            config.unifi.password,
-            port=config.unifi.port,
-            site_id=config.unifi.site_id,
-            ssl_verify=True,
-        )
+    def _should_poll(self) -> bool:
+        # Events are pushed to us, only fetch everything once in a while to be safe
+        if self._push_updates and self._last_poll is not None:
+            return Clock.time() - self._last_poll >= config.unifi.event_stream_poll_interval
+        return True
+
+    def set_push_updates(self, enabled: bool) -> None:
+        """Set when clients (dis)connecting are pushed through client_connected(). When disabled it polls every update"""
+        if self._push_updates == enabled:
+            return
+
+        self._push_updates = enabled
+        if enabled:
+            TealPrint.info("📡 Getting UNIFI clients from the event stream")
+        else:
+            TealPrint.warning("⚠ Lost the UNIFI event stream, polling the controller instead")
+
+    def client_connected(self, mac_address: str) -> None:
+        """A client connected or roamed to another access point"""
+        now = Clock.time()
+        with self._lock:
+            if mac_address in self._tracked:
+                client = self._clients.get(mac_address)
+                if client:
+                    client.last_seen = now
+                else:
+                    self._clients[mac_address] = Client(mac_address, now, self._group_ids.get(mac_address, ""))
+
+            if mac_address in self._group_ids:
+                self._set_group_active(self._group_ids[mac_address], now)
+            else:
+                # A new client, get its user group with the next update
+                self._last_poll = None
+
+        self._update_last_active()
+        for on_change in self._tracked.get(mac_address, []):
+            on_change()
+
+    def client_disconnected(self, mac_address: str) -> None:
+        """A client disconnected. Its device is turned off by the next update the same way as when polling"""
+        if mac_address in self._tracked:
+            with self._lock:
+                self._last_poll = None
 
     def _update_user_groups(self) -> None:
-        TealPrint.debug("Getting UNIFI user groups")
-        for group in self._controller.get_user_groups():
-            id = str(group["_id"])
-            name = str(group["name"])
-
-            # Create new
-            if id not in self._usergroups:
-                self._usergroups[id] = _UserGroup(id, name)
-            # Update existing
-            else:
-                self._usergroups[id].name = name
+        groups = self._client.get_user_groups()
+        with self._lock:
+            for group in groups:
+                id = str(group["_id"])
+                name = str(group["name"])
+
+                # Create new
+                if id not in self._usergroups:
+                    self._usergroups[id] = _UserGroup(id, name)
+                # Update existing
+                else:
+                    self._usergroups[id].name = name
 
     def _update_clients(self) -> None:
-        TealPrint.debug("Getting UNIFI clients")
-        clients: Dict[str, Any] = {}
-        for client in self._controller.get_clients():
-            clients[client["mac"]] = client
-        self._clients = clients
+        clients: Dict[str, Client] = {}
+        group_ids: Dict[str, str] = {}
+        for client in self._client.get_clients():
+            if client.mac in self._tracked:
+                clients[client.mac] = client
+            group_ids[client.mac] = client.usergroup_id
 
-    def _update_last_active(self) -> None:
         TealPrint.debug("Updating last active time for usergroups")
-        for client in self._clients.values():
-            group_id: str = ""
-            if "usergroup_id" in client:
-                group_id = client["usergroup_id"]
-
-            if not group_id:
-                group_id = self._get_default_group().id
-
-            group = self._usergroups[group_id]
-            group.last_active_time = time()
+        now = Clock.time()
+        with self._lock:
+            self._clients = clients
+            for group_id in set(group_ids.values()):
+                self._set_group_active(group_id, now)
+
+            # Rebuilt every poll so it doesn't grow with every guest that has been here. Tracked clients are kept
+            # so their arrival is still pushed without a poll
+            for mac_address, group_id in self._group_ids.items():
+                if mac_address in self._tracked and mac_address not in group_ids:
+                    group_ids[mac_address] = group_id
+            self._group_ids = group_ids
+
+    def _set_group_active(self, group_id: str, time: float) -> None:
+        if not group_id:
+            group_id = self._get_default_group().id
+
+        group = self._usergroups.get(group_id)
+        if group:
+            group.last_active_time = time
 
+    def _update_last_active(self) -> None:
         # Log if Home/Away was changed
-        for group in self._usergroups.values():
+        changed = False
+        with self._lock:
+            for group in self._usergroups.values():
+                group.was_home = group.is_home
+                group.is_home = UnifiApi._calculate_is_home(group)
+
+                if group.was_home != group.is_home:
+                    state_msg = "home" if group.is_home else "away"
+                    TealPrint.info(f"👨‍👨‍👧‍👦 Usergroup {group.name} is {state_msg}")
+                    changed = True
+
+        if changed:
+            self._guests_changed()
+
+    def set_guest_home(self, guest_of: GuestOf, is_home: bool) -> None:
+        """Set if a guest is home without asking UniFi, used when simulating"""
+        group = self._get_user_group(guest_of)
+        if not group:
+            group = _UserGroup(guest_of.value, guest_of.value)
+            self._usergroups[group.id] = group
+
+        if group.is_home != is_home:
             group.was_home = group.is_home
-            group.is_home = UnifiApi._calculate_is_home(group)
-
-            if group.was_home != group.is_home:
-                state_msg = "home" if group.is_home else "away"
-                TealPrint.info(f"👨‍👨‍👧‍👦 Usergroup {group.name} is {state_msg}")
+            group.is_home = is_home
+            self._guests_changed()
+
+    def _guests_changed(self) -> None:
+        guests_home = self._get_guests_home()
+        for listener in self._listeners:
+            try:
+                listener(guests_home)
+            except Exception as e:
+                TealPrint.warning(f"⚠ Failed to handle change of the guests: {e}")
+        Inputs.changed(Inputs.GUESTS)
 
     def _get_default_group(self) -> _UserGroup:
         for group in self._usergroups.values():
@@ -92,7 +196,7 @@ class UnifiApi:
                 return group
         raise Exception("No default usergroup found")
 
-    def get_client(self, mac_address: str) -> Union[Any, None]:
+    def get_client(self, mac_address: str) -> Union[Client, None]:
         """Tries to find the client with the specified mac address. Returns None if it hasn't been active yet"""
         if mac_address in self._clients:
             return self._clients[mac_address]
@@ -103,22 +207,23 @@ class UnifiApi:
         Args:
             guest_of_list (GuestOf): the guest group to check. If empty, it will check all guest groups.
         """
+        Inputs.read(Inputs.GUESTS)
+        guests_home = Context.get(Inputs.GUESTS, self._get_guests_home)
         if len(guest_of_list) == 0:
-            return self._is_any_guest_active()
+            guest_of_list = tuple(GuestOf)
 
         for guest_of in guest_of_list:
-            usergroup = self._get_user_group(guest_of)
-            if usergroup and usergroup.is_home:
+            if guests_home[guest_of]:
                 return True
 
         return False
 
-    def _is_any_guest_active(self) -> bool:
+    def _get_guests_home(self) -> Dict[GuestOf, bool]:
+        guests_home: Dict[GuestOf, bool] = {}
         for guest_of in GuestOf:
-            active = self.is_guest_active(guest_of)
-            if active:
-                return True
-        return False
+            usergroup = self._get_user_group(guest_of)
+            guests_home[guest_of] = usergroup is not None and usergroup.is_home
+        return guests_home
 
     def _get_user_group(self, friend_of: GuestOf) -> Union[_UserGroup, None]:
         for usergroup in self._usergroups.values():
@@ -127,6 +232,6 @@ class UnifiApi:
 
     @staticmethod
     def _calculate_is_home(usergroup: _UserGroup) -> bool:
-        now = time()
+        now = Clock.time()
         elapsed_time = now - usergroup.last_active_time
         return elapsed_time <= config.unifi.guest_inactive_time
@@ -0,0 +1,167 @@
+from __future__ import annotations
+
+import json
+import os
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, Optional, Union
+
+import requests
+from tealprint import TealPrint
+
+from ...config import config
+from ...utils.clock import Clock
+from ...utils.websocket import WebSocket, WebSocketError
+
+
+class UnifiError(Exception):
+    pass
+
+
+class Client:
+    """The only fields of a UniFi client (a device on the network) that are used"""
+
+    __slots__ = ("mac", "last_seen", "usergroup_id")
+
+    def __init__(self, mac: str, last_seen: float, usergroup_id: str) -> None:
+        self.mac = mac
+        self.last_seen = last_seen
+        self.usergroup_id = usergroup_id
+
+
+class UnifiClient:
+    """Calls the UniFi controller API with one logged in session.
+
+    The session cookie is saved to config.unifi.session_file, so restarts don't need to log in again,
+    and it only logs in again when the controller answers 401. The user groups rarely change
+    and are only fetched every config.unifi.user_groups_ttl seconds.
+    """
+
+    def __init__(self) -> None:
+        self.url = f"https://{config.unifi.host}:{config.unifi.port}"
+        self.verify: Union[bool, str] = config.unifi.ca_file or config.unifi.verify_ssl
+        """True, False or the path of the controller's (self-signed) certificate, same as requests' verify"""
+        self._session: Optional[requests.Session] = None
+        self._csrf_token: Optional[str] = None
+        self._user_groups: List[Dict[str, str]] = []
+        self._user_groups_time: Optional[float] = None
+
+    def get_user_groups(self) -> List[Dict[str, str]]:
+        """The id (_id) and name of each user group"""
+        now = Clock.time()
+        if self._user_groups_time is None or now - self._user_groups_time >= config.unifi.user_groups_ttl:
+            TealPrint.debug("Getting UNIFI user groups")
+            self._user_groups = [
+                {"_id": str(group["_id"]), "name": str(group["name"])} for group in self._get("list/usergroup")
+            ]
+            self._user_groups_time = now
+        return self._user_groups
+
+    def get_clients(self) -> Iterator[Client]:
+        """All active clients. The whole response is parsed, but only the used fields are kept of each client"""
+        TealPrint.debug("Getting UNIFI clients")
+        for client in self._get("stat/sta"):
+            yield Client(client["mac"], client.get("last_seen", 0), client.get("usergroup_id", ""))
+
+    def connect_events(self) -> WebSocket:
+        """Connect to the websocket with the events of the site, like clients connecting and disconnecting"""
+        self._get_session()
+        try:
+            return self._connect_events()
+        except WebSocketError as e:
+            # The session has expired
+            if e.status != 401:
+                raise
+            self._login()
+            return self._connect_events()
+
+    def _connect_events(self) -> WebSocket:
+        # http -> ws, https -> wss
+        url = f"ws{self.url[4:]}/wss/s/{config.unifi.site_id}/events"
+        headers = self._headers() or {}
+        headers["Cookie"] = "; ".join(f"{name}={value}" for name, value in self._session.cookies.items())
+        websocket = WebSocket(url, headers, timeout=config.unifi.timeout, verify=self.verify)
+        websocket.connect()
+        return websocket
+
+    def _get(self, path: str) -> List[Dict[str, Any]]:
+        url = f"{self.url}/api/s/{config.unifi.site_id}/{path}"
+        session = self._get_session()
+        response = session.get(url, headers=self._headers(), timeout=config.unifi.timeout, verify=self.verify)
+
+        # The session has expired
+        if response.status_code == 401:
+            self._login()
+            response = session.get(url, headers=self._headers(), timeout=config.unifi.timeout, verify=self.verify)
+
+        if response.status_code != 200:
+            raise UnifiError(f"GET {path} failed - status code: {response.status_code}")
+
+        body = response.json()
+        if body.get("meta", {}).get("rc", "ok") != "ok":
+            raise UnifiError(f"GET {path} failed: {body['meta'].get('msg')}")
+        return body.get("data", [])
+
+    def _get_session(self) -> requests.Session:
+        if self._session is None:
+            self._session = requests.Session()
+            if not self._load_session():
+                self._login()
+        return self._session
+
+    def _headers(self) -> Optional[Dict[str, str]]:
+        if self._csrf_token:
+            return {"X-CSRF-Token": self._csrf_token}
+        return None
+
+    def _login(self) -> None:
+        TealPrint.verbose("🔑 Logging in to UNIFI")
+        session = self._session or requests.Session()
+        self._session = session
+        session.cookies.clear()
+        response = session.post(
+            f"{self.url}/api/login",
+            json={"username": config.unifi.username, "password": config.unifi.password},
+            timeout=config.unifi.timeout,
+            verify=self.verify,
+        )
+        if response.status_code != 200:
+            raise UnifiError(f"Login failed - status code: {response.status_code}")
+
+        self._csrf_token = response.headers.get("X-CSRF-Token")
+        self._save_session()
+
+    def _load_session(self) -> bool:
+        if not config.unifi.session_file or self._session is None:
+            return False
+
+        path = Path(config.unifi.session_file).expanduser()
+        try:
+            with open(path) as file:
+                saved = json.load(file)
+        except (OSError, ValueError):
+            return False
+
+        if saved.get("url") != self.url or not saved.get("cookies"):
+            return False
+
+        self._session.cookies.update(saved["cookies"])
+        self._csrf_token = saved.get("csrf_token")
+        TealPrint.debug(f"Reusing the UNIFI session from {path}")
+        return True
+
+    def _save_session(self) -> None:
+        if not config.unifi.session_file or self._session is None:
+            return
+
+        path = Path(config.unifi.session_file).expanduser()
+        saved = {
+            "url": self.url,
+            "cookies": requests.utils.dict_from_cookiejar(self._session.cookies),
+            "csrf_token": self._csrf_token,
+        }
+        try:
+            # Only readable by the user, it's as good as the password
+            with open(os.open(path, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o600), "w") as file:
+                json.dump(saved, file)
+        except OSError as e:
+            TealPrint.warning(f"⚠ Could not save the UNIFI session to {path}: {e}")
@@ -0,0 +1,125 @@
+import json
+import os
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, List
+
+import pytest
+import time_machine
+
+from ...config import config
+from .unifi_client import UnifiClient, UnifiError
+
+
+class FakeController:
+    """A tiny UniFi controller that only accepts requests with the cookie it gave out at the last login"""
+
+    def __init__(self) -> None:
+        self.logins = 0
+        self.refuse_login = False
+        self.requests: List[str] = []
+        self.cookie = ""
+        self.clients: List[Dict] = [
+            {"mac": "aa:aa", "last_seen": 100, "usergroup_id": "group", "hostname": "phone", "tx_bytes": 1},
+            {"mac": "bb:bb", "last_seen": 200},
+        ]
+        controller = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_POST(self) -> None:
+                self.rfile.read(int(self.headers["Content-Length"]))
+                if controller.refuse_login:
+                    self.send_response(400)
+                    self.end_headers()
+                    return
+                controller.logins += 1
+                controller.cookie = f"session-{controller.logins}"
+                self.send_response(200)
+                self.send_header("Set-Cookie", f"unifises={controller.cookie}; Path=/")
+                self.send_header("X-CSRF-Token", "token")
+                self.end_headers()
+
+            def do_GET(self) -> None:
+                controller.requests.append(self.path)
+                if f"unifises={controller.cookie}" not in self.headers.get("Cookie", "") or not controller.cookie:
+                    self.send_response(401)
+                    self.end_headers()
+                    return
+
+                data = controller.clients if self.path.endswith("stat/sta") else [{"_id": "group", "name": "both"}]
+                body = json.dumps({"meta": {"rc": "ok"}, "data": data}).encode()
+                self.send_response(200)
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, *args) -> None:
+                pass
+
+        self.server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        self.url = f"http://127.0.0.1:{self.server.server_address[1]}"
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+
+    def new_client(self) -> UnifiClient:
+        client = UnifiClient()
+        client.url = self.url
+        return client
+
+
+@pytest.fixture
+def controller(tmp_path):
+    original = (config.unifi.session_file, config.unifi.user_groups_ttl)
+    config.unifi.session_file = str(tmp_path / "session.json")
+    config.unifi.user_groups_ttl = 3600
+    controller = FakeController()
+    yield controller
+    controller.server.shutdown()
+    controller.server.server_close()
+    config.unifi.session_file, config.unifi.user_groups_ttl = original
+
+
+def test_only_keeps_the_used_fields(controller: FakeController) -> None:
+    clients = list(controller.new_client().get_clients())
+
+    assert [(c.mac, c.last_seen, c.usergroup_id) for c in clients] == [("aa:aa", 100, "group"), ("bb:bb", 200, "")]
+
+
+def test_reuses_the_saved_session_after_a_restart(controller: FakeController) -> None:
+    list(controller.new_client().get_clients())
+    list(controller.new_client().get_clients())
+
+    assert controller.logins == 1
+
+
+def test_logs_in_again_when_the_session_expires(controller: FakeController) -> None:
+    client = controller.new_client()
+    list(client.get_clients())
+    controller.cookie = "expired"
+
+    assert len(list(client.get_clients())) == 2
+    assert controller.logins == 2
+
+
+def test_user_groups_are_only_fetched_again_after_the_ttl(controller: FakeController) -> None:
+    client = controller.new_client()
+    with time_machine.travel(0, tick=False) as traveller:
+        assert client.get_user_groups() == [{"_id": "group", "name": "both"}]
+        traveller.shift(3599)
+        client.get_user_groups()
+        traveller.shift(1)
+        client.get_user_groups()
+
+    assert len([path for path in controller.requests if path.endswith("list/usergroup")]) == 2
+
+
+def test_session_file_is_only_readable_by_the_user(controller: FakeController) -> None:
+    list(controller.new_client().get_clients())
+
+    assert os.stat(config.unifi.session_file).st_mode & 0o777 == 0o600
+
+
+def test_failed_login_raises(controller: FakeController) -> None:
+    controller.refuse_login = True
+
+    with pytest.raises(UnifiError):
+        list(controller.new_client().get_clients())
@@ -1,5 +1,4 @@
-from time import time
-
+from ...utils.clock import Clock
 from .device import Device
 from .unifi_api import UnifiApi
 
@@ -17,11 +16,12 @@ class UnifiDevice(Device):
         super().__init__(name, log)
         self._mac_address = mac_address
         self._max_off_time = max_off_time
+        api.track(mac_address, self.update)
 
     def update(self) -> None:
         client = api.get_client(self._mac_address)
         if client:
-            elapsed_time = time() - client["last_seen"]
+            elapsed_time = Clock.time() - client.last_seen
 
             # Check if it has been turned off
             if self.is_on() and elapsed_time > self._max_off_time:
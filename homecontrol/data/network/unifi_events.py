@@ -0,0 +1,105 @@
+from __future__ import annotations
+
+import json
+import threading
+import time
+from typing import Any, Dict, Optional
+
+from tealprint import TealPrint
+
+from .unifi_api import UnifiApi
+
+_MAX_RECONNECT_DELAY = 60
+_CONNECTED = {
+    "EVT_WU_Connected",
+    "EVT_WG_Connected",
+    "EVT_LU_Connected",
+    "EVT_LG_Connected",
+    "EVT_WU_Roam",
+    "EVT_WU_RoamRadio",
+}
+_DISCONNECTED = {
+    "EVT_WU_Disconnected",
+    "EVT_WG_Disconnected",
+    "EVT_LU_Disconnected",
+    "EVT_LG_Disconnected",
+}
+
+
+class UnifiEvents:
+    """Listens to the UniFi controller's websocket events and updates UnifiApi as clients connect, roam and disconnect.
+
+    UnifiApi only polls the controller every Unifi.event_stream_poll_interval seconds while it's connected,
+    and on every update otherwise.
+    """
+
+    def __init__(self, api: UnifiApi) -> None:
+        self._api = api
+        self._thread: Optional[threading.Thread] = None
+        self._stop = False
+
+    def start(self) -> None:
+        self._stop = False
+        self._thread = threading.Thread(target=self._run, name="UnifiEvents", daemon=True)
+        self._thread.start()
+
+    def stop(self) -> None:
+        """Stop listening after the next message or when the controller closes the connection"""
+        self._stop = True
+
+    def _run(self) -> None:
+        TealPrint.info("🧵 Started UNIFI event stream")
+        delay = 1.0
+        while not self._stop:
+            try:
+                self._listen()
+                delay = 1.0
+            except Exception as e:
+                TealPrint.verbose(f"📡 UNIFI event stream disconnected: {e}")
+
+            self._api.set_push_updates(False)
+            if not self._stop:
+                time.sleep(delay)
+                delay = min(delay * 2, _MAX_RECONNECT_DELAY)
+
+    def _listen(self) -> None:
+        with self._api.get_unifi_client().connect_events() as websocket:
+            self._api.set_push_updates(True)
+            while not self._stop:
+                message = websocket.receive()
+                if message is None:
+                    return
+                self._handle_message(message)
+
+    def _handle_message(self, message: str) -> None:
+        try:
+            body = json.loads(message)
+        except ValueError:
+            TealPrint.warning(f"⚠ Invalid message from the UNIFI event stream: {message}")
+            return
+
+        if not isinstance(body, dict):
+            return
+
+        type = body.get("meta", {}).get("message")
+        for data in body.get("data", []):
+            if not isinstance(data, dict):
+                continue
+            if type == "events":
+                self._handle_event(data)
+            # Updated client stats, it's still connected
+            elif type == "sta:sync" and data.get("mac"):
+                self._api.client_connected(data["mac"])
+
+    def _handle_event(self, event: Dict[str, Any]) -> None:
+        key = event.get("key")
+        mac_address = event.get("user") or event.get("guest")
+        if not mac_address:
+            return
+
+        if key in _CONNECTED:
+            TealPrint.debug(f"📡 {key} {mac_address}")
+            self._api.client_connected(mac_address)
+        elif key in _DISCONNECTED:
+            TealPrint.debug(f"📡 {key} {mac_address}")
+            self._api.client_disconnected(mac_address)
@@ -0,0 +1,131 @@
+import threading
+import time
+from typing import Callable
+
+import pytest
+
+from ...config import config
+from .fake_unifi import FakeUnifi
+from .guest_of import GuestOf
+from .unifi_api import UnifiApi
+from .unifi_events import UnifiEvents
+
+_MOBILE = "aa:bb:cc:00:00:01"
+_GUEST = "aa:bb:cc:00:00:02"
+
+
+def _wait_for(condition: Callable[[], bool], timeout: float = 5) -> None:
+    deadline = time.monotonic() + timeout
+    while not condition():
+        assert time.monotonic() < deadline, "Timed out"
+        time.sleep(0.01)
+
+
+@pytest.fixture
+def unifi(tmp_path):
+    original = (config.unifi.session_file, config.unifi.event_stream_poll_interval)
+    config.unifi.session_file = str(tmp_path / "session.json")
+    config.unifi.event_stream_poll_interval = 3600
+    unifi = FakeUnifi().start()
+    unifi.user_groups.append({"_id": "guests", "name": GuestOf.matteus.value})
+    yield unifi
+    unifi.stop()
+    config.unifi.session_file, config.unifi.event_stream_poll_interval = original
+
+
+@pytest.fixture
+def api(unifi: FakeUnifi):
+    api = UnifiApi()
+    api.get_unifi_client().url = unifi.url
+    api.update()
+    events = UnifiEvents(api)
+    events.start()
+    _wait_for(lambda: unifi.stream_count == 1)
+    yield api
+    events.stop()
+    unifi.close_streams()
+
+
+def test_arrival_is_pushed_without_polling(unifi: FakeUnifi) -> None:
+    api = UnifiApi()
+    changed = threading.Event()
+    api.track(_MOBILE, changed.set)
+    api.get_unifi_client().url = unifi.url
+    # Seen before, then left
+    unifi.connect(_MOBILE)
+    api.update()
+    unifi.disconnect(_MOBILE)
+    api.update()
+    assert api.get_client(_MOBILE) is None
+
+    events = UnifiEvents(api)
+    events.start()
+    _wait_for(lambda: unifi.stream_count == 1)
+    unifi.connect(_MOBILE)
+
+    assert changed.wait(5)
+    assert api.get_client(_MOBILE) is not None
+    api.update()
+    assert unifi.count("stat/sta") == 2
+    events.stop()
+    unifi.close_streams()
+
+
+def test_new_guest_is_home_after_the_next_update(unifi: FakeUnifi, api: UnifiApi) -> None:
+    assert not api.is_guest_active(GuestOf.matteus)
+
+    unifi.connect(_GUEST, usergroup_id="guests")
+    # Its user group isn't known yet, so the next update polls even though the stream is connected
+    _wait_for(lambda: api._should_poll())
+    api.update()
+
+    assert api.is_guest_active(GuestOf.matteus)
+    assert unifi.count("stat/sta") == 2
+
+
+def test_known_guest_is_home_from_the_event(unifi: FakeUnifi, api: UnifiApi) -> None:
+    unifi.connect(_GUEST, usergroup_id="guests")
+    _wait_for(lambda: api._should_poll())
+    api.update()
+    api._usergroups["guests"].last_active_time = 0
+    api.update()
+    assert not api.is_guest_active(GuestOf.matteus)
+
+    unifi.roam(_GUEST)
+
+    _wait_for(lambda: api.is_guest_active(GuestOf.matteus))
+
+
+def test_forgets_the_user_group_of_clients_that_left(unifi: FakeUnifi, api: UnifiApi) -> None:
+    unifi.connect(_GUEST, usergroup_id="guests")
+    _wait_for(lambda: api._should_poll())
+    api.update()
+    assert _GUEST in api._group_ids
+
+    unifi.disconnect(_GUEST)
+    api._last_poll = None
+    api.update()
+
+    assert _GUEST not in api._group_ids
+
+
+def test_polls_every_update_when_the_stream_is_lost(unifi: FakeUnifi, api: UnifiApi) -> None:
+    api.update()
+    assert unifi.count("stat/sta") == 1
+
+    unifi.close_streams()
+    _wait_for(lambda: not api._push_updates)
+    api.update()
+    api.update()
+
+    assert unifi.count("stat/sta") >= 3
+
+
+def test_logs_in_again_when_the_websocket_is_refused(unifi: FakeUnifi) -> None:
+    api = UnifiApi()
+    api.get_unifi_client().url = unifi.url
+    api.update()
+    unifi.expire_session()
+
+    with api.get_unifi_client().connect_events():
+        assert unifi.logins == 2
@@ -1,41 +1,48 @@
 import datetime
+from typing import Tuple
 
-from dateutil import tz
 from suntime import Sun
 from tealprint import TealPrint
 
 from ..config import config
+from ..utils.clock import Clock
+from ..utils.context import Context
+from ..utils.inputs import Inputs
 
 sun = Sun(config.location.lat, config.location.long)
 
 
 def tomorrow():
-    return datetime.datetime.now(tz.tzlocal()) + datetime.timedelta(days=1)
+    return Clock.now() + datetime.timedelta(days=1)
 
 
 class Sun:
     _sunset = sun.get_local_sunset_time()
     _sunrise = sun.get_local_sunrise_time()
-    _last_sunrise = sun.get_local_sunrise_time(datetime.datetime.now(tz.tzlocal()) - datetime.timedelta(days=1))
+    _last_sunrise = sun.get_local_sunrise_time(Clock.now() - datetime.timedelta(days=1))
 
     @staticmethod
     def update():
         # Always make sure it's the next sunset/sunrise
-        now = datetime.datetime.now(tz.tzlocal())
+        now = Clock.now()
 
         if now > Sun._sunrise:
             Sun._last_sunrise = Sun._sunrise
             Sun._sunrise = sun.get_local_sunrise_time(tomorrow())
             TealPrint.info("🌄 Sun.update(): Passed sunrise, updating to next day")
+            Inputs.changed(Inputs.SUN)
 
         if now > Sun._sunset:
             Sun._sunset = sun.get_local_sunset_time(tomorrow())
             TealPrint.info("🌇 Sun.update(): Passed sunset, updating to next day")
+            Inputs.changed(Inputs.SUN)
 
     @staticmethod
     def is_up():
-        Sun.update()
-        return Sun._sunrise > Sun._sunset
+        Inputs.read(Inputs.SUN)
+        sunrise, sunset, _ = Context.get(Inputs.SUN, Sun._get_times)
+        Inputs.read_time(min(sunrise, sunset))
+        return sunrise > sunset
 
     @staticmethod
     def is_down():
@@ -44,29 +51,58 @@ class Sun:
     @staticmethod
     def is_up_shortened(hours=0, minutes=30):
         """Like isUp(), but checks some returns false some time before the sunset and after sunrise"""
-        Sun.update()
+        Inputs.read(Inputs.SUN)
+        sunrise, sunset, last_sunrise = Context.get(Inputs.SUN, Sun._get_times)
 
         diff_time = datetime.timedelta(hours=hours, minutes=minutes)
+        Sun._read_next_change(diff_time, sunrise, sunset, last_sunrise)
 
         # Because we change the time, there are some situations where sunrise > sunset could mean that
         # the sun is still up (or that it's bright outside)
-        if Sun._sunset > Sun._sunrise:
+        if sunset > sunrise:
             return False
         else:  # Sun is up (but it might not be bright yet/still)
 
-            now = datetime.datetime.now(tz.tzlocal())
-            sunset = Sun._sunset - diff_time
+            now = Clock.now()
+            sunset = sunset - diff_time
             # until 30 min before sunset -> it's not bright
             if now > sunset:
                 return False
 
             # until 30 min after sunrise -> it's not bright
-            sunrise = Sun._last_sunrise + diff_time
+            sunrise = last_sunrise + diff_time
             if now < sunrise:
                 return False
 
             return True
 
+    @staticmethod
+    def _read_next_change(
+        diff_time: datetime.timedelta,
+        sunrise: datetime.datetime,
+        sunset: datetime.datetime,
+        last_sunrise: datetime.datetime,
+    ) -> None:
+        """is_up_shortened() changes some time before/after the sunrise and sunset"""
+        now = Clock.now()
+        changes = [
+            sunrise,
+            sunset,
+            sunset - diff_time,
+            sunrise + diff_time,
+            last_sunrise + diff_time,
+        ]
+        Inputs.read_time(min(change for change in changes if change > now))
+
+    @staticmethod
+    def _get_times() -> Tuple[datetime.datetime, datetime.datetime, datetime.datetime]:
+        """The next sunrise, the next sunset, and the last sunrise"""
+        Sun.update()
+        return Sun._sunrise, Sun._sunset, Sun._last_sunrise
+
     @staticmethod
     def is_down_shortened(hours=0, minutes=30):
         return not Sun.is_up_shortened(hours=hours, minutes=minutes)
+
+
+Context.add_source(Inputs.SUN, Sun._get_times)
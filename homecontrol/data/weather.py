@@ -1,7 +1,11 @@
+from typing import Tuple
+
 import requests
 from tealprint import TealPrint
 
 from ..config import config
+from ..utils.context import Context
+from ..utils.inputs import Inputs
 from ..utils.time import Date
 
 
@@ -22,6 +26,7 @@ class Weather:
 
     @staticmethod
     def _set_weather_info():
+        last_values = (Weather.cloud_cover, Weather.temperature, Weather._precipitation)
         parameters = Weather._weather_info["timeSeries"][0]["parameters"]
 
         for parameter in parameters:
@@ -38,30 +43,59 @@ class Weather:
                 Weather._precipitation = value
                 TealPrint.info("🌧 Weather.precipitation = " + str(value))
 
+        if (Weather.cloud_cover, Weather.temperature, Weather._precipitation) != last_values:
+            Inputs.changed(Inputs.WEATHER)
+
+    @staticmethod
+    def set_values(cloud_cover=None, temperature=None, precipitation=None):
+        """Set the weather without fetching it, used when simulating"""
+        last_values = (Weather.cloud_cover, Weather.temperature, Weather._precipitation)
+        if cloud_cover is not None:
+            Weather.cloud_cover = cloud_cover
+        if temperature is not None:
+            Weather.temperature = temperature
+        if precipitation is not None:
+            Weather._precipitation = precipitation
+
+        if (Weather.cloud_cover, Weather.temperature, Weather._precipitation) != last_values:
+            Inputs.changed(Inputs.WEATHER)
+
     @staticmethod
     def _is_cloudy():
+        cloud_cover = Weather.get_cloud_coverage()
         # Winter
         if Date.between((11, 1), (2, 15)):
-            return Weather.cloud_cover >= 3
+            return cloud_cover >= 3
         # Early Spring / Late Autumn
         elif Date.between((2, 15), (3, 20)) or Date.between((9, 20), (11, 1)):
-            return Weather.cloud_cover >= 4
+            return cloud_cover >= 4
         # Late Spring / Early Autumn
         elif Date.between((3, 20), (4, 1)) or Date.between((9, 1), (9, 20)):
-            return Weather.cloud_cover >= 6
+            return cloud_cover >= 6
         else:
             return False
 
     @staticmethod
     def get_cloud_coverage():
         """:returns value in the range of [0,8] with 8 being the highest cloud coverage"""
-        return Weather.cloud_cover
+        Inputs.read(Inputs.WEATHER)
+        cloud_cover, _, _ = Context.get(Inputs.WEATHER, Weather._get_values)
+        return cloud_cover
 
     @staticmethod
     def is_raining():
-        return Weather._precipitation > 0
+        Inputs.read(Inputs.WEATHER)
+        _, _, precipitation = Context.get(Inputs.WEATHER, Weather._get_values)
+        return precipitation > 0
+
+    @staticmethod
+    def _get_values() -> Tuple[int, int, int]:
+        return Weather.cloud_cover, Weather.temperature, Weather._precipitation
 
     @staticmethod
     def update():
         Weather._get_weather_info()
         Weather._set_weather_info()
+
+
+Context.add_source(Inputs.WEATHER, Weather._get_values)
@@ -0,0 +1,243 @@
+from __future__ import annotations
+
+import json
+import time
+from datetime import datetime, timedelta
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+from dateutil import parser as date_parser
+from dateutil import tz
+from tealprint import TealPrint
+
+from .config import config
+from .controllers.controller import Controller
+from .controllers.rules import Rules
+from .data.network import GuestOf, Network
+from .data.network.device import Device
+from .data.network.unifi_device import api as unifi_api
+from .data.weather import Weather
+from .smart_interfaces.devices import Devices
+from .smart_interfaces.groups import Groups
+from .smart_interfaces.hue.bridge_state import BridgeState
+from .smart_interfaces.hue.dispatcher import Dispatcher
+from .smart_interfaces.hue.fake_bridge import FakeBridge
+from .smart_interfaces.hue.reconciler import Reconciler
+from .smart_interfaces.hue.light_sensor import LightSensor
+from .smart_interfaces.sensors import Sensors
+from .utils.clock import Clock
+from .utils.inputs import Inputs
+
+_MIN_STEP = timedelta(seconds=1)
+
+
+class TraceEvent:
+    """A change of an input at a specific time. One of:
+
+    {"time": "...", "device": "<Network attribute>", "on": true}
+    {"time": "...", "sensor": "<Sensors attribute>", "lightlevel": 12000}
+    {"time": "...", "weather": {"cloud_cover": 4, "temperature": 10, "precipitation": 0}}
+    {"time": "...", "guest": "<GuestOf name>", "home": true}
+    """
+
+    def __init__(self, time: datetime, data: Dict[str, Any]) -> None:
+        self.time = time
+        self.data = data
+        self._validate()
+
+    def _validate(self) -> None:
+        if "device" in self.data:
+            if not isinstance(getattr(Network, self.data["device"], None), Device):
+                raise ValueError(f"No device called {self.data['device']} in Network")
+        elif "sensor" in self.data:
+            if not isinstance(getattr(Sensors, self.data["sensor"], None), LightSensor):
+                raise ValueError(f"No sensor called {self.data['sensor']} in Sensors")
+        elif "guest" in self.data:
+            if self.data["guest"] not in GuestOf.__members__:
+                raise ValueError(f"No guest group called {self.data['guest']} in GuestOf")
+        elif "weather" not in self.data:
+            raise ValueError(f"Unknown event {self.data}")
+
+    def apply(self) -> None:
+        TealPrint.verbose(f"🎞 {self.time:%Y-%m-%d %H:%M} {self.data}")
+        if "device" in self.data:
+            device: Device = getattr(Network, self.data["device"])
+            if self.data["on"]:
+                device.turned_on()
+            else:
+                device.turned_off()
+        elif "sensor" in self.data:
+            sensor: LightSensor = getattr(Sensors, self.data["sensor"])
+            sensor.light_level = self.data["lightlevel"]
+            sensor.update_light_level()
+        elif "weather" in self.data:
+            Weather.set_values(**self.data["weather"])
+        elif "guest" in self.data:
+            unifi_api.set_guest_home(GuestOf[self.data["guest"]], self.data["home"])
+
+
+class Trace:
+    """Changes of presence, light levels and weather to run the controllers through"""
+
+    def __init__(
+        self,
+        start: datetime,
+        end: datetime,
+        events: List[TraceEvent],
+        groups: Optional[Dict[str, List[str]]] = None,
+    ) -> None:
+        """
+        Args:
+            groups: The lights (Devices names) of each group (Groups names) on the real bridge
+        """
+        self.start = start
+        self.end = end
+        self.events = sorted(events, key=lambda event: event.time)
+        self.groups = groups if groups else {}
+        self._validate_groups()
+
+    def _validate_groups(self) -> None:
+        for group, lights in self.groups.items():
+            if group not in Groups.__members__:
+                raise ValueError(f"No group called {group} in Groups")
+            for light in lights:
+                if light not in Devices.__members__:
+                    raise ValueError(f"No light called {light} in Devices, in group {group}")
+
+    @staticmethod
+    def load(path: str) -> Trace:
+        """Load a trace from a json file:
+        {"start": "2022-12-01T00:00", "hours": 24, "groups": {"kitchen": ["micro", ...]}, "events": [...]}"""
+        with open(Path(path).expanduser()) as file:
+            data = json.load(file)
+
+        start = Trace._parse_time(data["start"])
+        end = start + timedelta(hours=data.get("hours", 24))
+        events = [TraceEvent(Trace._parse_time(event["time"]), event) for event in data.get("events", [])]
+        return Trace(start, end, events, data.get("groups"))
+
+    @staticmethod
+    def _parse_time(value: str) -> datetime:
+        parsed = date_parser.isoparse(value)
+        if parsed.tzinfo is None:
+            parsed = parsed.replace(tzinfo=tz.tzlocal())
+        return parsed
+
+    @staticmethod
+    def synthetic(day: Optional[datetime] = None) -> Trace:
+        """A normal workday: both are home in the morning and evening, Matteus' computer is on in the evening,
+        and daylight rises until noon and falls until the evening"""
+        if not day:
+            day = Clock.now()
+        start = day.replace(hour=0, minute=0, second=0, microsecond=0)
+
+        def at(hour: int, minute: int = 0) -> datetime:
+            return start + timedelta(hours=hour, minutes=minute)
+
+        events = [
+            TraceEvent(at(0), {"device": "mobile_matteus", "on": True}),
+            TraceEvent(at(0), {"device": "mobile_emma", "on": True}),
+            TraceEvent(at(0), {"device": "zen", "on": False}),
+            TraceEvent(at(0), {"device": "tv", "on": False}),
+            TraceEvent(at(0), {"weather": {"cloud_cover": 4, "temperature": 5, "precipitation": 0}}),
+            TraceEvent(at(8, 15), {"device": "mobile_emma", "on": False}),
+            TraceEvent(at(8, 30), {"device": "mobile_matteus", "on": False}),
+            TraceEvent(at(16, 45), {"device": "mobile_emma", "on": True}),
+            TraceEvent(at(17, 10), {"device": "mobile_matteus", "on": True}),
+            TraceEvent(at(19), {"device": "zen", "on": True}),
+            TraceEvent(at(20, 30), {"device": "tv", "on": True}),
+            TraceEvent(at(22), {"device": "tv", "on": False}),
+            TraceEvent(at(23, 30), {"device": "zen", "on": False}),
+        ]
+
+        # Daylight every 30 minutes, dark before 7 and after 18
+        for half_hour in range(48):
+            hours = half_hour / 2
+            daylight = max(0.0, 1 - abs(hours - 12.5) / 5.5)
+            lightlevel = int(2000 + daylight * 22000)
+            for sensor in ["livingroom_light", "kitchen_light"]:
+                events.append(
+                    TraceEvent(start + timedelta(minutes=30 * half_hour), {"sensor": sensor, "lightlevel": lightlevel})
+                )
+
+        return Trace(start, start + timedelta(days=1), events)
+
+
+class Simulation:
+    """Runs the controllers through a trace as fast as possible with a simulated clock.
+
+    Commands are sent to a FakeBridge with all Devices and Groups, and every command is printed.
+    Which lights are in each group only exists on the real bridge, so it's taken from the trace's groups.
+    A group that isn't in the trace has no lights: commands to it don't change any light, and lights are never
+    folded into it.
+    """
+
+    def __init__(self, trace: Trace) -> None:
+        self.trace = trace
+        self.bridge = FakeBridge()
+        self.commands = 0
+        self._printed_requests = 0
+
+    def run(self) -> None:
+        self._set_up()
+        started = time.perf_counter()
+        TealPrint.info(f"🎬 Simulating {self.trace.start:%Y-%m-%d %H:%M} - {self.trace.end:%Y-%m-%d %H:%M}")
+
+        try:
+            events = list(self.trace.events)
+            Clock.simulate(self.trace.start)
+            while Clock.now() < self.trace.end:
+                while events and events[0].time <= Clock.now():
+                    events.pop(0).apply()
+
+                Controller.update_changed(Inputs.wait_for_changes(0))
+                Dispatcher.wait_until_idle()
+                self._print_commands()
+
+                # Jump to the next event or time boundary
+                next = Clock.now() + timedelta(seconds=Controller.time_until_next_update())
+                if events:
+                    next = min(next, events[0].time)
+                Clock.simulate(max(next, Clock.now() + _MIN_STEP))
+        finally:
+            Clock.reset()
+            self.bridge.stop()
+
+        elapsed_time = time.perf_counter() - started
+        TealPrint.info(f"🏁 Simulated {self.trace.end - self.trace.start} in {elapsed_time:.1f} s, {self.commands} commands")
+
+    def _set_up(self) -> None:
+        light_ids: Dict[str, int] = {}
+        for device in Devices:
+            light_ids[device.name] = self.bridge.add_light(device.value.name)
+        for group in Groups:
+            lights = self.trace.groups.get(group.name, [])
+            if not lights:
+                TealPrint.verbose(f"🗂 No lights in {group.value.name} in the trace, commands to it won't change any light")
+            self.bridge.add_group(group.value.name, [light_ids[light] for light in lights])
+        self.bridge.start()
+
+        config.hue.host = self.bridge.host
+        config.hue.username = self.bridge.username
+        config.hue.event_stream = False
+        # Don't wait for the rate limits in simulated time
+        config.hue.light_commands_per_second = 1000
+        config.hue.group_commands_per_second = 1000
+        # Don't log simulated changes to the statistics
+        config.general.stats_file = None
+        BridgeState.invalidate()
+        # Holds are timed with the real clock before the simulation
+        Reconciler.reset()
+        Rules.reload_if_changed()
+
+    def _print_commands(self) -> None:
+        prefix_length = len(f"/api/{self.bridge.username}")
+        printed = self._printed_requests
+        requests = self.bridge.requests[printed:]
+        self._printed_requests += len(requests)
+        for request in requests:
+            if request.method != "PUT":
+                continue
+            self.commands += 1
+            path = request.path[prefix_length:]
+            TealPrint.info(f"📤 {Clock.now():%Y-%m-%d %H:%M:%S} PUT {path} {json.dumps(request.body)}")
@@ -0,0 +1,98 @@
+import json
+from datetime import datetime, timedelta
+
+import pytest
+from dateutil import tz
+
+from .config import config
+from .simulation import Simulation, Trace
+from .utils.clock import Clock
+
+
+def test_load_trace(tmp_path):
+    path = tmp_path / "trace.json"
+    path.write_text(
+        json.dumps(
+            {
+                "start": "2022-12-01T06:00",
+                "hours": 2,
+                "events": [
+                    {"time": "2022-12-01T07:00", "device": "tv", "on": True},
+                    {"time": "2022-12-01T06:30", "sensor": "kitchen_light", "lightlevel": 5000},
+                ],
+            }
+        )
+    )
+
+    trace = Trace.load(str(path))
+
+    assert trace.start == datetime(2022, 12, 1, 6, tzinfo=tz.tzlocal())
+    assert trace.end == trace.start + timedelta(hours=2)
+    assert [event.time.hour for event in trace.events] == [6, 7]
+
+
+@pytest.mark.parametrize(
+    "name,event",
+    [
+        ("unknown device", {"device": "toaster", "on": True}),
+        ("unknown sensor", {"sensor": "toaster", "lightlevel": 1}),
+        ("unknown guest group", {"guest": "toaster", "home": True}),
+        ("unknown event", {"toaster": True}),
+    ],
+)
+def test_load_trace_with_invalid_event(name, event, tmp_path):
+    print(name)
+    path = tmp_path / "trace.json"
+    path.write_text(json.dumps({"start": "2022-12-01T06:00", "events": [{"time": "2022-12-01T07:00", **event}]}))
+
+    with pytest.raises(ValueError):
+        Trace.load(str(path))
+
+
+@pytest.mark.parametrize(
+    "name,groups",
+    [
+        ("unknown group", {"toaster": ["micro"]}),
+        ("unknown light in group", {"kitchen": ["toaster"]}),
+    ],
+)
+def test_load_trace_with_invalid_group(name, groups, tmp_path):
+    print(name)
+    path = tmp_path / "trace.json"
+    path.write_text(json.dumps({"start": "2022-12-01T06:00", "groups": groups}))
+
+    with pytest.raises(ValueError):
+        Trace.load(str(path))
+
+
+def test_simulate_with_the_lights_of_the_groups():
+    hue = config.hue.__dict__.copy()
+    stats_file = config.general.stats_file
+    start = datetime(2022, 12, 1, 18, tzinfo=tz.tzlocal())
+    simulation = Simulation(Trace(start, start + timedelta(minutes=10), [], {"kitchen": ["micro", "kitchen_christmas"]}))
+
+    try:
+        simulation.run()
+    finally:
+        config.hue.__dict__.update(hue)
+        config.general.stats_file = stats_file
+
+    groups = {group["name"]: group["lights"] for group in simulation.bridge.resources["groups"].values()}
+    lights = {light["name"]: id for id, light in simulation.bridge.resources["lights"].items()}
+    assert groups["Kitchen"] == [lights["Micro lights"], lights["Adventsstake köket"]]
+    assert groups["Emma"] == []
+
+
+def test_simulate_day_sends_commands_with_simulated_clock():
+    hue = config.hue.__dict__.copy()
+    stats_file = config.general.stats_file
+    simulation = Simulation(Trace.synthetic(datetime(2022, 12, 1, tzinfo=tz.tzlocal())))
+
+    try:
+        simulation.run()
+    finally:
+        config.hue.__dict__.update(hue)
+        config.general.stats_file = stats_file
+
+    assert simulation.commands > 0
+    assert not Clock.is_simulated()
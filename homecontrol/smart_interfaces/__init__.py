@@ -1,8 +1,12 @@
-from typing import List, Union
+from typing import Dict, Iterable, List, Union
+
+from tealprint import TealPrint
 
 from ..smart_interfaces.hue.group import HueGroup
 from .devices import Devices
 from .groups import Groups
+from .hue.bridge_state import BridgeState
+from .hue.interface import HueInterface
 from .hue.light import HueLight
 from .interface import Interface
 
@@ -22,9 +26,50 @@ class SmartInterfaces:
         elif isinstance(names, list):
             for name in names:
                 interfaces.extend(SmartInterfaces.get_interfaces(name))
+            interfaces = SmartInterfaces.fold_groups(interfaces)
 
         return interfaces
 
+    @staticmethod
+    def fold_groups(interfaces: List[Interface], fields: Iterable[str] = ("on",)) -> List[Interface]:
+        """Replace lights that make up a whole group on the bridge with that group.
+        Then only one command is sent to the group instead of one for every light.
+
+        Args:
+            fields: Hue fields of the command that will be sent, only groups where all lights support them are used
+        """
+        lights: Dict[int, Interface] = {}
+        for interface in interfaces:
+            if isinstance(interface, HueLight) and interface.id != HueInterface.INVALID_ID:
+                lights[interface.id] = interface
+
+        if len(lights) < 2:
+            return interfaces
+
+        groups: Dict[int, HueGroup] = {}
+        members = BridgeState.get_group_members()
+        group_ids, _ = BridgeState.fold_into_groups(lights.keys(), fields)
+        for group_id in group_ids:
+            group = HueGroup.from_id(group_id)
+            if group:
+                for light_id in members[group_id]:
+                    groups[light_id] = group
+
+        if len(groups) == 0:
+            return interfaces
+
+        # Keep the order, the group is placed where its first light was
+        folded: List[Interface] = []
+        for interface in interfaces:
+            if isinstance(interface, HueLight) and interface.id in groups:
+                group = groups[interface.id]
+                if group not in folded:
+                    TealPrint.verbose(f"🗂 Sending to group {group.name} instead of its lights")
+                    folded.append(group)
+            elif interface not in folded:
+                folded.append(interface)
+        return folded
+
     @staticmethod
     def _find_interface(name: str) -> Union[Interface, None]:
         # Search in enum devices
@@ -3,6 +3,7 @@ from typing import List, Union
 from tealprint import TealPrint
 
 from ...core.entities.color import Color
+from ..hue.dispatcher import Dispatcher
 from ..interface import Interface
 
 
@@ -25,8 +26,9 @@ class ColorTransition(Transition):
 
     def run(self, interfaces: List[Interface]):
         TealPrint.debug(f"ColorTransition.run() Transitioning to ({self.color}) in {self.transition_time}")
-        for interface in interfaces:
-            interface.color(self.color, self.transition_time)
+        with Dispatcher.batch():
+            for interface in interfaces:
+                interface.color(self.color, self.transition_time)
 
 
 class BrightnessTransition(Transition):
@@ -46,8 +48,9 @@ class BrightnessTransition(Transition):
                 self.brightness, self.transition_time
             )
         )
-        for interface in interfaces:
-            interface.dim(self.brightness, self.transition_time)
+        with Dispatcher.batch():
+            for interface in interfaces:
+                interface.dim(self.brightness, self.transition_time)
 
 
 class BrightnessColorTransitionFactory:
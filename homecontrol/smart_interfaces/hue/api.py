@@ -1,28 +1,176 @@
 import json
-from typing import Any, Dict, Union
+import threading
+import time
+from typing import Any, Dict, List, Optional, Union
 
 import requests
+from requests.adapters import HTTPAdapter
 from tealprint import TealPrint
+from urllib3.util.retry import Retry
 
 from ...config import config
 
 
+class ApiStats:
+    """Latency statistics for calls to the Hue bridge"""
+
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self.calls = 0
+        self.errors = 0
+        self.total_time = 0.0
+        self.max_time = 0.0
+
+    def add(self, elapsed_time: float, ok: bool) -> None:
+        with self._lock:
+            self.calls += 1
+            self.total_time += elapsed_time
+            self.max_time = max(self.max_time, elapsed_time)
+            if not ok:
+                self.errors += 1
+
+    @property
+    def average_time(self) -> float:
+        if self.calls == 0:
+            return 0.0
+        return self.total_time / self.calls
+
+    def __str__(self) -> str:
+        return (
+            f"calls: {self.calls}, errors: {self.errors}, "
+            f"avg: {self.average_time * 1000:.0f} ms, max: {self.max_time * 1000:.0f} ms"
+        )
+
+
 class Api:
+    stats: Dict[str, ApiStats] = {
+        "GET": ApiStats(),
+        "PUT": ApiStats(),
+        "POST": ApiStats(),
+    }
+    _session: Optional[requests.Session] = None
+    _session_lock = threading.Lock()
+
     @staticmethod
-    def put(path: str, body: Dict[str, Any]) -> None:
+    def put(path: str, body: Dict[str, Any]) -> bool:
         jsonBody = json.dumps(body)
         TealPrint.debug(f"jsonBody: {jsonBody}")
-        response = requests.put(Api._url(path), json=body)
+        response = Api._request("PUT", path, json=body)
+        return Api._is_success("PUT", path, response)
+
+    @staticmethod
+    def post(path: str, body: Dict[str, Any]) -> Union[List[Any], None]:
+        """Create a resource on the bridge.
+
+        Returns:
+            List[Any]: The success entries of the response, or None if it failed
+        """
+        TealPrint.debug(f"jsonBody: {json.dumps(body)}")
+        response = Api._request("POST", path, json=body)
+        if response is None or not Api._is_success("POST", path, response):
+            return None
+        return [item["success"] for item in response.json() if isinstance(item, dict) and "success" in item]
+
+    @staticmethod
+    def _is_success(method: str, path: str, response: Optional[requests.Response]) -> bool:
+        if response is None:
+            return False
+
         if response.status_code != 200:
             TealPrint.warning(f"⚠ response.status_code: {response.status_code}")
-            TealPrint.warning(f"⚠ response.json: {response.json()}")
+            try:
+                TealPrint.warning(f"⚠ response.json: {response.json()}")
+            except ValueError:
+                TealPrint.warning(f"⚠ response.text: {response.text}")
+            return False
+
+        # The bridge responds with 200 even if (some of) the command failed
+        errors = Api._get_errors(response)
+        if errors:
+            TealPrint.warning(f"⚠ Hue API {method} {path} failed: {errors}")
+            return False
+        return True
+
+    @staticmethod
+    def _get_errors(response: requests.Response) -> List[Any]:
+        try:
+            body = response.json()
+        except ValueError:
+            return []
+
+        if not isinstance(body, list):
+            return []
+        return [item["error"] for item in body if isinstance(item, dict) and "error" in item]
 
     @staticmethod
     def get(path: str) -> Union[Dict[str, Any], None]:
-        response = requests.get(Api._url(path))
-        if response.ok:
+        response = Api._request("GET", path)
+        if response is not None and response.ok:
             return response.json()
 
+    @staticmethod
+    def _request(method: str, path: str, **kwargs: Any) -> Optional[requests.Response]:
+        """Send a request through the shared session and record how long it took.
+        Returns None if the bridge couldn't be reached even after retrying."""
+        session = Api._get_session()
+        start = time.perf_counter()
+        try:
+            response = session.request(method, Api._url(path), timeout=config.hue.timeout, **kwargs)
+        except requests.RequestException as e:
+            Api._add_stats(method, time.perf_counter() - start, False)
+            TealPrint.warning(f"⚠ Hue API {method} {path} failed: {e}")
+            return None
+
+        elapsed_time = time.perf_counter() - start
+        Api._add_stats(method, elapsed_time, response.ok)
+        TealPrint.debug(f"⏱ Hue API {method} {path} took {elapsed_time * 1000:.0f} ms")
+        return response
+
+    @staticmethod
+    def _add_stats(method: str, elapsed_time: float, ok: bool) -> None:
+        if method not in Api.stats:
+            Api.stats[method] = ApiStats()
+        Api.stats[method].add(elapsed_time, ok)
+
+    @staticmethod
+    def _get_session() -> requests.Session:
+        """A shared keep-alive session so we don't open a new connection to the bridge for every call"""
+        if Api._session is None:
+            with Api._session_lock:
+                if Api._session is None:
+                    Api._session = Api._create_session()
+        return Api._session
+
+    @staticmethod
+    def _create_session() -> requests.Session:
+        retry = Retry(
+            total=config.hue.retries,
+            connect=config.hue.retries,
+            read=config.hue.retries,
+            backoff_factor=config.hue.retry_backoff,
+            status_forcelist=(500, 502, 503, 504),
+            allowed_methods=frozenset(["GET", "PUT"]),
+            raise_on_status=False,
+        )
+        adapter = HTTPAdapter(
+            pool_connections=1,
+            pool_maxsize=config.hue.max_connections,
+            pool_block=True,
+            max_retries=retry,
+        )
+        session = requests.Session()
+        session.mount("http://", adapter)
+        session.mount("https://", adapter)
+        return session
+
+    @staticmethod
+    def reset_session() -> None:
+        """Close all pooled connections; the next call creates a new session"""
+        with Api._session_lock:
+            if Api._session:
+                Api._session.close()
+            Api._session = None
+
     @staticmethod
     def _url(path: str) -> str:
         url = f"http://{config.hue.host}/api/{config.hue.username}{path}"
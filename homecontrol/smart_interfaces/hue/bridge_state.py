@@ -0,0 +1,295 @@
+from __future__ import annotations
+
+import threading
+import time
+from copy import deepcopy
+from typing import Any, Callable, Dict, FrozenSet, Iterable, List, Optional, Set, Tuple
+
+from tealprint import TealPrint
+
+from ...config import config
+from .api import Api
+
+_TYPES = ["lights", "groups", "sensors"]
+_NOT_STATE = ["transitiontime", "scene"]
+_ANY_LIGHT_FIELDS = frozenset(["on", "transitiontime", "alert"])
+_TYPE_FIELDS = {
+    "on/off light": frozenset(),
+    "on/off plug-in unit": frozenset(),
+    "dimmable light": frozenset(["bri", "bri_inc"]),
+    "color temperature light": frozenset(["bri", "bri_inc", "ct", "ct_inc"]),
+    "color light": frozenset(["bri", "bri_inc", "xy", "xy_inc", "hue", "hue_inc", "sat", "sat_inc", "effect"]),
+    "extended color light": frozenset(
+        ["bri", "bri_inc", "ct", "ct_inc", "xy", "xy_inc", "hue", "hue_inc", "sat", "sat_inc", "effect"]
+    ),
+}
+"""Fields of a light command that each type of light supports, besides _ANY_LIGHT_FIELDS"""
+
+
+class BridgeState:
+    """In-memory mirror of the bridge's lights, groups and sensors.
+
+    The whole bridge is fetched with one call at most every config.hue.state_max_age seconds,
+    so reading the state of a light/group/sensor doesn't cost a round trip each time.
+    """
+
+    _lock = threading.RLock()
+    _refresh_lock = threading.Lock()
+    _resources: Dict[str, Dict[str, Dict[str, Any]]] = {}
+    _names: Dict[str, Dict[str, int]] = {}
+    _group_members: Dict[int, FrozenSet[int]] = {}
+    _light_fields: Dict[int, FrozenSet[str]] = {}
+    _scenes: Dict[str, Dict[str, Dict[str, Any]]] = {}
+    """Light states of the known scenes, keyed by scene id and then light id"""
+    _last_refresh: float = 0
+    _listeners: List[Callable[[str, int], None]] = []
+    _push_updates = False
+    names_version: int = 0
+    """Increased every time a name or id changes on the bridge"""
+
+    @staticmethod
+    def get(type: str, id: int) -> Optional[Dict[str, Any]]:
+        """Get a copy of the data for a light/group/sensor, or None if it doesn't exist on the bridge"""
+        BridgeState.refresh_if_stale()
+        with BridgeState._lock:
+            data = BridgeState._resources.get(type, {}).get(str(id))
+            if data is not None:
+                return deepcopy(data)
+        return None
+
+    @staticmethod
+    def get_all(type: str) -> Dict[str, Dict[str, Any]]:
+        """Get a copy of all resources of the specified type, keyed by id"""
+        BridgeState.refresh_if_stale()
+        with BridgeState._lock:
+            return deepcopy(BridgeState._resources.get(type, {}))
+
+    @staticmethod
+    def find_id(type: str, name: str) -> Optional[int]:
+        """Get the id of a light/group/sensor from its name (case-insensitive), or None if not found"""
+        BridgeState.refresh_if_stale()
+        with BridgeState._lock:
+            return BridgeState._names.get(type, {}).get(name.lower())
+
+    @staticmethod
+    def get_group_members() -> Dict[int, FrozenSet[int]]:
+        """Get the light ids of all groups on the bridge, keyed by group id"""
+        BridgeState.refresh_if_stale()
+        with BridgeState._lock:
+            return dict(BridgeState._group_members)
+
+    @staticmethod
+    def get_supported_fields(light_id: int) -> Optional[FrozenSet[str]]:
+        """The fields of a command that the light supports, or None if its type isn't known"""
+        BridgeState.refresh_if_stale()
+        with BridgeState._lock:
+            return BridgeState._light_fields.get(light_id)
+
+    @staticmethod
+    def fold_into_groups(light_ids: Iterable[int], fields: Iterable[str] = ()) -> Tuple[List[int], Set[int]]:
+        """Find the groups that are made up of only these lights, the largest groups first.
+
+        Args:
+            fields: Fields of the command. Only groups where every light supports all of them are used,
+                e.g. a dim sent to a group with a plug would turn on the plug
+
+        Returns:
+            The ids of the groups, and the ids of the lights that aren't part of any of those groups
+        """
+        groups: List[int] = []
+        remaining = set(light_ids)
+        if len(remaining) < 2:
+            return groups, remaining
+
+        members = BridgeState.get_group_members()
+        command_fields = frozenset(fields)
+        with BridgeState._lock:
+            light_fields = dict(BridgeState._light_fields)
+        for group_id, group_light_ids in sorted(members.items(), key=lambda item: (-len(item[1]), item[0])):
+            if len(group_light_ids) < 2 or not group_light_ids.issubset(remaining):
+                continue
+            if all(command_fields.issubset(light_fields.get(light_id, command_fields)) for light_id in group_light_ids):
+                groups.append(group_id)
+                remaining -= group_light_ids
+        return groups, remaining
+
+    @staticmethod
+    def is_stale() -> bool:
+        return time.time() - BridgeState._last_refresh >= BridgeState._max_age()
+
+    @staticmethod
+    def _max_age() -> float:
+        # Changes are pushed to us, only fetch everything once in a while to be safe
+        if BridgeState._push_updates:
+            return config.hue.event_stream_max_age
+        return config.hue.state_max_age
+
+    @staticmethod
+    def set_push_updates(enabled: bool) -> None:
+        """Set when changes are pushed from the bridge through update(). When disabled it falls back to polling"""
+        if BridgeState._push_updates == enabled:
+            return
+
+        BridgeState._push_updates = enabled
+        if enabled:
+            TealPrint.info("📡 Getting Hue changes from the event stream")
+        else:
+            TealPrint.warning("⚠ Lost the Hue event stream, polling the bridge instead")
+            # We might have missed some changes
+            BridgeState.invalidate()
+
+    @staticmethod
+    def add_listener(listener: Callable[[str, int], None]) -> None:
+        """Called with the type and id of a resource every time it's changed through update()"""
+        BridgeState._listeners.append(listener)
+
+    @staticmethod
+    def refresh_if_stale() -> None:
+        if not BridgeState.is_stale():
+            return
+
+        # Only let one thread fetch; the others wait and use the result of that fetch
+        with BridgeState._refresh_lock:
+            if BridgeState.is_stale():
+                BridgeState.refresh()
+
+    @staticmethod
+    def refresh() -> bool:
+        """Fetch the whole bridge state. Returns False (keeping the old state) if it failed"""
+        TealPrint.debug("🔄 BridgeState.refresh()")
+        all = Api.get("")
+        if not all or not isinstance(all, dict) or "lights" not in all:
+            TealPrint.warning("⚠ Could not get the bridge state")
+            # Don't hammer the bridge when it's down; try again after max age
+            BridgeState._last_refresh = time.time()
+            return False
+
+        resources: Dict[str, Dict[str, Dict[str, Any]]] = {}
+        for type in _TYPES:
+            if type in all and isinstance(all[type], dict):
+                resources[type] = all[type]
+            else:
+                resources[type] = {}
+
+        names = BridgeState._create_name_index(resources)
+        group_members = BridgeState._create_group_members(resources["groups"])
+        light_fields = BridgeState._create_light_fields(resources["lights"])
+
+        with BridgeState._lock:
+            BridgeState._resources = resources
+            BridgeState._group_members = group_members
+            BridgeState._light_fields = light_fields
+            if names != BridgeState._names:
+                BridgeState._names = names
+                BridgeState.names_version += 1
+                TealPrint.verbose(f"🗂 Updated the name index of the bridge (version {BridgeState.names_version})")
+            BridgeState._last_refresh = time.time()
+        return True
+
+    @staticmethod
+    def _create_name_index(resources: Dict[str, Dict[str, Dict[str, Any]]]) -> Dict[str, Dict[str, int]]:
+        index: Dict[str, Dict[str, int]] = {}
+        for type, all in resources.items():
+            names: Dict[str, int] = {}
+            for id_str, object in all.items():
+                if "name" in object:
+                    name = str(object["name"]).lower()
+                    # Keep the first one, same as scanning the list
+                    if name not in names:
+                        names[name] = int(id_str)
+            index[type] = names
+        return index
+
+    @staticmethod
+    def _create_group_members(groups: Dict[str, Dict[str, Any]]) -> Dict[int, FrozenSet[int]]:
+        members: Dict[int, FrozenSet[int]] = {}
+        for id_str, group in groups.items():
+            lights = group.get("lights", [])
+            if isinstance(lights, list) and len(lights) > 0:
+                members[int(id_str)] = frozenset(int(light_id) for light_id in lights)
+        return members
+
+    @staticmethod
+    def _create_light_fields(lights: Dict[str, Dict[str, Any]]) -> Dict[int, FrozenSet[str]]:
+        fields: Dict[int, FrozenSet[str]] = {}
+        for id_str, light in lights.items():
+            type_fields = _TYPE_FIELDS.get(str(light.get("type", "")).lower())
+            if type_fields is not None:
+                fields[int(id_str)] = _ANY_LIGHT_FIELDS | type_fields
+        return fields
+
+    @staticmethod
+    def invalidate() -> None:
+        """Force the next read to fetch the bridge state again"""
+        BridgeState._last_refresh = 0
+
+    @staticmethod
+    def set_scene(id: str, lightstates: Dict[str, Dict[str, Any]]) -> None:
+        """Remember the light states of a scene so recalling it updates the mirror"""
+        with BridgeState._lock:
+            BridgeState._scenes[id] = deepcopy(lightstates)
+
+    @staticmethod
+    def apply(type: str, id: int, action: str, body: Dict[str, Any]) -> None:
+        """Update the mirror with a command that the bridge accepted"""
+        if "scene" in body:
+            BridgeState._apply_scene(str(body["scene"]))
+
+        values = BridgeState._to_state(body)
+        if not values:
+            return
+
+        with BridgeState._lock:
+            data = BridgeState._resources.get(type, {}).get(str(id))
+            if data is None:
+                return
+            data.setdefault(action, {}).update(values)
+
+            # A group action changes the state of all its lights
+            if type == "groups":
+                lights = BridgeState._resources.get("lights", {})
+                for light_id in data.get("lights", []):
+                    if light_id in lights:
+                        lights[light_id].setdefault("state", {}).update(values)
+
+    @staticmethod
+    def _apply_scene(id: str) -> None:
+        with BridgeState._lock:
+            lightstates = BridgeState._scenes.get(id)
+            if lightstates is None:
+                # Don't know what the scene changed, fetch the lights again on the next read
+                BridgeState.invalidate()
+                return
+
+            lights = BridgeState._resources.get("lights", {})
+            for light_id, state in lightstates.items():
+                if light_id in lights:
+                    lights[light_id].setdefault("state", {}).update(BridgeState._to_state(state))
+
+    @staticmethod
+    def _to_state(body: Dict[str, Any]) -> Dict[str, Any]:
+        values = {key: value for key, value in body.items() if key not in _NOT_STATE}
+
+        # Setting a color changes the color mode
+        if "xy" in values:
+            values["colormode"] = "xy"
+        elif "ct" in values:
+            values["colormode"] = "ct"
+        elif "hue" in values or "sat" in values:
+            values["colormode"] = "hs"
+        return values
+
+    @staticmethod
+    def update(type: str, id: int, key: str, values: Dict[str, Any]) -> None:
+        """Update the mirror with a change reported by the bridge"""
+        with BridgeState._lock:
+            data = BridgeState._resources.get(type, {}).get(str(id))
+            if data is None:
+                return
+            data.setdefault(key, {}).update(values)
+
+        for listener in BridgeState._listeners:
+            try:
+                listener(type, id)
+            except Exception as e:
+                TealPrint.warning(f"⚠ Failed to handle update of /{type}/{id}: {e}")
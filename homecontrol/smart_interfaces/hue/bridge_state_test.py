@@ -0,0 +1,75 @@
+from typing import Any, Dict
+
+from mockito import unstub, verify, when
+
+from .api import Api
+from .bridge_state import BridgeState
+from .light import HueLight
+
+
+def bridge() -> Dict[str, Any]:
+    return {
+        "lights": {
+            "1": {"name": "Ceiling", "state": {"on": False, "bri": 100}},
+            "2": {"name": "Bamboo lamp", "state": {"on": False, "bri": 100}},
+        },
+        "groups": {
+            "1": {"name": "Kitchen", "lights": ["1", "2"], "action": {"on": False}},
+        },
+        "sensors": {
+            "3": {"name": "Daylight", "state": {"lightlevel": 12000}},
+        },
+        "config": {"name": "Philips hue"},
+    }
+
+
+def test_reads_from_one_fetch() -> None:
+    when(Api).get("").thenReturn(bridge())
+    BridgeState.invalidate()
+
+    assert BridgeState.get("lights", 1)["name"] == "Ceiling"  # type: ignore
+    assert BridgeState.get("groups", 1)["name"] == "Kitchen"  # type: ignore
+    assert BridgeState.get("sensors", 3)["state"]["lightlevel"] == 12000  # type: ignore
+    assert BridgeState.get("lights", 99) is None
+
+    verify(Api, times=1).get("")
+    unstub()
+
+
+def test_apply_group_action_updates_lights() -> None:
+    when(Api).get("").thenReturn(bridge())
+    BridgeState.refresh()
+
+    BridgeState.apply("groups", 1, "action", {"on": True, "bri": 50, "transitiontime": 10})
+
+    assert BridgeState.get("groups", 1)["action"] == {"on": True, "bri": 50}  # type: ignore
+    assert BridgeState.get("lights", 1)["state"] == {"on": True, "bri": 50}  # type: ignore
+    assert BridgeState.get("lights", 2)["state"] == {"on": True, "bri": 50}  # type: ignore
+    unstub()
+
+
+def test_find_id_is_case_insensitive() -> None:
+    when(Api).get("").thenReturn(bridge())
+    BridgeState.invalidate()
+
+    assert BridgeState.find_id("lights", "bamboo LAMP") == 2
+    assert BridgeState.find_id("groups", "kitchen") == 1
+    assert BridgeState.find_id("lights", "Unknown") is None
+    assert BridgeState.find_id("lights", "Unknown") is None
+
+    verify(Api, times=1).get("")
+    unstub()
+
+
+def test_find_returns_same_instance() -> None:
+    when(Api).get("").thenReturn(bridge())
+    BridgeState.invalidate()
+
+    first = HueLight.find("Ceiling")
+    second = HueLight.find("ceiling")
+
+    assert first is not None
+    assert first is second
+    assert first.id == 1
+    assert HueLight.find("Kitchen") is None
+    unstub()
@@ -0,0 +1,320 @@
+from __future__ import annotations
+
+import threading
+import time
+from collections import deque
+from concurrent.futures import Future
+from contextlib import contextmanager
+from enum import Enum
+from typing import Any, Deque, Dict, Iterator, List, Optional, Set, Tuple
+
+from tealprint import TealPrint
+
+from ...config import config
+from ...utils.histogram import Histogram
+from .api import Api
+from .bridge_state import BridgeState
+from .shadow_state import ShadowState
+
+_WAIT_BUCKETS = (0.01, 0.05, 0.1, 0.5, 1.0, 5.0, 10.0, 30.0)
+"""Upper bounds in seconds of the time commands wait to be sent, can be long when rate limited"""
+
+
+class Priority(Enum):
+    interactive = 0
+    """Commands from the web API, someone is waiting for them"""
+    background = 1
+    """Commands from controllers and effects"""
+
+
+class TokenBucket:
+    """Allows rate commands per second with bursts of up to burst commands"""
+
+    def __init__(self, rate: float, burst: float) -> None:
+        self.rate = rate
+        self.burst = burst
+        self._tokens = burst
+        self._last = time.monotonic()
+        self._lock = threading.Lock()
+
+    def _fill(self) -> None:
+        now = time.monotonic()
+        self._tokens = min(self.burst, self._tokens + (now - self._last) * self.rate)
+        self._last = now
+
+    def wait_time(self) -> float:
+        """Seconds until a token is available, 0 if one is available now"""
+        with self._lock:
+            self._fill()
+            if self._tokens >= 1:
+                return 0
+            return (1 - self._tokens) / self.rate
+
+    def acquire(self) -> None:
+        """Take a token, waiting until one is available"""
+        while True:
+            with self._lock:
+                self._fill()
+                if self._tokens >= 1:
+                    self._tokens -= 1
+                    return
+                wait_time = (1 - self._tokens) / self.rate
+            time.sleep(wait_time)
+
+
+class LaneStats:
+    def __init__(self) -> None:
+        self.submitted = 0
+        self.sent = 0
+        self.depth = 0
+        self.max_depth = 0
+        self.wait_time = Histogram(_WAIT_BUCKETS)
+        """From submitted until sent to the bridge"""
+
+    def __str__(self) -> str:
+        return (
+            f"depth: {self.depth} (max {self.max_depth}), submitted: {self.submitted}, sent: {self.sent}, "
+            f"avg wait: {self.wait_time.average * 1000:.0f} ms, max wait: {self.wait_time.max * 1000:.0f} ms"
+        )
+
+
+_Key = Tuple[str, int]
+
+
+class Batch:
+    """Commands sent within Dispatcher.batch(), they are sent in parallel"""
+
+    def __init__(self) -> None:
+        self.futures: List[Future] = []
+        self.success = True
+
+    def wait(self) -> bool:
+        """Wait for all commands to be sent. Returns True if all of them succeeded"""
+        for future in self.futures:
+            if not future.result():
+                self.success = False
+        self.futures = []
+        return self.success
+
+
+class _Command:
+    def __init__(self, type: str, id: int, action: str, body: Dict[str, Any], priority: Priority) -> None:
+        self.type = type
+        self.id = id
+        self.action = action
+        self.body = body
+        self.priority = priority
+        self.enqueued_at = time.monotonic()
+        self.futures: List[Future] = []
+
+
+class Dispatcher:
+    """Sends all commands to the bridge, within the bridge's rate limits.
+
+    There's at most one queued command per light/group; new commands for the same device are merged into it.
+    Interactive commands are sent before background commands.
+    """
+
+    stats: Dict[Priority, LaneStats] = {priority: LaneStats() for priority in Priority}
+    _condition = threading.Condition()
+    _lanes: Dict[Priority, Deque[_Key]] = {priority: deque() for priority in Priority}
+    _pending: Dict[_Key, _Command] = {}
+    _in_flight: Set[_Key] = set()
+    _buckets: Dict[str, TokenBucket] = {}
+    _threads: List[threading.Thread] = []
+    _local = threading.local()
+
+    @staticmethod
+    @contextmanager
+    def priority(priority: Priority) -> Iterator[None]:
+        """All commands in this thread within the with-statement get this priority"""
+        last_priority = Dispatcher._get_priority()
+        Dispatcher._local.priority = priority
+        try:
+            yield
+        finally:
+            Dispatcher._local.priority = last_priority
+
+    @staticmethod
+    def _get_priority() -> Priority:
+        return getattr(Dispatcher._local, "priority", Priority.background)
+
+    @staticmethod
+    @contextmanager
+    def batch() -> Iterator[Batch]:
+        """Don't wait for each command within the with-statement; all of them are sent in parallel
+        and are waited for at the end. Commands for the same device are still sent in order.
+        Check Batch.success after the with-statement to see if all commands succeeded.
+        """
+        # Join the batch that's already running
+        current: Optional[Batch] = getattr(Dispatcher._local, "batch", None)
+        if current:
+            yield current
+            return
+
+        batch = Batch()
+        Dispatcher._local.batch = batch
+        try:
+            yield batch
+        finally:
+            Dispatcher._local.batch = None
+            batch.wait()
+
+    @staticmethod
+    def send(type: str, id: int, action: str, body: Dict[str, Any]) -> bool:
+        """Send a command and wait for it to be sent, or add it to the current batch.
+
+        Returns:
+            bool: False if the bridge didn't accept the command. Always True when added to a batch.
+        """
+        future = Dispatcher.submit(type, id, action, body)
+        batch: Optional[Batch] = getattr(Dispatcher._local, "batch", None)
+        if batch:
+            batch.futures.append(future)
+            return True
+        return future.result()
+
+    @staticmethod
+    def submit(type: str, id: int, action: str, body: Dict[str, Any]) -> Future:
+        """Queue a command for a light or group.
+
+        Returns:
+            Future: resolves to True when the command was sent or not needed, False if the bridge didn't accept it
+        """
+        Dispatcher._start()
+        priority = Dispatcher._get_priority()
+        key = (type, id)
+        future: Future = Future()
+
+        with Dispatcher._condition:
+            stats = Dispatcher.stats[priority]
+            stats.submitted += 1
+
+            command = Dispatcher._pending.get(key)
+            if command:
+                command.body = ShadowState.merge(command.body, body)
+                ShadowState.stats.add_merged()
+
+                # Move to the interactive lane
+                if priority.value < command.priority.value:
+                    Dispatcher._lanes[command.priority].remove(key)
+                    Dispatcher.stats[command.priority].depth -= 1
+                    command.priority = priority
+                    Dispatcher._lanes[priority].append(key)
+                    stats.depth += 1
+            else:
+                command = _Command(type, id, action, dict(body), priority)
+                Dispatcher._pending[key] = command
+                Dispatcher._lanes[priority].append(key)
+                stats.depth += 1
+
+            stats.max_depth = max(stats.max_depth, stats.depth)
+            command.futures.append(future)
+            Dispatcher._condition.notify()
+
+        return future
+
+    @staticmethod
+    def wait_until_idle(timeout: Optional[float] = None) -> bool:
+        """Wait until all queued commands have been sent. Returns False on timeout"""
+        with Dispatcher._condition:
+            return Dispatcher._condition.wait_for(
+                lambda: len(Dispatcher._pending) == 0 and len(Dispatcher._in_flight) == 0, timeout
+            )
+
+    @staticmethod
+    def _start() -> None:
+        if Dispatcher._threads:
+            return
+
+        with Dispatcher._condition:
+            if Dispatcher._threads:
+                return
+            Dispatcher._buckets = {
+                "lights": TokenBucket(config.hue.light_commands_per_second, config.hue.light_commands_per_second),
+                "groups": TokenBucket(config.hue.group_commands_per_second, 1),
+            }
+            for i in range(max(1, config.hue.max_connections)):
+                thread = threading.Thread(target=Dispatcher._run, name=f"HueDispatcher-{i}", daemon=True)
+                thread.start()
+                Dispatcher._threads.append(thread)
+
+    @staticmethod
+    def _run() -> None:
+        while True:
+            with Dispatcher._condition:
+                command, wait_time = Dispatcher._next()
+                if not command:
+                    Dispatcher._condition.wait(wait_time)
+                    continue
+
+            try:
+                result = Dispatcher._send(command)
+            except Exception as e:
+                TealPrint.warning(f"⚠ Failed to send command to /{command.type}/{command.id}: {e}")
+                result = False
+
+            with Dispatcher._condition:
+                Dispatcher._in_flight.discard((command.type, command.id))
+                Dispatcher._condition.notify_all()
+
+            for future in command.futures:
+                future.set_result(result)
+
+    @staticmethod
+    def _next() -> Tuple[Optional[_Command], Optional[float]]:
+        """Take the next command that can be sent. Call with the condition held.
+
+        Returns:
+            The command, or None and how long to wait before trying again (None waits until notified)
+        """
+        wait_time: Optional[float] = None
+        for priority in Priority:
+            lane = Dispatcher._lanes[priority]
+            for key in lane:
+                # Keep commands in order for the same device
+                if key in Dispatcher._in_flight:
+                    continue
+
+                bucket = Dispatcher._buckets.get(key[0])
+                if bucket:
+                    bucket_wait_time = bucket.wait_time()
+                    if bucket_wait_time > 0:
+                        if wait_time is None or bucket_wait_time < wait_time:
+                            wait_time = bucket_wait_time
+                        continue
+
+                lane.remove(key)
+                command = Dispatcher._pending.pop(key)
+                Dispatcher._in_flight.add(key)
+
+                stats = Dispatcher.stats[priority]
+                stats.depth -= 1
+                stats.sent += 1
+                return command, None
+        return None, wait_time
+
+    @staticmethod
+    def _send(command: _Command) -> bool:
+        body = command.body
+
+        # Skip the fields that already have that value
+        state = ShadowState.get(command.type, command.id)
+        if state is not None:
+            body = ShadowState.diff(body, state)
+            if len(body) == 0:
+                ShadowState.stats.add_suppressed()
+                TealPrint.debug(f"🔇 /{command.type}/{command.id} already in that state, skipping command")
+                return True
+
+        bucket = Dispatcher._buckets.get(command.type)
+        if bucket:
+            bucket.acquire()
+        Dispatcher.stats[command.priority].wait_time.observe(time.monotonic() - command.enqueued_at)
+
+        url = f"/{command.type}/{command.id}/{command.action}"
+        ShadowState.stats.add_sent()
+        if Api.put(url, body):
+            BridgeState.apply(command.type, command.id, command.action, body)
+            return True
+        return False
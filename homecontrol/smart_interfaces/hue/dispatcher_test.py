@@ -0,0 +1,72 @@
+import time
+
+from mockito import ANY, unstub, verify, when
+
+from .api import Api
+from .bridge_state import BridgeState
+from .dispatcher import Dispatcher, Priority, TokenBucket
+
+
+def test_token_bucket_limits_rate() -> None:
+    bucket = TokenBucket(rate=10, burst=2)
+
+    bucket.acquire()
+    bucket.acquire()
+
+    assert bucket.wait_time() > 0
+    time.sleep(0.1)
+    assert bucket.wait_time() == 0
+
+
+def test_priority_is_set_for_thread() -> None:
+    assert Dispatcher._get_priority() == Priority.background
+    with Dispatcher.priority(Priority.interactive):
+        assert Dispatcher._get_priority() == Priority.interactive
+    assert Dispatcher._get_priority() == Priority.background
+
+
+def test_submit_skips_command_already_at_target() -> None:
+    when(Api).get("").thenReturn({"lights": {"7": {"name": "A", "state": {"on": True, "bri": 10}}}})
+    when(Api).put(ANY, ANY).thenReturn(True)
+    BridgeState.refresh()
+
+    assert Dispatcher.submit("lights", 7, "state", {"on": True, "bri": 10}).result(timeout=5)
+    verify(Api, times=0).put(ANY, ANY)
+
+    assert Dispatcher.submit("lights", 7, "state", {"on": True, "bri": 20}).result(timeout=5)
+    verify(Api, times=1).put("/lights/7/state", {"bri": 20})
+    unstub()
+
+
+def test_batch_sends_in_parallel_and_aggregates() -> None:
+    when(Api).get("").thenReturn({"lights": {str(id): {"name": str(id), "state": {"on": False}} for id in range(40, 44)}})
+    when(Api).put(ANY, ANY).thenReturn(True)
+    when(Api).put("/lights/43/state", ANY).thenReturn(False)
+    BridgeState.refresh()
+
+    with Dispatcher.batch() as batch:
+        for id in range(40, 43):
+            assert Dispatcher.send("lights", id, "state", {"on": True})
+        assert len(batch.futures) == 3
+    assert batch.success
+
+    with Dispatcher.batch() as batch:
+        for id in range(41, 44):
+            Dispatcher.send("lights", id, "state", {"bri": 5})
+    assert not batch.success
+    unstub()
+
+
+def test_records_the_wait_time_until_sent() -> None:
+    when(Api).get("").thenReturn({"lights": {"50": {"name": "50", "state": {"on": False}}}})
+    when(Api).put(ANY, ANY).thenReturn(True)
+    BridgeState.refresh()
+    wait_time = Dispatcher.stats[Priority.interactive].wait_time
+    count = wait_time.count
+
+    with Dispatcher.priority(Priority.interactive):
+        assert Dispatcher.submit("lights", 50, "state", {"on": True}).result(timeout=5)
+
+    assert wait_time.count == count + 1
+    assert wait_time.max > 0
+    unstub()
@@ -0,0 +1,168 @@
+from __future__ import annotations
+
+import json
+import re
+import threading
+import time
+import warnings
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+import requests
+from tealprint import TealPrint
+from urllib3.exceptions import InsecureRequestWarning
+
+from ...config import config
+from .bridge_state import BridgeState
+
+_ID_V1_REGEX = re.compile(r"^/(lights|groups|sensors)/(\d+)$")
+_READ_TIMEOUT = 300
+_MAX_RECONNECT_DELAY = 60
+
+
+class EventStream:
+    """Listens to the bridge's v2 event stream (server-sent events) and updates BridgeState as changes arrive.
+
+    BridgeState polls the bridge as usual when the stream isn't connected.
+    """
+
+    def __init__(self, url: Optional[str] = None, verify: bool = False) -> None:
+        """
+        Args:
+            url (str, optional): Defaults to https://<bridge>/eventstream/clip/v2
+            verify (bool): Verify the bridge's certificate, it's self-signed by default
+        """
+        self.url = url if url else f"https://{config.hue.host}/eventstream/clip/v2"
+        self.verify = verify
+        self._thread: Optional[threading.Thread] = None
+        self._stop = False
+
+    def start(self) -> None:
+        self._stop = False
+        self._thread = threading.Thread(target=self._run, name="HueEventStream", daemon=True)
+        self._thread.start()
+
+    def stop(self) -> None:
+        """Stop listening after the next message or when the bridge closes the stream"""
+        self._stop = True
+
+    def _run(self) -> None:
+        TealPrint.info(f"🧵 Started Hue event stream {self.url}")
+        delay = 1.0
+        while not self._stop:
+            try:
+                self._listen()
+                delay = 1.0
+            except Exception as e:
+                TealPrint.verbose(f"📡 Hue event stream disconnected: {e}")
+
+            BridgeState.set_push_updates(False)
+            if not self._stop:
+                time.sleep(delay)
+                delay = min(delay * 2, _MAX_RECONNECT_DELAY)
+
+    def _listen(self) -> None:
+        headers = {
+            "hue-application-key": config.hue.username,
+            "Accept": "text/event-stream",
+        }
+        with warnings.catch_warnings():
+            warnings.simplefilter("ignore", InsecureRequestWarning)
+            response = requests.get(
+                self.url,
+                headers=headers,
+                stream=True,
+                verify=self.verify,
+                timeout=(config.hue.timeout, _READ_TIMEOUT),
+            )
+
+        with response:
+            response.raise_for_status()
+            BridgeState.set_push_updates(True)
+
+            data_lines: List[str] = []
+            # Read small chunks, otherwise events are stuck in the buffer until it's filled
+            for line in response.iter_lines(chunk_size=1, decode_unicode=True):
+                if self._stop:
+                    return
+
+                # An empty line ends the message
+                if not line:
+                    if data_lines:
+                        self._handle_message("\n".join(data_lines))
+                        data_lines = []
+                elif line.startswith("data:"):
+                    data_lines.append(line[5:].strip())
+
+    def _handle_message(self, message: str) -> None:
+        try:
+            events = json.loads(message)
+        except ValueError:
+            TealPrint.warning(f"⚠ Invalid message from the Hue event stream: {message}")
+            return
+
+        if not isinstance(events, list):
+            return
+
+        for event in events:
+            if isinstance(event, dict) and event.get("type") == "update":
+                for resource in event.get("data", []):
+                    EventStream.handle_resource(resource)
+
+    @staticmethod
+    def handle_resource(resource: Dict[str, Any]) -> None:
+        """Update BridgeState with a changed v2 resource"""
+        id_v1 = EventStream._parse_id_v1(resource.get("id_v1", ""))
+        if not id_v1:
+            return
+
+        type, id = id_v1
+        TealPrint.debug(f"📡 Event for /{type}/{id}: {resource}")
+        for key, values in EventStream._to_v1(type, resource):
+            BridgeState.update(type, id, key, values)
+
+    @staticmethod
+    def _parse_id_v1(id_v1: str) -> Optional[Tuple[str, int]]:
+        match = _ID_V1_REGEX.match(id_v1)
+        if match:
+            return match.group(1), int(match.group(2))
+        return None
+
+    @staticmethod
+    def _to_v1(type: str, resource: Dict[str, Any]) -> Iterable[Tuple[str, Dict[str, Any]]]:
+        """Convert a v2 resource to the v1 fields it changes"""
+        values: Dict[str, Any] = {}
+
+        if "on" in resource:
+            values["on"] = resource["on"].get("on")
+        if "dimming" in resource and "brightness" in resource["dimming"]:
+            # v2 brightness is a percentage 0-100, v1 is 1-254
+            brightness = resource["dimming"]["brightness"]
+            values["bri"] = max(1, min(254, round(brightness * 254 / 100)))
+        if "color" in resource and "xy" in resource["color"]:
+            xy = resource["color"]["xy"]
+            values["xy"] = [xy["x"], xy["y"]]
+            values["colormode"] = "xy"
+        if "color_temperature" in resource and resource["color_temperature"].get("mirek") is not None:
+            values["ct"] = resource["color_temperature"]["mirek"]
+            values["colormode"] = "ct"
+
+        if "light" in resource:
+            light = resource["light"]
+            if "light_level_report" in light:
+                light = light["light_level_report"]
+            if "light_level" in light:
+                values["lightlevel"] = light["light_level"]
+
+        if len(values) == 0:
+            return []
+
+        if type == "lights":
+            return [("state", values)]
+        elif type == "groups":
+            group_values: Dict[str, Any] = {}
+            if "on" in values:
+                group_values["any_on"] = values["on"]
+            return [("state", group_values)] if group_values else []
+        elif type == "sensors":
+            return [("state", values)]
+        return []
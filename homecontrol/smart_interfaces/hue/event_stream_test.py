@@ -0,0 +1,49 @@
+import time
+from typing import Callable
+
+from mockito import unstub, when
+
+from .api import Api
+from .bridge_state import BridgeState
+from .event_stream import EventStream
+from .fake_bridge import FakeBridge
+
+
+def wait_until(condition: Callable[[], bool], timeout: float = 5) -> bool:
+    end = time.time() + timeout
+    while time.time() < end:
+        if condition():
+            return True
+        time.sleep(0.01)
+    return False
+
+
+def test_events_update_bridge_state() -> None:
+    when(Api).get("").thenReturn(
+        {
+            "lights": {"31": {"name": "Stream light", "state": {"on": False, "bri": 1}}},
+            "sensors": {"32": {"name": "Stream sensor", "state": {"lightlevel": 100}}},
+        }
+    )
+    BridgeState.refresh()
+    bridge = FakeBridge().start()
+    stream = EventStream(bridge.event_stream_url)
+    stream.start()
+
+    assert wait_until(lambda: bridge.stream_count == 1)
+    bridge.send_event(
+        [
+            {"id_v1": "/lights/31", "type": "light", "on": {"on": True}, "dimming": {"brightness": 50.0}},
+            {"id_v1": "/sensors/32", "type": "light_level", "light": {"light_level": 15000}},
+        ]
+    )
+
+    assert wait_until(lambda: BridgeState.get("lights", 31)["state"]["on"])  # type: ignore
+    assert BridgeState.get("lights", 31)["state"]["bri"] == 127  # type: ignore
+    assert BridgeState.get("sensors", 32)["state"]["lightlevel"] == 15000  # type: ignore
+    assert BridgeState._push_updates
+
+    stream.stop()
+    bridge.stop()
+    assert wait_until(lambda: not BridgeState._push_updates)
+    unstub()
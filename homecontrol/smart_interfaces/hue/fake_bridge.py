@@ -0,0 +1,415 @@
+from __future__ import annotations
+
+import json
+import queue
+import random
+import re
+import threading
+import time
+from collections import deque
+from copy import deepcopy
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Deque, Dict, List, Optional, Tuple
+
+_PATH_REGEX = re.compile(r"^/api/([^/]+)(?:/(lights|groups|sensors|scenes)(?:/([\w-]+)(?:/(state|action))?)?)?/?$")
+_LIGHT_STATE = {
+    "on": False,
+    "bri": 254,
+    "xy": [0.4573, 0.41],
+    "ct": 366,
+    "colormode": "xy",
+    "reachable": True,
+}
+
+
+class RecordedRequest:
+    def __init__(self, method: str, path: str, body: Any, status: int) -> None:
+        self.method = method
+        self.path = path
+        self.body = body
+        self.status = status
+        self.time = time.time()
+
+    def __repr__(self) -> str:
+        return f"{self.method} {self.path} {self.body} -> {self.status}"
+
+
+class FakeBridge:
+    """A local stand-in for the Hue bridge to test against without a real bridge.
+
+    Serves the v1 REST API (/api/<username>/lights, groups, sensors and the state/action PUTs, and creating,
+    updating and recalling scenes) and the v2 event stream on /eventstream/clip/v2 over plain http. Accepted PUTs are pushed to
+    the event stream like the real bridge does.
+
+    Every request is recorded in requests. Use latency and jitter (seconds) to slow down responses,
+    and light_commands_per_second/group_commands_per_second to reject commands above the bridge's rate limits.
+    """
+
+    def __init__(self, host: str = "127.0.0.1", port: int = 0, username: str = "fake-user") -> None:
+        self._server = ThreadingHTTPServer((host, port), _Handler)
+        self._server.daemon_threads = True
+        self._server.bridge = self  # type: ignore
+        self._thread: Optional[threading.Thread] = None
+        self._streams: List[queue.Queue] = []
+        self._streams_lock = threading.Lock()
+        self._event_id = 0
+        self._lock = threading.RLock()
+        self._failures: Deque[int] = deque()
+        self._commands: Dict[str, Deque[float]] = {"lights": deque(), "groups": deque()}
+        self.username = username
+        self.resources: Dict[str, Dict[str, Dict[str, Any]]] = {"lights": {}, "groups": {}, "sensors": {}, "scenes": {}}
+        self.requests: List[RecordedRequest] = []
+        self.latency = 0.0
+        self.jitter = 0.0
+        self.light_commands_per_second: Optional[float] = None
+        self.group_commands_per_second: Optional[float] = None
+
+    @property
+    def host(self) -> str:
+        """host:port of the fake bridge"""
+        address = self._server.server_address
+        return f"{address[0]}:{address[1]}"
+
+    @property
+    def event_stream_url(self) -> str:
+        return f"http://{self.host}/eventstream/clip/v2"
+
+    def start(self) -> FakeBridge:
+        self._thread = threading.Thread(target=self._server.serve_forever, name="FakeBridge", daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        self.close_streams()
+        self._server.shutdown()
+        self._server.server_close()
+
+    # --- Resources ---
+    def add_light(self, name: str, type: str = "Extended color light", **state: Any) -> int:
+        light_state = dict(_LIGHT_STATE)
+        light_state.update(state)
+        return self._add("lights", {"name": name, "type": type, "state": light_state})
+
+    def add_group(self, name: str, light_ids: List[int], type: str = "Room") -> int:
+        lights = [str(id) for id in light_ids]
+        return self._add(
+            "groups",
+            {"name": name, "type": type, "lights": lights, "action": {"on": False}, "state": {"any_on": False}},
+        )
+
+    def add_sensor(self, name: str, type: str = "ZLLLightLevel", **state: Any) -> int:
+        return self._add("sensors", {"name": name, "type": type, "state": state})
+
+    def _add(self, type: str, data: Dict[str, Any]) -> int:
+        with self._lock:
+            id = len(self.resources[type]) + 1
+            self.resources[type][str(id)] = data
+            return id
+
+    def state(self, type: str, id: int) -> Dict[str, Any]:
+        """Current state of a light or action of a group"""
+        with self._lock:
+            data = self.resources[type][str(id)]
+            return deepcopy(data["action" if type == "groups" else "state"])
+
+    # --- Requests ---
+    def fail_next(self, count: int = 1, status: int = 500) -> None:
+        """Respond with an error to the next count requests"""
+        with self._lock:
+            for _ in range(count):
+                self._failures.append(status)
+
+    def count(self, method: str = "", path: str = "") -> int:
+        """Number of recorded requests with this method that start with path (without /api/<username>)"""
+        prefix = f"/api/{self.username}{path}"
+        with self._lock:
+            return len(
+                [
+                    request
+                    for request in self.requests
+                    if (not method or request.method == method) and request.path.startswith(prefix)
+                ]
+            )
+
+    def clear_requests(self) -> None:
+        with self._lock:
+            self.requests = []
+
+    def _record(self, method: str, path: str, body: Any, status: int) -> None:
+        with self._lock:
+            self.requests.append(RecordedRequest(method, path, body, status))
+
+    def _delay(self) -> None:
+        delay = self.latency
+        if self.jitter > 0:
+            delay += random.uniform(0, self.jitter)
+        if delay > 0:
+            time.sleep(delay)
+
+    def _pop_failure(self) -> Optional[int]:
+        with self._lock:
+            if self._failures:
+                return self._failures.popleft()
+        return None
+
+    def _is_rate_limited(self, type: str) -> bool:
+        limit = self.light_commands_per_second if type == "lights" else self.group_commands_per_second
+        if limit is None:
+            return False
+
+        now = time.monotonic()
+        with self._lock:
+            commands = self._commands[type]
+            while commands and now - commands[0] >= 1:
+                commands.popleft()
+            if len(commands) >= limit:
+                return True
+            commands.append(now)
+        return False
+
+    def handle(self, method: str, path: str, body: Any) -> Tuple[int, Any]:
+        """Handle a v1 request. Returns the status code and json response"""
+        failure = self._pop_failure()
+        if failure:
+            return failure, [_error(901, path, "Internal error")]
+
+        match = _PATH_REGEX.match(path)
+        if not match:
+            return 404, [_error(4, path, f"method, {method}, not available for resource, {path}")]
+
+        username, type, id, action = match.groups()
+        if username != self.username:
+            return 403, [_error(1, path, "unauthorized user")]
+
+        if method == "GET" and not action:
+            return self._get(path, type, id)
+        if method == "PUT" and action:
+            return self._put(path, type, id, action, body)
+        if method == "PUT" and type == "scenes" and id:
+            return self._put_scene(path, id, body)
+        if method == "POST" and type == "scenes" and not id:
+            return self._post_scene(path, body)
+        return 405, [_error(4, path, f"method, {method}, not available for resource, {path}")]
+
+    def _get(self, path: str, type: Optional[str], id: Optional[str]) -> Tuple[int, Any]:
+        with self._lock:
+            if not type:
+                all = deepcopy(self.resources)
+                all["scenes"] = self._get_scenes()
+                return 200, all
+            if not id:
+                if type == "scenes":
+                    return 200, self._get_scenes()
+                return 200, deepcopy(self.resources[type])
+            if id not in self.resources[type]:
+                return 200, [_error(3, path, f"resource, /{type}/{id}, not available")]
+            return 200, deepcopy(self.resources[type][id])
+
+    def _put(self, path: str, type: str, id: str, action: str, body: Any) -> Tuple[int, Any]:
+        if type not in self._commands or action != ("action" if type == "groups" else "state"):
+            return 405, [_error(4, path, f"method, PUT, not available for resource, {path}")]
+        if not isinstance(body, dict):
+            return 400, [_error(2, path, "body contains invalid json")]
+        if self._is_rate_limited(type):
+            return 429, [_error(901, path, "Too many commands, try again later")]
+
+        with self._lock:
+            if id not in self.resources[type]:
+                return 200, [_error(3, path, f"resource, /{type}/{id}, not available")]
+
+            if "scene" in body:
+                scene = self.resources["scenes"].get(str(body["scene"]))
+                if scene is None or type != "groups":
+                    return 200, [_error(7, path, f"invalid value, {body['scene']}, for parameter, scene")]
+                self._recall_scene(scene)
+
+            values = _to_state(body)
+
+            # Update the lights
+            if type == "groups":
+                group = self.resources["groups"][id]
+                group["action"].update(values)
+                light_ids = group["lights"]
+            else:
+                light_ids = [id]
+            for light_id in light_ids:
+                self.resources["lights"][light_id]["state"].update(values)
+            if type == "groups" and "on" in values:
+                self.resources["groups"][id]["state"]["any_on"] = values["on"]
+
+        if values:
+            self._send_light_events(light_ids, values)
+        return 200, [{"success": {f"/{type}/{id}/{action}/{key}": value}} for key, value in body.items()]
+
+    def _get_scenes(self) -> Dict[str, Dict[str, Any]]:
+        """All scenes without their light states, like the bridge responds"""
+        scenes = deepcopy(self.resources["scenes"])
+        for scene in scenes.values():
+            scene["lights"] = list(scene.pop("lightstates", {}).keys())
+        return scenes
+
+    def _post_scene(self, path: str, body: Any) -> Tuple[int, Any]:
+        if not isinstance(body, dict) or "name" not in body:
+            return 400, [_error(2, path, "body contains invalid json")]
+
+        with self._lock:
+            id = f"scene{len(self.resources['scenes']) + 1}"
+            self.resources["scenes"][id] = {
+                "name": body["name"],
+                "type": body.get("type", "LightScene"),
+                "group": body.get("group"),
+                "recycle": body.get("recycle", False),
+                "lightstates": deepcopy(body.get("lightstates", {})),
+                "appdata": deepcopy(body.get("appdata", {})),
+            }
+        return 200, [{"success": {"id": id}}]
+
+    def _put_scene(self, path: str, id: str, body: Any) -> Tuple[int, Any]:
+        if not isinstance(body, dict):
+            return 400, [_error(2, path, "body contains invalid json")]
+
+        with self._lock:
+            scene = self.resources["scenes"].get(id)
+            if scene is None:
+                return 200, [_error(3, path, f"resource, /scenes/{id}, not available")]
+            for key in ["name", "lightstates", "appdata"]:
+                if key in body:
+                    scene[key] = deepcopy(body[key])
+        return 200, [{"success": {f"/scenes/{id}/{key}": value}} for key, value in body.items()]
+
+    def _recall_scene(self, scene: Dict[str, Any]) -> None:
+        """Set the lights to the states of the scene. Call with the lock held"""
+        for light_id, state in scene.get("lightstates", {}).items():
+            if light_id in self.resources["lights"]:
+                values = _to_state(state)
+                self.resources["lights"][light_id]["state"].update(values)
+                self._send_light_events([light_id], values)
+
+    def _send_light_events(self, light_ids: List[str], values: Dict[str, Any]) -> None:
+        data: Dict[str, Any] = {"type": "light"}
+        if "on" in values:
+            data["on"] = {"on": values["on"]}
+        if "bri" in values:
+            data["dimming"] = {"brightness": round(values["bri"] * 100 / 254, 2)}
+        if "xy" in values:
+            data["color"] = {"xy": {"x": values["xy"][0], "y": values["xy"][1]}}
+        if "ct" in values:
+            data["color_temperature"] = {"mirek": values["ct"]}
+        if len(data) == 1:
+            return
+
+        self.send_event([dict(data, id_v1=f"/lights/{light_id}") for light_id in light_ids])
+
+    # --- Event stream ---
+    @property
+    def stream_count(self) -> int:
+        with self._streams_lock:
+            return len(self._streams)
+
+    def send_event(self, data: List[Dict[str, Any]], type: str = "update") -> None:
+        """Push an event with the changed v2 resources to all connected event streams"""
+        with self._streams_lock:
+            self._event_id += 1
+            event = [{"id": str(self._event_id), "type": type, "data": data}]
+            for stream in self._streams:
+                stream.put(event)
+
+    def close_streams(self) -> None:
+        with self._streams_lock:
+            for stream in self._streams:
+                stream.put(None)
+
+    def _add_stream(self) -> queue.Queue:
+        stream: queue.Queue = queue.Queue()
+        with self._streams_lock:
+            self._streams.append(stream)
+        return stream
+
+    def _remove_stream(self, stream: queue.Queue) -> None:
+        with self._streams_lock:
+            if stream in self._streams:
+                self._streams.remove(stream)
+
+
+def _to_state(body: Dict[str, Any]) -> Dict[str, Any]:
+    values = {key: value for key, value in body.items() if key not in ["transitiontime", "scene"]}
+    if "xy" in values:
+        values["colormode"] = "xy"
+    elif "ct" in values:
+        values["colormode"] = "ct"
+    return values
+
+
+def _error(type: int, address: str, description: str) -> Dict[str, Any]:
+    return {"error": {"type": type, "address": address, "description": description}}
+
+
+class _Handler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+
+    @property
+    def bridge(self) -> FakeBridge:
+        return self.server.bridge  # type: ignore
+
+    def do_GET(self) -> None:
+        if self.path == "/eventstream/clip/v2":
+            self.bridge._record("GET", self.path, None, 200)
+            self._event_stream()
+        else:
+            self._handle("GET", None)
+
+    def do_PUT(self) -> None:
+        self._handle("PUT", self._read_body())
+
+    def do_POST(self) -> None:
+        self._handle("POST", self._read_body())
+
+    def _read_body(self) -> Any:
+        length = int(self.headers.get("Content-Length", 0))
+        raw = self.rfile.read(length) if length > 0 else b""
+        try:
+            return json.loads(raw) if raw else None
+        except ValueError:
+            return None
+
+    def _handle(self, method: str, body: Any) -> None:
+        self.bridge._delay()
+        status, response = self.bridge.handle(method, self.path, body)
+        self.bridge._record(method, self.path, body, status)
+        self._send_json(status, response)
+
+    def _event_stream(self) -> None:
+        self.send_response(200)
+        self.send_header("Content-Type", "text/event-stream")
+        self.send_header("Cache-Control", "no-cache")
+        self.send_header("Connection", "close")
+        self.end_headers()
+        self.close_connection = True
+        self._write(": hi\n\n")
+
+        stream = self.bridge._add_stream()
+        try:
+            while True:
+                event = stream.get()
+                if event is None:
+                    return
+                self._write(f"id: {event[0]['id']}\ndata: {json.dumps(event)}\n\n")
+        except (BrokenPipeError, ConnectionResetError):
+            pass
+        finally:
+            self.bridge._remove_stream(stream)
+
+    def _write(self, text: str) -> None:
+        self.wfile.write(text.encode())
+        self.wfile.flush()
+
+    def _send_json(self, status: int, body: Any) -> None:
+        data = json.dumps(body).encode()
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def log_message(self, format: str, *args: Any) -> None:
+        pass
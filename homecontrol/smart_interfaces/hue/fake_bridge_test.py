@@ -0,0 +1,93 @@
+from enum import Enum
+from typing import Iterator, List
+
+import pytest
+
+from ...config import config
+from .bridge_state import BridgeState
+from .fake_bridge import FakeBridge
+from .group import HueGroup
+from .light import HueLight
+
+
+@pytest.fixture
+def bridge() -> Iterator[FakeBridge]:
+    bridge = FakeBridge().start()
+    host, username = config.hue.host, config.hue.username
+    config.hue.host = bridge.host
+    config.hue.username = bridge.username
+    BridgeState.invalidate()
+
+    yield bridge
+
+    bridge.stop()
+    config.hue.host, config.hue.username = host, username
+    BridgeState.invalidate()
+
+
+def test_reads_use_one_request(bridge: FakeBridge) -> None:
+    bridge.add_light("Fake ceiling", on=True)
+    bridge.add_light("Fake window")
+    ceiling = HueLight("Fake ceiling")
+    window = HueLight("Fake window")
+
+    for _ in range(5):
+        assert ceiling.is_on()
+        assert not window.is_on()
+
+    assert bridge.count("GET") == 1
+
+
+def test_skips_commands_already_set(bridge: FakeBridge) -> None:
+    bridge.add_light("Fake bamboo", on=True, bri=100)
+    light = HueLight("Fake bamboo")
+
+    light.dim(0.5)
+    light.dim(0.5)
+    light.turn_on()
+
+    assert bridge.count("PUT") == 1
+    assert bridge.state("lights", 1)["bri"] == 127
+
+
+def test_controller_sends_one_group_command(bridge: FakeBridge) -> None:
+    from ...controllers.controller import Controller, States
+
+    light_ids: List[int] = [bridge.add_light(f"Fake room light {i}") for i in range(4)]
+    bridge.add_group("Fake room", light_ids)
+    lights = [HueLight(f"Fake room light {i}") for i in range(4)]
+
+    class FakeDevices(Enum):
+        a = lights[0]
+        b = lights[1]
+        c = lights[2]
+        d = lights[3]
+
+    class FakeController(Controller):
+        def _get_interfaces(self) -> List[Enum]:
+            return list(FakeDevices)
+
+    controller = FakeController("Fake room")
+    Controller.controllers.remove(controller)
+    controller.state = States.on
+    controller.brightness = 0.5
+    controller.turn_on()
+
+    # On and brightness are either merged or sent after each other
+    assert 1 <= bridge.count("PUT", "/groups/1/action") <= 2
+    assert bridge.count("PUT", "/lights") == 0
+    for id in light_ids:
+        assert bridge.state("lights", id)["on"]
+
+
+def test_retries_on_error(bridge: FakeBridge) -> None:
+    bridge.add_light("Fake micro")
+    group_id = bridge.add_group("Fake kitchen", [1])
+    group = HueGroup("Fake kitchen")
+    assert group.id == group_id
+    bridge.fail_next(1, status=500)
+
+    group.turn_on()
+
+    assert bridge.count("PUT", f"/groups/{group_id}/action") == 2
+    assert bridge.state("lights", 1)["on"]
@@ -2,7 +2,10 @@ from __future__ import annotations
 
 from typing import Union
 
+from ..moods import Mood
+from .bridge_state import BridgeState
 from .interface import HueInterface
+from .mood_scenes import MoodScenes
 
 
 class HueGroup(HueInterface):
@@ -11,7 +14,26 @@ class HueGroup(HueInterface):
 
     @staticmethod
     def find(name: str) -> Union[HueGroup, None]:
-        hue_group = HueGroup(name)
-        if hue_group.id != HueInterface.INVALID_ID:
-            return hue_group
+        if BridgeState.find_id("groups", name) is None:
+            return None
+
+        instance = HueInterface._get_instance("groups", name)
+        if isinstance(instance, HueGroup):
+            return instance
+        return HueGroup(name)
+
+    @staticmethod
+    def from_id(id: int) -> Union[HueGroup, None]:
+        """Get the group with the specified id on the bridge"""
+        data = BridgeState.get("groups", id)
+        if data and "name" in data:
+            return HueGroup.find(str(data["name"]))
         return None
+
+    def mood(self, mood: Mood) -> None:
+        # Recall the mood's scene so all lights change at once
+        scene_id = MoodScenes.find(mood, self.id)
+        if scene_id:
+            self._put({"scene": scene_id})
+        else:
+            super().mood(mood)
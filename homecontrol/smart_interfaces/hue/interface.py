@@ -1,26 +1,50 @@
-from typing import Any, Dict, Union
+from __future__ import annotations
+
+import threading
+from typing import Any, Dict, Optional, Tuple, Union
 
 from tealprint import TealPrint
 
 from ...core.entities.color import Color
+from ...utils.inputs import Inputs
 from ..interface import Interface
 from ..moods import Mood
-from .api import Api
+from .bridge_state import BridgeState
+from .dispatcher import Dispatcher
+from .reconciler import Reconciler
+from .shadow_state import ShadowState
+
+_BRIGHTNESS_TOLERANCE = 3
+_XY_TOLERANCE = 0.01
 
 
 class HueInterface(Interface):
     INVALID_ID = -1
+    _instances: Dict[Tuple[str, str], HueInterface] = {}
+    _instances_lock = threading.Lock()
 
     def __init__(self, name: str, type: str, action: str) -> None:
         super().__init__(name)
         self._id = HueInterface.INVALID_ID
+        self._names_version = -1
         self.type = type
         self.action = action
 
+        # Register the first instance with this name so find() returns the same instance
+        with HueInterface._instances_lock:
+            HueInterface._instances.setdefault((type, name.lower()), self)
+
+    @staticmethod
+    def _get_instance(type: str, name: str) -> Union[HueInterface, None]:
+        with HueInterface._instances_lock:
+            return HueInterface._instances.get((type, name.lower()))
+
     @property
     def id(self) -> int:
-        if self._id == HueInterface.INVALID_ID:
+        # Only look up the id again if names or ids have changed on the bridge
+        if self._names_version != BridgeState.names_version:
             self._id = self._get_id()
+            self._names_version = BridgeState.names_version
 
             if self._id != HueInterface.INVALID_ID:
                 TealPrint.info(f"ℹ Found id {self._id} for HueInterface {self.name}")
@@ -34,22 +58,13 @@ class HueInterface(Interface):
         self._id = id
 
     def _get_id(self) -> int:
-        # Get all interfaces of type
-        all = Api.get(f"/{self.type}")
-        if not all:
-            TealPrint.warning(f"⚠ Could not get all /{self.type} for {self.name}")
+        id = BridgeState.find_id(self.type, self.name)
+        if id is None:
             return HueInterface.INVALID_ID
-
-        for id_str, object in all.items():
-            if "name" in object:
-                name = str(object["name"])
-                if name.lower() == self.name.lower():
-                    return int(id_str)
-
-        return HueInterface.INVALID_ID
+        return id
 
     def _get_data(self) -> Union[Dict[str, Any], None]:
-        return Api.get(f"/{self.type}/{self.id}")
+        return BridgeState.get(self.type, self.id)
 
     def _get_state(self) -> Union[Dict[str, Any], None]:
         data = self._get_data()
@@ -87,30 +102,81 @@ class HueInterface(Interface):
         )
 
     def color(self, color: Color, transition_time: float = 1) -> None:
-        normalized_time = Interface.normalize_transition_time(transition_time)
-        body = {
+        color_body = HueInterface.color_body(color)
+        if not color_body:
+            TealPrint.warning(f"⚠🚦 Didn't specify any color when calling color()")
+            return
+
+        body: Dict[str, Any] = {
             "on": True,
-            "transitiontime": normalized_time,
+            "transitiontime": Interface.normalize_transition_time(transition_time),
         }
+        body.update(color_body)
+        self._put(body)
+
+    @staticmethod
+    def color_body(color: Color) -> Dict[str, Any]:
+        """The Hue fields for a color, empty if no color was specified"""
         if color.x and color.y:
-            body["xy"] = [color.x, color.y]
+            return {"xy": [color.x, color.y]}
         elif color.hue:
-            body["hue"] = color.hue
+            return {"hue": color.hue}
         elif color.saturation:
-            body["sat"] = color.saturation
+            return {"sat": color.saturation}
         elif color.temperature:
-            body["ct"] = color.temperature
-        else:
-            TealPrint.warning(f"⚠🚦 Didn't specify any color when calling color()")
-            return
-
-        self._put(body)
+            return {"ct": color.temperature}
+        return {}
+
+    def is_set_to(self, brightness: Union[float, int, None], color: Optional[Color]) -> bool:
+        # Check again when it's changed on the bridge
+        Inputs.read(Inputs.hue(self.type, self.id))
+        state = ShadowState.get(self.type, self.id)
+        if not state or not state.get("on", True):
+            return True
+
+        if brightness is not None and "bri" in state:
+            if abs(state["bri"] - Interface.normalize_dim(brightness)) > _BRIGHTNESS_TOLERANCE:
+                return False
+
+        if color and color.x and color.y and "xy" in state:
+            if state.get("colormode") != "xy":
+                return False
+            x, y = state["xy"]
+            if abs(x - color.x) > _XY_TOLERANCE or abs(y - color.y) > _XY_TOLERANCE:
+                return False
+        return True
 
     def mood(self, mood: Mood) -> None:
-        self.dim(mood.brightness)
-        self.color(mood.color)
+        self._put_mood(HueInterface.mood_state(mood))
+
+    @staticmethod
+    def mood_state(mood: Mood, dim: bool = True, color: bool = True) -> Dict[str, Any]:
+        """The Hue fields for a mood; only the ones the light can use"""
+        state: Dict[str, Any] = {"on": True}
+        if dim:
+            state["bri"] = Interface.normalize_dim(mood.brightness)
+        if color:
+            state.update(HueInterface.color_body(mood.color))
+        return state
+
+    def _put_mood(self, state: Dict[str, Any]) -> None:
+        # Brightness and color in one command
+        body = dict(state)
+        body["transitiontime"] = Interface.normalize_transition_time(1)
+        self._put(body)
 
     def _put(self, body: Dict[str, Any]) -> None:
-        url = f"/{self.type}/{self.id}/{self.action}"
-        TealPrint.verbose(f"📞 {self.name} Hue API: {url}, body: {body}")
-        Api.put(url, body)
+        # Merged with the commands from other controllers before it's sent
+        if Reconciler.is_collecting():
+            Reconciler.add(self.type, self.id, body)
+            return
+
+        TealPrint.verbose(f"📞 {self.name} Hue API: /{self.type}/{self.id}/{self.action}, body: {body}")
+        Dispatcher.send(self.type, self.id, self.action, body)
+
+
+def _on_bridge_update(type: str, id: int) -> None:
+    Inputs.changed(Inputs.hue(type, id))
+
+
+BridgeState.add_listener(_on_bridge_update)
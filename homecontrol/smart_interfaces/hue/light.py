@@ -1,10 +1,11 @@
 from __future__ import annotations
 
 from enum import Enum
-from typing import Any, Dict, Optional, Union
+from typing import Optional, Union
 
 from ...core.entities.color import Color
-from .api import Api
+from ..moods import Mood
+from .bridge_state import BridgeState
 from .interface import HueInterface
 
 
@@ -28,16 +29,16 @@ class HueLight(HueInterface):
 
         return Capabilities.none.value
 
-    def _get_data(self) -> Union[Dict[str, Any], None]:
-        return Api.get(f"/lights/{self.id}")
-
     @staticmethod
     def find(name: str) -> Union[HueLight, None]:
         """Search for a light in the hue bridge"""
-        hue_light = HueLight(name)
-        if hue_light.id != HueInterface.INVALID_ID:
-            return hue_light
-        return None
+        if BridgeState.find_id("lights", name) is None:
+            return None
+
+        instance = HueInterface._get_instance("lights", name)
+        if isinstance(instance, HueLight):
+            return instance
+        return HueLight(name)
 
     def dim(self, value: Union[float, int], transition_time: float = 1) -> None:
         if not self.capability.dim:
@@ -49,6 +50,9 @@ class HueLight(HueInterface):
             return
         super().color(color, transition_time)
 
+    def mood(self, mood: Mood) -> None:
+        self._put_mood(HueInterface.mood_state(mood, dim=self.capability.dim, color=self.capability.color))
+
 
 class Capability:
     def __init__(self, type: str, dim: bool, color: bool) -> None:
@@ -7,6 +7,8 @@ from typing import Any, Dict
 from tealprint import TealPrint
 
 from ...data.stats import Stats
+from ...utils.context import Context
+from ...utils.inputs import Inputs
 from .sensor import Sensor
 
 
@@ -34,7 +36,8 @@ class LightSensor(Sensor):
     ) -> None:
         super().__init__(id, name, LightSensor._update_interval, log)
         self.light_level: int = 0
-        self.level_name = LightLevels.light
+        self._level_name = LightLevels.light
+        Context.add_source(Inputs.sensor(self.name), self._get_level_name)
         self.ranges = {
             LightLevels.fully_dark: _Range(0, dark),
             LightLevels.dark: _Range(dark, partially_dark),
@@ -44,6 +47,20 @@ class LightSensor(Sensor):
             LightLevels.unknown: _Range(-999, -999),
         }
 
+    @property
+    def level_name(self) -> LightLevels:
+        Inputs.read(Inputs.sensor(self.name))
+        return Context.get(Inputs.sensor(self.name), self._get_level_name)
+
+    def _get_level_name(self) -> LightLevels:
+        return self._level_name
+
+    @level_name.setter
+    def level_name(self, level_name: LightLevels) -> None:
+        if level_name != self._level_name:
+            self._level_name = level_name
+            Inputs.changed(Inputs.sensor(self.name))
+
     def is_level_or_below(self, level: LightLevels) -> bool:
         return self.level_name.value <= level.value
 
@@ -57,12 +74,12 @@ class LightSensor(Sensor):
         if self.log:
             info = {
                 "name": self.name,
-                "level_name": self.level_name.name,
+                "level_name": self._level_name.name,
                 "level_value": self.light_level,
             }
             Stats.log("light_level", json.dumps(info))
 
-            TealPrint.verbose(f"☀ {self.name}: {self.light_level} lux, range: {self.level_name.name}")
+            TealPrint.verbose(f"☀ {self.name}: {self.light_level} lux, range: {self._level_name.name}")
 
     def get_light_name_from_level(self) -> LightLevels:
         for light_level in LightLevels:
@@ -75,7 +92,7 @@ class LightSensor(Sensor):
         new_level_name = self.get_light_name_from_level()
 
         # Skip if level wasn't changed
-        if new_level_name == self.level_name:
+        if new_level_name == self._level_name:
             return
 
         # Check threshold
@@ -92,4 +109,4 @@ class LightSensor(Sensor):
 
     @property
     def _range(self) -> _Range:
-        return self.ranges[self.level_name]
+        return self.ranges[self._level_name]
@@ -0,0 +1,140 @@
+from __future__ import annotations
+
+import json
+import threading
+import zlib
+from typing import Any, Dict, Optional, Tuple
+
+from tealprint import TealPrint
+
+from ..interface import Interface
+from ..moods import Mood, Moods
+from .api import Api
+from .bridge_state import BridgeState
+from .interface import HueInterface
+from .light import Capabilities
+
+_GROUP_TYPES = ["Room", "Zone", "LightGroup"]
+_APP_DATA_PREFIX = "hc-"
+"""Marks the scenes created by us, followed by a checksum of the light states"""
+
+
+class MoodScenes:
+    """Backs every mood with a scene on the bridge for each group.
+
+    Setting a mood on a group is then one scene recall instead of commands to every light,
+    and the bridge changes all the lights at the same moment.
+    """
+
+    _ids: Dict[Tuple[str, int], str] = {}
+    _lock = threading.Lock()
+
+    @staticmethod
+    def find(mood: Mood, group_id: int) -> Optional[str]:
+        """The id of the scene for a mood in a group, or None if it hasn't been synced"""
+        with MoodScenes._lock:
+            return MoodScenes._ids.get((mood.name.lower(), group_id))
+
+    @staticmethod
+    def sync() -> None:
+        """Create the scenes that are missing on the bridge and update the ones that have changed"""
+        scenes = Api.get("/scenes")
+        if scenes is None or not isinstance(scenes, dict):
+            TealPrint.warning("⚠ Could not get the scenes from the bridge, moods are set light by light")
+            return
+
+        # Our existing scenes
+        existing: Dict[Tuple[str, str], str] = {}
+        for id, scene in scenes.items():
+            if MoodScenes._get_checksum(scene).startswith(_APP_DATA_PREFIX):
+                existing[(str(scene.get("name", "")).lower(), str(scene.get("group")))] = id
+
+        groups = BridgeState.get_all("groups")
+        lights = BridgeState.get_all("lights")
+        ids: Dict[Tuple[str, int], str] = {}
+        for mood_enum in Moods:
+            mood: Mood = mood_enum.value
+            for group_id, group in groups.items():
+                if group.get("type") not in _GROUP_TYPES:
+                    continue
+
+                lightstates = MoodScenes._create_lightstates(mood, group, lights)
+                if not lightstates:
+                    continue
+
+                existing_id = existing.get((mood.name.lower(), group_id))
+                existing_scene = scenes.get(existing_id, {}) if existing_id else None
+                scene_id = MoodScenes._sync_scene(mood, group_id, lightstates, existing_id, existing_scene)
+                if scene_id:
+                    ids[(mood.name.lower(), int(group_id))] = scene_id
+                    BridgeState.set_scene(scene_id, lightstates)
+
+        with MoodScenes._lock:
+            MoodScenes._ids = ids
+        TealPrint.info(f"🎬 Synced {len(ids)} mood scenes with the bridge")
+
+    @staticmethod
+    def _create_lightstates(
+        mood: Mood, group: Dict[str, Any], lights: Dict[str, Dict[str, Any]]
+    ) -> Dict[str, Dict[str, Any]]:
+        lightstates: Dict[str, Dict[str, Any]] = {}
+        for light_id in group.get("lights", []):
+            light = lights.get(str(light_id))
+            if light is None:
+                continue
+
+            capability = Capabilities.find(str(light.get("type", ""))) or Capabilities.none.value
+            state = HueInterface.mood_state(mood, dim=capability.dim, color=capability.color)
+            state["transitiontime"] = Interface.normalize_transition_time(1)
+            lightstates[str(light_id)] = state
+        return lightstates
+
+    @staticmethod
+    def _sync_scene(
+        mood: Mood,
+        group_id: str,
+        lightstates: Dict[str, Dict[str, Any]],
+        existing_id: Optional[str],
+        existing_scene: Optional[Dict[str, Any]],
+    ) -> Optional[str]:
+        """Create or update the scene. Returns the id of the scene, or None if it failed"""
+        checksum = MoodScenes._create_checksum(lightstates)
+        appdata = {"version": 1, "data": checksum}
+
+        if existing_id and existing_scene is not None:
+            if MoodScenes._get_checksum(existing_scene) == checksum:
+                return existing_id
+
+            TealPrint.verbose(f"🎬 Updating scene {mood.name} in group {group_id}")
+            if Api.put(f"/scenes/{existing_id}", {"lightstates": lightstates, "appdata": appdata}):
+                return existing_id
+            return None
+
+        TealPrint.verbose(f"🎬 Creating scene {mood.name} in group {group_id}")
+        response = Api.post(
+            "/scenes",
+            {
+                "name": mood.name,
+                "type": "GroupScene",
+                "group": group_id,
+                "recycle": False,
+                "lightstates": lightstates,
+                "appdata": appdata,
+            },
+        )
+        if response and "id" in response[0]:
+            return str(response[0]["id"])
+        return None
+
+    @staticmethod
+    def _create_checksum(lightstates: Dict[str, Dict[str, Any]]) -> str:
+        # appdata is limited to 16 characters
+        checksum = zlib.crc32(json.dumps(lightstates, sort_keys=True).encode())
+        return f"{_APP_DATA_PREFIX}{checksum:08x}"
+
+    @staticmethod
+    def _get_checksum(scene: Dict[str, Any]) -> str:
+        appdata = scene.get("appdata")
+        if isinstance(appdata, dict):
+            return str(appdata.get("data", ""))
+        return ""
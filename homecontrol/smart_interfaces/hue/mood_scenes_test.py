@@ -0,0 +1,62 @@
+from typing import Iterator
+
+import pytest
+
+from ...config import config
+from ..moods import Moods
+from .bridge_state import BridgeState
+from .fake_bridge import FakeBridge
+from .group import HueGroup
+from .light import HueLight
+from .mood_scenes import MoodScenes
+
+
+@pytest.fixture
+def bridge() -> Iterator[FakeBridge]:
+    bridge = FakeBridge().start()
+    host, username = config.hue.host, config.hue.username
+    config.hue.host = bridge.host
+    config.hue.username = bridge.username
+    BridgeState.invalidate()
+
+    yield bridge
+
+    bridge.stop()
+    config.hue.host, config.hue.username = host, username
+    MoodScenes._ids = {}
+    BridgeState.invalidate()
+
+
+def test_sync_creates_scenes_once(bridge: FakeBridge) -> None:
+    first = bridge.add_light("Scene light 1")
+    second = bridge.add_light("Scene light 2", type="Dimmable light")
+    bridge.add_group("Scene room", [first, second])
+
+    MoodScenes.sync()
+    MoodScenes.sync()
+
+    assert bridge.count("POST", "/scenes") == len(Moods)
+    assert bridge.count("PUT", "/scenes") == 0
+    scene = bridge.resources["scenes"]["scene1"]
+    assert "xy" in scene["lightstates"]["1"]
+    assert "xy" not in scene["lightstates"]["2"]
+
+
+def test_mood_on_group_recalls_scene(bridge: FakeBridge) -> None:
+    light_ids = [bridge.add_light(f"Mood light {i}") for i in range(4)]
+    group_id = bridge.add_group("Mood room", light_ids)
+    MoodScenes.sync()
+    bridge.clear_requests()
+
+    mood = Moods.sunset.value
+    HueGroup("Mood room").mood(mood)
+
+    assert bridge.count("PUT") == 1
+    assert bridge.count("PUT", f"/groups/{group_id}/action") == 1
+    for light_id in light_ids:
+        assert bridge.state("lights", light_id)["on"]
+        assert bridge.state("lights", light_id)["xy"] == [mood.color.x, mood.color.y]
+
+    # The mirror knows the lights are on without fetching them again
+    assert HueLight("Mood light 0").is_on()
+    assert bridge.count("GET") == 0
@@ -0,0 +1,234 @@
+from __future__ import annotations
+
+import json
+import threading
+from concurrent.futures import Future
+from contextlib import contextmanager
+from functools import partial
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+from tealprint import TealPrint
+
+from ...config import config
+from ...utils.clock import Clock
+from .bridge_state import BridgeState
+from .dispatcher import Dispatcher
+
+_Key = Tuple[str, int]
+_OFF_FIELDS = ["on", "transitiontime"]
+"""The only fields that are sent when turning off a light"""
+
+
+class _Target:
+    """The merged target state of a light (or group)"""
+
+    def __init__(self) -> None:
+        self.fields: Dict[str, Tuple[int, Any]] = {}
+        """Value of each field, and the priority of the command that set it"""
+
+    def add(self, body: Dict[str, Any], priority: int) -> None:
+        for key, value in body.items():
+            current = self.fields.get(key)
+            # Later commands with the same priority override earlier ones
+            if current is None or priority >= current[0]:
+                self.fields[key] = (priority, value)
+
+    def to_body(self) -> Dict[str, Any]:
+        body = {key: value for key, (_, value) in self.fields.items()}
+
+        # Brightness and color can't be set when it's turned off
+        if body.get("on") is False:
+            body = {key: value for key, value in body.items() if key in _OFF_FIELDS}
+        return body
+
+
+class _Hold:
+    """The last field that was sent to a light, and the priority of the command"""
+
+    def __init__(self, priority: int, value: Any, time: float) -> None:
+        self.priority = priority
+        self.value = value
+        self.time = time
+
+
+class Reconciler:
+    """Merges the commands from all controllers in one update into one target state per light.
+
+    Within collect(), HueInterface doesn't send commands directly but adds them here. When several controllers
+    command the same light, each field is taken from the controller with the highest priority.
+    A field that was sent keeps its priority for config.hue.priority_hold_time seconds, so a lower priority
+    command in a later update is held back until then. Group commands only give each light the fields it supports.
+    At the end the targets are queued in the Dispatcher, which skips what's already set on the bridge.
+    Lights that end up with the same target and make up a whole group are sent as one group command.
+    The targets aren't waited for, so a slow bridge doesn't hold up the controllers; the Dispatcher still sends
+    the commands for each light in order.
+    """
+
+    _local = threading.local()
+    _holds_lock = threading.Lock()
+    _holds: Dict[_Key, Dict[str, _Hold]] = {}
+    _deferred: Dict[_Key, _Target] = {}
+    """Fields held back by a higher priority, sent when the hold ends"""
+
+    @staticmethod
+    @contextmanager
+    def collect() -> Iterator[None]:
+        """Collect the commands within the with-statement, and send the merged targets at the end"""
+        if Reconciler.is_collecting():
+            yield
+            return
+
+        targets: Dict[_Key, _Target] = {}
+        Reconciler._local.targets = targets
+        try:
+            yield
+        finally:
+            Reconciler._local.targets = None
+            Reconciler._send(Reconciler._arbitrate(targets))
+
+    @staticmethod
+    @contextmanager
+    def priority(priority: int) -> Iterator[None]:
+        """All commands in this thread within the with-statement get this priority, higher wins"""
+        last_priority = Reconciler._get_priority()
+        Reconciler._local.priority = priority
+        try:
+            yield
+        finally:
+            Reconciler._local.priority = last_priority
+
+    @staticmethod
+    def _get_priority() -> int:
+        return getattr(Reconciler._local, "priority", 0)
+
+    @staticmethod
+    def is_collecting() -> bool:
+        return getattr(Reconciler._local, "targets", None) is not None
+
+    @staticmethod
+    def added() -> int:
+        """Number of commands that have been added in this thread"""
+        return getattr(Reconciler._local, "added", 0)
+
+    @staticmethod
+    def add(type: str, id: int, body: Dict[str, Any]) -> None:
+        """Add a command to the targets. Group commands are added to each of its lights"""
+        targets: Optional[Dict[_Key, _Target]] = getattr(Reconciler._local, "targets", None)
+        if targets is None:
+            return
+        Reconciler._local.added = Reconciler.added() + 1
+
+        keys: List[_Key] = [(type, id)]
+        # A scene only exists for the group
+        if type == "groups" and "scene" not in body:
+            light_ids = BridgeState.get_group_members().get(id)
+            if light_ids:
+                keys = [("lights", light_id) for light_id in sorted(light_ids)]
+
+        priority = Reconciler._get_priority()
+        for key in keys:
+            light_body = Reconciler._filter_supported(key, body)
+            if light_body:
+                targets.setdefault(key, _Target()).add(light_body, priority)
+
+    @staticmethod
+    def _filter_supported(key: _Key, body: Dict[str, Any]) -> Dict[str, Any]:
+        """Only the fields the light supports, the bridge answers with an error for each of the others"""
+        type, id = key
+        if type != "lights":
+            return body
+        fields = BridgeState.get_supported_fields(id)
+        if fields is None:
+            return body
+        return {field: value for field, value in body.items() if field in fields}
+
+    @staticmethod
+    def reset() -> None:
+        """Forget the held priorities"""
+        with Reconciler._holds_lock:
+            Reconciler._holds = {}
+            Reconciler._deferred = {}
+
+    @staticmethod
+    def _arbitrate(targets: Dict[_Key, _Target]) -> Dict[_Key, _Target]:
+        """Hold back fields that a higher priority command has set lately, and bring back the held back fields
+        that are free again"""
+        now = Clock.time()
+        hold_time = config.hue.priority_hold_time
+        with Reconciler._holds_lock:
+            # Commands from this update override held back fields with the same or lower priority
+            deferred = Reconciler._deferred
+            Reconciler._deferred = {}
+            for key, deferred_target in deferred.items():
+                target = targets.setdefault(key, _Target())
+                for field, (priority, value) in deferred_target.fields.items():
+                    current = target.fields.get(field)
+                    if current is None or priority > current[0]:
+                        target.fields[field] = (priority, value)
+
+            for key, target in targets.items():
+                holds = Reconciler._holds.setdefault(key, {})
+                held_off = False
+                for field, (priority, value) in list(target.fields.items()):
+                    hold = holds.get(field)
+                    if hold and hold.priority > priority and now - hold.time < hold_time:
+                        del target.fields[field]
+                        Reconciler._deferred.setdefault(key, _Target()).fields[field] = (priority, value)
+                        held_off = held_off or (field == "on" and hold.value is False)
+
+                # Brightness and color can't be set while a higher priority keeps it turned off
+                if held_off:
+                    for field, (priority, value) in list(target.fields.items()):
+                        del target.fields[field]
+                        Reconciler._deferred[key].fields[field] = (priority, value)
+
+                for field, (priority, value) in target.fields.items():
+                    holds[field] = _Hold(priority, value, now)
+        return targets
+
+    @staticmethod
+    def _send(targets: Dict[_Key, _Target]) -> None:
+        if len(targets) == 0:
+            return
+
+        commands = Reconciler._create_commands(targets)
+        for type, id, body in commands:
+            action = "action" if type == "groups" else "state"
+            TealPrint.verbose(f"📞 Reconciled /{type}/{id}/{action}, body: {body}")
+            future = Dispatcher.submit(type, id, action, body)
+            future.add_done_callback(partial(Reconciler._check_sent, f"/{type}/{id}/{action}"))
+
+    @staticmethod
+    def _check_sent(url: str, future: Future) -> None:
+        if not future.result():
+            TealPrint.warning(f"⚠ Failed to send the reconciled command to {url}")
+
+    @staticmethod
+    def _create_commands(targets: Dict[_Key, _Target]) -> List[Tuple[str, int, Dict[str, Any]]]:
+        commands: List[Tuple[str, int, Dict[str, Any]]] = []
+
+        # Lights with the same target
+        light_ids_by_body: Dict[str, List[int]] = {}
+        bodies: Dict[str, Dict[str, Any]] = {}
+        for (type, id), target in targets.items():
+            body = target.to_body()
+            if len(body) == 0:
+                continue
+
+            if type == "lights":
+                body_key = json.dumps(body, sort_keys=True)
+                bodies[body_key] = body
+                light_ids_by_body.setdefault(body_key, []).append(id)
+            else:
+                commands.append((type, id, body))
+
+        # Send one command to a group instead of one for every light
+        for body_key, light_ids in light_ids_by_body.items():
+            body = bodies[body_key]
+            group_ids, remaining = BridgeState.fold_into_groups(light_ids, body.keys())
+            for group_id in group_ids:
+                commands.append(("groups", group_id, dict(body)))
+            for light_id in sorted(remaining):
+                commands.append(("lights", light_id, dict(body)))
+
+        return commands
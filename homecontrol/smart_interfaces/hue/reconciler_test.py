@@ -0,0 +1,132 @@
+from concurrent.futures import Future
+from typing import Any, Dict
+
+import pytest
+from mockito import ANY, unstub, verify, when
+
+from ...config import config
+
+from .api import Api
+from .bridge_state import BridgeState
+from .dispatcher import Dispatcher
+from .group import HueGroup
+from .light import HueLight
+from .reconciler import Reconciler
+
+
+def bridge() -> Dict[str, Any]:
+    return {
+        "lights": {
+            "1": {"name": "Reconcile light 1", "state": {"on": True}},
+            "2": {"name": "Reconcile light 2", "state": {"on": True}},
+            "3": {"name": "Reconcile light 3", "state": {"on": True}},
+        },
+        "groups": {
+            "1": {"name": "Reconcile zone", "lights": ["1", "2", "3"], "action": {"on": True}},
+        },
+        "sensors": {},
+    }
+
+
+@pytest.fixture(autouse=True)
+def reset_reconciler():
+    Reconciler.reset()
+    yield
+    Reconciler.reset()
+
+
+def sent() -> Future:
+    future: Future = Future()
+    future.set_result(True)
+    return future
+
+
+def test_highest_priority_wins_per_light() -> None:
+    when(Api).get("").thenReturn(bridge())
+    BridgeState.refresh()
+    when(Dispatcher).submit(ANY, ANY, ANY, ANY).thenReturn(sent())
+
+    with Reconciler.collect():
+        with Reconciler.priority(1):
+            HueLight("Reconcile light 1").turn_on()
+        HueGroup("Reconcile zone").turn_off()
+
+    verify(Dispatcher, times=1).submit("lights", 1, "state", {"on": True})
+    verify(Dispatcher, times=1).submit("lights", 2, "state", {"on": False})
+    verify(Dispatcher, times=1).submit("lights", 3, "state", {"on": False})
+    verify(Dispatcher, times=3).submit(ANY, ANY, ANY, ANY)
+    unstub()
+
+
+def test_same_target_is_folded_into_group() -> None:
+    when(Api).get("").thenReturn(bridge())
+    BridgeState.refresh()
+    when(Dispatcher).submit(ANY, ANY, ANY, ANY).thenReturn(sent())
+
+    with Reconciler.collect():
+        HueGroup("Reconcile zone").dim(0.5)
+        HueLight("Reconcile light 2").turn_off()
+        HueLight("Reconcile light 2").dim(0.5)
+
+    verify(Dispatcher, times=1).submit("groups", 1, "action", {"on": True, "bri": 127, "transitiontime": 10})
+    verify(Dispatcher, times=1).submit(ANY, ANY, ANY, ANY)
+    unstub()
+
+
+def test_does_not_wait_for_the_commands_to_be_sent() -> None:
+    when(Api).get("").thenReturn(bridge())
+    BridgeState.refresh()
+    when(Dispatcher).submit(ANY, ANY, ANY, ANY).thenReturn(Future())
+
+    with Reconciler.collect():
+        HueLight("Reconcile light 1").turn_off()
+
+    verify(Dispatcher, times=1).submit("lights", 1, "state", {"on": False})
+    unstub()
+
+
+def test_group_commands_only_send_what_each_light_supports() -> None:
+    typed = bridge()
+    typed["lights"]["1"]["type"] = "Extended color light"
+    typed["lights"]["2"]["type"] = "Dimmable light"
+    typed["lights"]["3"]["type"] = "On/Off plug-in unit"
+    when(Api).get("").thenReturn(typed)
+    BridgeState.refresh()
+    when(Dispatcher).submit(ANY, ANY, ANY, ANY).thenReturn(sent())
+
+    with Reconciler.collect():
+        HueGroup("Reconcile zone")._put({"on": True, "bri": 127, "xy": [0.4, 0.4]})
+
+    verify(Dispatcher, times=1).submit("lights", 1, "state", {"on": True, "bri": 127, "xy": [0.4, 0.4]})
+    verify(Dispatcher, times=1).submit("lights", 2, "state", {"on": True, "bri": 127})
+    verify(Dispatcher, times=1).submit("lights", 3, "state", {"on": True})
+    verify(Dispatcher, times=3).submit(ANY, ANY, ANY, ANY)
+    unstub()
+
+
+def test_higher_priority_is_held_in_later_updates() -> None:
+    when(Api).get("").thenReturn(bridge())
+    BridgeState.refresh()
+    when(Dispatcher).submit(ANY, ANY, ANY, ANY).thenReturn(sent())
+
+    with Reconciler.collect():
+        with Reconciler.priority(1):
+            HueLight("Reconcile light 1").turn_off()
+    with Reconciler.collect():
+        HueLight("Reconcile light 1").turn_on()
+        HueLight("Reconcile light 1").dim(0.5)
+
+    verify(Dispatcher, times=1).submit("lights", 1, "state", {"on": False})
+    verify(Dispatcher, times=1).submit(ANY, ANY, ANY, ANY)
+
+    # The held back command is sent when the hold ends
+    hold_time = config.hue.priority_hold_time
+    config.hue.priority_hold_time = 0
+    try:
+        with Reconciler.collect():
+            pass
+    finally:
+        config.hue.priority_hold_time = hold_time
+
+    verify(Dispatcher, times=1).submit("lights", 1, "state", {"on": True, "bri": 127, "transitiontime": 10})
+    unstub()
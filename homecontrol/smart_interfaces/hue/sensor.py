@@ -1,13 +1,23 @@
 from __future__ import annotations
 
+import heapq
+import threading
 import time
-from typing import Any, Dict, List, Optional
+from itertools import count
+from typing import Any, Dict, List, Optional, Tuple
 
-from .api import Api
+from .bridge_state import BridgeState
+
+_MAX_SLEEP_TIME = 60
 
 
 class Sensor:
     sensors: List[Sensor] = []
+    _due: List[Tuple[float, int, Sensor]] = []
+    """Heap of (due time, order, sensor)"""
+    _due_lock = threading.Lock()
+    _due_order = count()
+    _wake_up = threading.Event()
 
     def __init__(self, id: int, name: str, update_interval_seconds: float, log: bool) -> None:
         self.id = id
@@ -16,14 +26,56 @@ class Sensor:
         self.last_update = 0
         self.name = name
         Sensor.sensors.append(self)
+        Sensor._schedule(self, 0)
+
+    @staticmethod
+    def _schedule(sensor: Sensor, due_time: float) -> None:
+        with Sensor._due_lock:
+            heapq.heappush(Sensor._due, (due_time, next(Sensor._due_order), sensor))
+        Sensor._wake_up.set()
 
     @staticmethod
     def update_all() -> None:
+        """Update all sensors that are due from one fetch of the sensors, then sleep until the next one is due"""
+        now = time.time()
+        due: List[Sensor] = []
+        with Sensor._due_lock:
+            while Sensor._due and Sensor._due[0][0] <= now:
+                due.append(heapq.heappop(Sensor._due)[2])
+
+        if due:
+            all = BridgeState.get_all("sensors")
+            for sensor in due:
+                # Might have been updated by a pushed change since it was scheduled
+                if sensor._should_update():
+                    sensor.last_update = now
+                    data = all.get(str(sensor.id))
+                    if data and "state" in data:
+                        sensor.on_update(data)
+                Sensor._schedule(sensor, sensor.last_update + sensor._update_interval_seconds)
+
+        Sensor._wake_up.clear()
+        Sensor._wake_up.wait(Sensor._time_until_next_due())
+
+    @staticmethod
+    def _time_until_next_due() -> float:
+        with Sensor._due_lock:
+            if not Sensor._due:
+                return _MAX_SLEEP_TIME
+            return max(0, min(_MAX_SLEEP_TIME, Sensor._due[0][0] - time.time()))
+
+    @staticmethod
+    def _on_bridge_update(type: str, id: int) -> None:
+        """Update the sensor directly when the bridge pushes a change"""
+        if type != "sensors":
+            return
+
         for sensor in Sensor.sensors:
-            sensor.update()
+            if sensor.id == id:
+                sensor.update(force=True)
 
-    def update(self) -> None:
-        if self._should_update():
+    def update(self, force: bool = False) -> None:
+        if force or self._should_update():
             self.last_update = time.time()
             data = self._get_data()
             if data:
@@ -39,7 +91,10 @@ class Sensor:
         return time.time() - self.last_update
 
     def _get_data(self) -> Optional[Dict[str, Any]]:
-        data = Api.get(f"/sensors/{self.id}")
+        data = BridgeState.get("sensors", self.id)
         if data and "state" in data:
             return data
         return None
+
+
+BridgeState.add_listener(Sensor._on_bridge_update)
@@ -0,0 +1,48 @@
+from typing import Any, Dict, List
+
+from mockito import unstub, verify, when
+
+from .api import Api
+from .bridge_state import BridgeState
+from .sensor import Sensor
+
+
+class RecordingSensor(Sensor):
+    def __init__(self, id: int, update_interval_seconds: float) -> None:
+        super().__init__(id, f"Sensor {id}", update_interval_seconds, False)
+        self.updates: List[Dict[str, Any]] = []
+
+    def on_update(self, data: Dict[str, Any]) -> None:
+        self.updates.append(data)
+
+
+def test_update_all_fetches_sensors_once_for_all_due_sensors() -> None:
+    when(Api).get("").thenReturn(
+        {
+            "lights": {},
+            "groups": {},
+            "sensors": {
+                "1": {"name": "Sensor 1", "state": {"lightlevel": 100}},
+                "2": {"name": "Sensor 2", "state": {"lightlevel": 200}},
+            },
+        }
+    )
+    BridgeState.invalidate()
+    Sensor._due.clear()
+    first = RecordingSensor(1, 0.01)
+    second = RecordingSensor(2, 60)
+
+    Sensor.update_all()
+    assert [update["state"]["lightlevel"] for update in first.updates] == [100]
+    assert [update["state"]["lightlevel"] for update in second.updates] == [200]
+    verify(Api, times=1).get("")
+
+    # Only the first sensor is due again
+    Sensor.update_all()
+    assert len(first.updates) == 2
+    assert len(second.updates) == 1
+
+    Sensor._due.clear()
+    Sensor.sensors.remove(first)
+    Sensor.sensors.remove(second)
+    unstub()
@@ -0,0 +1,132 @@
+from __future__ import annotations
+
+import threading
+from typing import Any, Dict, List, Optional
+
+from .bridge_state import BridgeState
+
+_XY_TOLERANCE = 0.0005
+"""The bridge rounds xy to 4 decimals"""
+_META_FIELDS = ["transitiontime"]
+_COLOR_MODES = {
+    "xy": "xy",
+    "ct": "ct",
+    "hue": "hs",
+    "sat": "hs",
+}
+
+
+class CommandStats:
+    """Counts how many commands were sent to the bridge and how many were skipped"""
+
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self.sent = 0
+        self.suppressed = 0
+        self.merged = 0
+
+    def add_sent(self) -> None:
+        with self._lock:
+            self.sent += 1
+
+    def add_suppressed(self) -> None:
+        with self._lock:
+            self.suppressed += 1
+
+    def add_merged(self) -> None:
+        with self._lock:
+            self.merged += 1
+
+    def __str__(self) -> str:
+        return f"sent: {self.sent}, suppressed: {self.suppressed}, merged: {self.merged}"
+
+
+class ShadowState:
+    """Compares outgoing commands with the last confirmed state of a light or group"""
+
+    stats = CommandStats()
+
+    @staticmethod
+    def get(type: str, id: int) -> Optional[Dict[str, Any]]:
+        """The last confirmed state of a light or group, or None if it's unknown"""
+        data = BridgeState.get(type, id)
+        if data is None:
+            return None
+
+        if type == "lights":
+            return data.get("state")
+
+        # A group's action is only the last command sent to it; use the lights' actual state instead
+        if type == "groups":
+            states: List[Dict[str, Any]] = []
+            for light_id in data.get("lights", []):
+                light = BridgeState.get("lights", int(light_id))
+                if light is None or "state" not in light:
+                    return None
+                states.append(light["state"])
+            return ShadowState._common_state(states)
+
+        return None
+
+    @staticmethod
+    def _common_state(states: List[Dict[str, Any]]) -> Optional[Dict[str, Any]]:
+        """Only keep the fields that have the same value for all the states"""
+        if len(states) == 0:
+            return None
+
+        common: Dict[str, Any] = {}
+        first = states[0]
+        for key, value in first.items():
+            if all(key in state and ShadowState._is_set(state, key, value) for state in states[1:]):
+                common[key] = value
+
+        # All lights need to be in the same color mode for a color to be treated as set
+        if "colormode" not in common:
+            for key in _COLOR_MODES.keys():
+                common.pop(key, None)
+        return common
+
+    @staticmethod
+    def diff(body: Dict[str, Any], state: Dict[str, Any]) -> Dict[str, Any]:
+        """Remove the fields from the body that already are set in the state.
+
+        Returns:
+            Dict[str, Any]: The fields that need to be sent, empty if nothing would change.
+        """
+        changes: Dict[str, Any] = {}
+        for key, value in body.items():
+            if key in _META_FIELDS:
+                continue
+            if not ShadowState._is_set(state, key, value):
+                changes[key] = value
+
+        if len(changes) == 0:
+            return changes
+
+        for key in _META_FIELDS:
+            if key in body:
+                changes[key] = body[key]
+        return changes
+
+    @staticmethod
+    def merge(first: Dict[str, Any], second: Dict[str, Any]) -> Dict[str, Any]:
+        """Merge two commands for the same device; the fields in second take precedence"""
+        merged = dict(first)
+        merged.update(second)
+        return merged
+
+    @staticmethod
+    def _is_set(state: Dict[str, Any], key: str, value: Any) -> bool:
+        if key not in state:
+            return False
+
+        # Color is only set if the light is in that color mode
+        if key in _COLOR_MODES and state.get("colormode") != _COLOR_MODES[key]:
+            return False
+
+        current = state[key]
+        if key == "xy":
+            if not isinstance(current, list) or len(current) != 2 or len(value) != 2:
+                return False
+            return abs(current[0] - value[0]) <= _XY_TOLERANCE and abs(current[1] - value[1]) <= _XY_TOLERANCE
+        return current == value
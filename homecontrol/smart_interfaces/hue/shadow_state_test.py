@@ -0,0 +1,77 @@
+from typing import Any, Dict
+
+import pytest
+from mockito import unstub, when
+
+from .api import Api
+from .bridge_state import BridgeState
+from .shadow_state import ShadowState
+
+
+def state(on: bool = True, bri: int = 100, colormode: str = "xy") -> Dict[str, Any]:
+    return {"on": on, "bri": bri, "xy": [0.43, 0.39], "ct": 366, "colormode": colormode}
+
+
+@pytest.mark.parametrize(
+    "name,body,state,expected",
+    [
+        (
+            "Should skip everything when already at target",
+            {"on": True, "bri": 100, "transitiontime": 10},
+            state(),
+            {},
+        ),
+        (
+            "Should only keep changed fields and the transition time",
+            {"on": True, "bri": 50, "transitiontime": 10},
+            state(),
+            {"bri": 50, "transitiontime": 10},
+        ),
+        (
+            "Should skip xy when within the bridge's rounding",
+            {"on": True, "xy": [0.43004, 0.38996]},
+            state(),
+            {},
+        ),
+        (
+            "Should send color when the light is in another color mode",
+            {"on": True, "ct": 366},
+            state(),
+            {"ct": 366},
+        ),
+        (
+            "Should turn on when off even if the brightness is the same",
+            {"on": True, "bri": 100},
+            state(on=False),
+            {"on": True},
+        ),
+    ],
+)
+def test_diff(name: str, body: Dict[str, Any], state: Dict[str, Any], expected: Dict[str, Any]) -> None:
+    print(name)
+    assert expected == ShadowState.diff(body, state)
+
+
+def test_merge_uses_latest_values() -> None:
+    merged = ShadowState.merge({"on": True, "bri": 10, "transitiontime": 0}, {"bri": 20, "transitiontime": 600})
+    assert merged == {"on": True, "bri": 20, "transitiontime": 600}
+
+
+def test_group_state_uses_lights_state() -> None:
+    when(Api).get("").thenReturn(
+        {
+            "lights": {
+                "1": {"name": "A", "state": state(on=True, bri=100)},
+                "2": {"name": "B", "state": state(on=False, bri=100)},
+            },
+            "groups": {"1": {"name": "G", "lights": ["1", "2"], "action": {"on": True, "bri": 100}}},
+        }
+    )
+    BridgeState.refresh()
+
+    group_state = ShadowState.get("groups", 1)
+
+    assert group_state is not None
+    assert "on" not in group_state
+    assert group_state["bri"] == 100
+    unstub()
@@ -1,4 +1,4 @@
-from typing import Union
+from typing import Optional, Union
 
 from ..core.entities.color import Color
 from .moods import Mood
@@ -54,5 +54,10 @@ class Interface:
         """
         pass
 
+    def is_set_to(self, brightness: Union[float, int, None], color: Optional[Color]) -> bool:
+        """Check if the brightness and color are (close to) the specified values.
+        True if it's unknown or they can't be set."""
+        return True
+
     def mood(self, mood: Mood) -> None:
         """Set the mood for an interface if applicable"""
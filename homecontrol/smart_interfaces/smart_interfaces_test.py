@@ -0,0 +1,60 @@
+from mockito import unstub, when
+
+from . import SmartInterfaces
+from .hue.api import Api
+from .hue.bridge_state import BridgeState
+from .hue.group import HueGroup
+from .hue.light import HueLight
+
+
+def bridge():
+    return {
+        "lights": {
+            "21": {"name": "Fold A", "state": {"on": False}},
+            "22": {"name": "Fold B", "state": {"on": False}},
+            "23": {"name": "Fold C", "state": {"on": False}},
+            "24": {"name": "Fold D", "state": {"on": False}},
+        },
+        "groups": {
+            "11": {"name": "Fold Room", "lights": ["21", "22", "23"], "action": {"on": False}},
+            "12": {"name": "Fold Zone", "lights": ["21", "22"], "action": {"on": False}},
+        },
+    }
+
+
+def test_fold_lights_into_largest_group() -> None:
+    when(Api).get("").thenReturn(bridge())
+    BridgeState.refresh()
+
+    a, b, c, d = HueLight("Fold A"), HueLight("Fold B"), HueLight("Fold C"), HueLight("Fold D")
+    folded = SmartInterfaces.fold_groups([a, b, d, c])
+
+    assert len(folded) == 2
+    assert isinstance(folded[0], HueGroup)
+    assert folded[0].name == "Fold Room"
+    assert folded[1] is d
+    unstub()
+
+
+def test_fold_keeps_lights_when_no_group_matches() -> None:
+    when(Api).get("").thenReturn(bridge())
+    BridgeState.refresh()
+
+    lights = [HueLight("Fold A"), HueLight("Fold D")]
+
+    assert SmartInterfaces.fold_groups(lights) == lights
+    unstub()
+
+
+def test_fold_only_groups_that_support_the_command() -> None:
+    state = bridge()
+    state["lights"]["21"]["type"] = "Extended color light"
+    state["lights"]["22"]["type"] = "On/Off plug-in unit"
+    when(Api).get("").thenReturn(state)
+    BridgeState.refresh()
+
+    a, b = HueLight("Fold A"), HueLight("Fold B")
+
+    assert SmartInterfaces.fold_groups([a, b])[0].name == "Fold Zone"
+    assert SmartInterfaces.fold_groups([a, b], ["on", "bri"]) == [a, b]
+    unstub()
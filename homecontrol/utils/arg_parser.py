@@ -15,5 +15,14 @@ def parse_args() -> argparse.Namespace:
         action="store_true",
         help="Turn on debug messages. This automatically turns on --verbose as well.",
     )
+    parser.add_argument(
+        "--simulate",
+        nargs="?",
+        const="",
+        metavar="TRACE",
+        help="Run the controllers through a trace of presence, light level and weather changes (json) "
+        + "as fast as possible, against a fake bridge, and print the commands that are sent. "
+        + "Without a trace a synthetic day is simulated.",
+    )
 
     return parser.parse_args()
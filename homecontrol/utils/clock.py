@@ -0,0 +1,55 @@
+from __future__ import annotations
+
+import time
+from datetime import datetime
+from typing import Optional
+
+from dateutil import tz
+
+from .context import Context
+
+
+class Clock:
+    """The current time. Everything that depends on the time reads it from here, so the time can be simulated"""
+
+    _simulated: Optional[datetime] = None
+
+    @staticmethod
+    def now() -> datetime:
+        """The current local time. Stays the same within a Context"""
+        context = Context.current()
+        if context:
+            return context.now
+        if Clock._simulated:
+            return Clock._simulated
+        return datetime.now(tz.tzlocal())
+
+    @staticmethod
+    def time() -> float:
+        """Seconds since the epoch, like time.time()"""
+        if Clock._simulated:
+            return Clock._simulated.timestamp()
+        return time.time()
+
+    @staticmethod
+    def monotonic() -> float:
+        """Seconds that only go forward, like time.monotonic()"""
+        if Clock._simulated:
+            return Clock._simulated.timestamp()
+        return time.monotonic()
+
+    @staticmethod
+    def is_simulated() -> bool:
+        return Clock._simulated is not None
+
+    @staticmethod
+    def simulate(now: datetime) -> None:
+        """Stop the clock at now. Call again to move it"""
+        if now.tzinfo is None:
+            now = now.replace(tzinfo=tz.tzlocal())
+        Clock._simulated = now
+
+    @staticmethod
+    def reset() -> None:
+        """Go back to the real time"""
+        Clock._simulated = None
@@ -26,6 +26,9 @@ class ConfigGateway:
             "int:port",
             "log_level",
             "stats_file",
+            "float:controller_update_interval",
+            "rules_file",
+            "bool:neighbour_table",
         )
 
         # Convert log_level str to TealLevel
@@ -41,6 +44,17 @@ class ConfigGateway:
             "Hue",
             "host",
             "username",
+            "float:timeout",
+            "int:retries",
+            "float:retry_backoff",
+            "int:max_connections",
+            "float:state_max_age",
+            "float:light_commands_per_second",
+            "float:group_commands_per_second",
+            "bool:event_stream",
+            "float:event_stream_max_age",
+            "bool:mood_scenes",
+            "float:priority_hold_time",
         )
 
         if not hue.host:
@@ -77,6 +91,13 @@ class ConfigGateway:
             "int:port",
             "site_id",
             "int:guest_inactive_time",
+            "float:timeout",
+            "bool:verify_ssl",
+            "ca_file",
+            "session_file",
+            "float:user_groups_ttl",
+            "bool:event_stream",
+            "float:event_stream_poll_interval",
         )
 
         if not unifi.username:
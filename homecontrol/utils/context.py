@@ -0,0 +1,70 @@
+from __future__ import annotations
+
+import threading
+from contextlib import contextmanager
+from datetime import datetime
+from types import MappingProxyType
+from typing import Any, Callable, Dict, Iterator, Mapping, Optional, TypeVar
+
+T = TypeVar("T")
+
+
+class Context:
+    """A frozen copy of all inputs (time, presence, guests, light levels, weather and sun), taken once per update of
+    the controllers, so that all controllers make their decisions on the same values even when other threads
+    update them in the meantime.
+
+    The data sources register how their value is read with add_source(), and read it through get(),
+    which returns the value from the context if one is active in this thread, otherwise the current value.
+    """
+
+    _sources: Dict[str, Callable[[], Any]] = {}
+    _local = threading.local()
+
+    def __init__(self, now: datetime, values: Mapping[str, Any]) -> None:
+        self._now = now
+        self._values: Mapping[str, Any] = MappingProxyType(dict(values))
+
+    @property
+    def now(self) -> datetime:
+        return self._now
+
+    @property
+    def weekday(self) -> int:
+        return self._now.weekday()
+
+    @property
+    def values(self) -> Mapping[str, Any]:
+        """The values of all sources, by their Inputs key"""
+        return self._values
+
+    @staticmethod
+    def add_source(input: str, read: Callable[[], Any]) -> None:
+        """Take the value of input (an Inputs key) with read() in every context"""
+        Context._sources[input] = read
+
+    @staticmethod
+    @contextmanager
+    def take(now: datetime) -> Iterator[Context]:
+        """Read all sources once, and use these values (and now as the time) in this thread within the with-statement"""
+        outer: Optional[Context] = Context.current()
+        context = outer
+        if outer is None:
+            context = Context(now, {input: read() for input, read in list(Context._sources.items())})
+            Context._local.context = context
+        try:
+            yield context
+        finally:
+            Context._local.context = outer
+
+    @staticmethod
+    def current() -> Optional[Context]:
+        return getattr(Context._local, "context", None)
+
+    @staticmethod
+    def get(input: str, read: Callable[[], T]) -> T:
+        """The value of input in the current context, or read() if there is no context"""
+        context = Context.current()
+        if context is not None and input in context._values:
+            return context._values[input]
+        return read()
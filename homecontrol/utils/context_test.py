@@ -0,0 +1,37 @@
+import threading
+from datetime import datetime
+
+from dateutil import tz
+
+from ..data.network.device import Device
+from .clock import Clock
+from .context import Context
+
+
+def test_values_stay_the_same_within_context() -> None:
+    device = Device("Context test device", log=False)
+    device.turned_on()
+    now = datetime(2022, 12, 1, 19, tzinfo=tz.tzlocal())
+
+    with Context.take(now) as context:
+        device.turned_off()
+        assert device.is_on()
+        assert Clock.now() == now
+        assert context.weekday == 3
+
+    assert not device.is_on()
+    assert Clock.now() != now
+
+
+def test_context_is_only_used_in_its_thread() -> None:
+    device = Device("Context thread test device", log=False)
+    device.turned_on()
+    results = []
+
+    with Context.take(datetime(2022, 12, 1, 19, tzinfo=tz.tzlocal())):
+        device.turned_off()
+        thread = threading.Thread(target=lambda: results.append(device.is_on()))
+        thread.start()
+        thread.join()
+
+    assert results == [False]
@@ -0,0 +1,46 @@
+import threading
+from typing import List, Sequence, Tuple
+
+DEFAULT_BUCKETS = (0.001, 0.005, 0.01, 0.05, 0.1, 0.5, 1.0, 5.0)
+"""Upper bounds in seconds"""
+
+
+class Histogram:
+    """Counts observed values (e.g. durations in seconds) in buckets, like a Prometheus histogram"""
+
+    def __init__(self, buckets: Sequence[float] = DEFAULT_BUCKETS) -> None:
+        self._lock = threading.Lock()
+        self.buckets = tuple(sorted(buckets))
+        self._counts = [0] * len(self.buckets)
+        self.count = 0
+        self.sum = 0.0
+        self.max = 0.0
+
+    def observe(self, value: float) -> None:
+        with self._lock:
+            self.count += 1
+            self.sum += value
+            self.max = max(self.max, value)
+            for i, bucket in enumerate(self.buckets):
+                if value <= bucket:
+                    self._counts[i] += 1
+                    break
+
+    @property
+    def average(self) -> float:
+        if self.count == 0:
+            return 0.0
+        return self.sum / self.count
+
+    def cumulative_counts(self) -> List[Tuple[float, int]]:
+        """Number of values less than or equal to each bucket"""
+        with self._lock:
+            counts: List[Tuple[float, int]] = []
+            total = 0
+            for bucket, count in zip(self.buckets, self._counts):
+                total += count
+                counts.append((bucket, total))
+            return counts
+
+    def __str__(self) -> str:
+        return f"count: {self.count}, avg: {self.average * 1000:.1f} ms, max: {self.max * 1000:.1f} ms"
@@ -0,0 +1,23 @@
+import pytest
+
+from .histogram import Histogram
+
+
+@pytest.mark.parametrize(
+    "name,values,expected",
+    [
+        ("no values", [], [(0.1, 0), (1.0, 0)]),
+        ("value on a bucket is counted in it", [0.1], [(0.1, 1), (1.0, 1)]),
+        ("counts are cumulative", [0.05, 0.5, 0.7], [(0.1, 1), (1.0, 3)]),
+        ("values above the last bucket are only in the count", [2.0], [(0.1, 0), (1.0, 0)]),
+    ],
+)
+def test_cumulative_counts(name, values, expected):
+    print(name)
+    histogram = Histogram(buckets=[1.0, 0.1])
+
+    for value in values:
+        histogram.observe(value)
+
+    assert histogram.cumulative_counts() == expected
+    assert histogram.count == len(values)
@@ -0,0 +1,124 @@
+from __future__ import annotations
+
+import threading
+from contextlib import contextmanager
+from datetime import datetime
+from typing import Iterator, Optional, Set
+
+
+class Reads:
+    """The inputs that were read within Inputs.record()"""
+
+    def __init__(self) -> None:
+        self.inputs: Set[str] = set()
+        self.next_change: Optional[datetime] = None
+        """The earliest time when a time based input that was read changes its value"""
+
+    def add(self, input: str) -> None:
+        self.inputs.add(input)
+
+    def add_next_change(self, next_change: datetime) -> None:
+        if self.next_change is None or next_change < self.next_change:
+            self.next_change = next_change
+
+    def update(self, other: Reads) -> None:
+        self.inputs.update(other.inputs)
+        if other.next_change:
+            self.add_next_change(other.next_change)
+
+
+class Inputs:
+    """Keeps track of which inputs (network devices, sensors, weather, sun, time) are read,
+    and which of them have changed, so controllers only need to be updated when something they read has changed.
+
+    The data sources call read() every time a value is read and changed() when the value changes.
+    Time based inputs don't change by themselves; they call read_time() with the time they next change instead.
+    """
+
+    TIME = "time"
+    SUN = "sun"
+    WEATHER = "weather"
+    GUESTS = "guests"
+    PRESENCE = "presence"
+    RULES = "rules"
+
+    _local = threading.local()
+    _condition = threading.Condition()
+    _changed: Set[str] = set()
+
+    @staticmethod
+    def device(name: str) -> str:
+        return f"device.{name}"
+
+    @staticmethod
+    def presence(name: str) -> str:
+        """Someone being home, see Presence"""
+        return f"presence.{name}"
+
+    @staticmethod
+    def sensor(name: str) -> str:
+        return f"sensor.{name}"
+
+    @staticmethod
+    def hue(type: str, id: int) -> str:
+        """A light or group on the Hue bridge"""
+        return f"hue.{type}.{id}"
+
+    @staticmethod
+    def read(input: str) -> None:
+        reads: Optional[Reads] = getattr(Inputs._local, "reads", None)
+        if reads is not None:
+            reads.add(input)
+
+    @staticmethod
+    def read_time(next_change: datetime) -> None:
+        """Read a time based value that stays the same until next_change"""
+        reads: Optional[Reads] = getattr(Inputs._local, "reads", None)
+        if reads is not None:
+            reads.add(Inputs.TIME)
+            reads.add_next_change(next_change)
+
+    @staticmethod
+    @contextmanager
+    def record() -> Iterator[Reads]:
+        """Record all inputs that are read in this thread within the with-statement"""
+        outer: Optional[Reads] = getattr(Inputs._local, "reads", None)
+        reads = Reads()
+        Inputs._local.reads = reads
+        try:
+            yield reads
+        finally:
+            Inputs._local.reads = outer
+            if outer is not None:
+                outer.update(reads)
+
+    @staticmethod
+    @contextmanager
+    def ignore() -> Iterator[None]:
+        """Don't record the inputs that are read in this thread within the with-statement"""
+        outer: Optional[Reads] = getattr(Inputs._local, "reads", None)
+        Inputs._local.reads = None
+        try:
+            yield
+        finally:
+            Inputs._local.reads = outer
+
+    @staticmethod
+    def changed(input: str) -> None:
+        with Inputs._condition:
+            Inputs._changed.add(input)
+            Inputs._condition.notify_all()
+
+    @staticmethod
+    def wait_for_changes(timeout: Optional[float]) -> Set[str]:
+        """Wait until an input has changed, or for timeout seconds.
+
+        Returns:
+            Set[str]: The inputs that have changed since the last call
+        """
+        with Inputs._condition:
+            if not Inputs._changed:
+                Inputs._condition.wait(timeout)
+            changed = Inputs._changed
+            Inputs._changed = set()
+            return changed
@@ -0,0 +1,41 @@
+from datetime import datetime
+
+from .inputs import Inputs
+
+
+def test_record_inputs_read_in_nested_records() -> None:
+    with Inputs.record() as outer:
+        Inputs.read("a")
+        with Inputs.record() as inner:
+            Inputs.read("b")
+
+    assert inner.inputs == {"b"}
+    assert outer.inputs == {"a", "b"}
+
+
+def test_read_outside_record_is_ignored() -> None:
+    Inputs.read("a")
+
+    with Inputs.record() as reads:
+        pass
+
+    assert reads.inputs == set()
+
+
+def test_wait_for_changes_returns_changes_once() -> None:
+    Inputs.wait_for_changes(0)
+    Inputs.changed("a")
+    Inputs.changed("b")
+
+    assert Inputs.wait_for_changes(0) == {"a", "b"}
+    assert Inputs.wait_for_changes(0) == set()
+
+
+def test_record_earliest_next_change() -> None:
+    with Inputs.record() as reads:
+        Inputs.read_time(datetime(2022, 1, 1, 17))
+        Inputs.read_time(datetime(2022, 1, 1, 8))
+        Inputs.read_time(datetime(2022, 1, 1, 10))
+
+    assert reads.inputs == {Inputs.TIME}
+    assert reads.next_change == datetime(2022, 1, 1, 8)
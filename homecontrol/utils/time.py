@@ -1,14 +1,36 @@
-from datetime import date, datetime, time, timedelta
+from datetime import datetime, time, timedelta
 from enum import Enum
 from typing import Tuple
 
 from dateutil import tz
 
+from .clock import Clock
+from .inputs import Inputs
+
+
+def _next_time(at: time, now: datetime) -> datetime:
+    """The next time it's at o'clock, after now"""
+    next = now.replace(hour=at.hour, minute=at.minute, second=at.second, microsecond=0)
+    if next <= now:
+        next += timedelta(days=1)
+    return next
+
+
+def _next_minute(now: datetime) -> datetime:
+    return now.replace(second=0, microsecond=0) + timedelta(minutes=1)
+
+
+def _next_day(now: datetime) -> datetime:
+    return now.replace(hour=0, minute=0, second=0, microsecond=0) + timedelta(days=1)
+
 
 class Time:
     @staticmethod
     def between(start: time, end: time) -> bool:
-        now = datetime.now(tz.tzlocal()).time()
+        now_datetime = Clock.now()
+        # Can only change at the start or end
+        Inputs.read_time(min(_next_time(start, now_datetime), _next_time(end, now_datetime)))
+        now = now_datetime.time()
 
         # Same day
         if start <= end:
@@ -18,18 +40,20 @@ class Time:
 
     @staticmethod
     def percentage_between(start: time, end: time) -> float:
-        now = datetime.now(tz.tzlocal())
-        datetime_start = datetime(now.year, now.month, now.day, start.hour, start.minute, tzinfo=tz.tzlocal())
-        datetime_end = datetime(now.year, now.month, now.day, end.hour, end.minute, tzinfo=tz.tzlocal())
+        now = Clock.now()
+        # Changes all the time, but once a minute is often enough
+        Inputs.read_time(_next_minute(now))
+        return Time.percentage_at(start, end, now)
 
-        # Over midnight
-        if start >= end:
-            datetime_start = datetime_start + timedelta(days=-1)
+    @staticmethod
+    def percentage_at(start: time, end: time, at: datetime) -> float:
+        """Like percentage_between(), but at the specified time instead of now"""
+        datetime_start, datetime_end = Time.datetimes_between(start, end)
 
         datetime_diff = datetime_end - datetime_start
         total_diff_sec = datetime_diff.total_seconds()
 
-        datetime_diff = now - datetime_start
+        datetime_diff = at - datetime_start
         diff_sec = datetime_diff.total_seconds()
 
         if total_diff_sec <= 0:
@@ -37,6 +61,23 @@ class Time:
 
         return diff_sec / total_diff_sec
 
+    @staticmethod
+    def datetimes_between(start: time, end: time) -> Tuple[datetime, datetime]:
+        """The start and end of the time span for today. When it's over midnight, the one that ends tomorrow
+        if it has already started today"""
+        now = Clock.now()
+        datetime_start = datetime(now.year, now.month, now.day, start.hour, start.minute, tzinfo=tz.tzlocal())
+        datetime_end = datetime(now.year, now.month, now.day, end.hour, end.minute, tzinfo=tz.tzlocal())
+
+        # Over midnight
+        if start >= end:
+            if now.time() >= start:
+                datetime_end = datetime_end + timedelta(days=1)
+            else:
+                datetime_start = datetime_start + timedelta(days=-1)
+
+        return datetime_start, datetime_end
+
 
 class Days(Enum):
     monday = 0
@@ -51,8 +92,9 @@ class Days(Enum):
 class Day:
     @staticmethod
     def is_day(*days: Days) -> bool:
+        Inputs.read_time(_next_day(Clock.now()))
         for day in days:
-            if date.today().weekday() == day.value:
+            if Clock.now().weekday() == day.value:
                 return True
         return False
 
@@ -68,7 +110,8 @@ class Day:
 class Date:
     @staticmethod
     def between(start: Tuple[int, int], end: Tuple[int, int]) -> bool:
-        now = datetime.now(tz.tzlocal())
+        now = Clock.now()
+        Inputs.read_time(_next_day(now))
         now = (now.month, now.day)
 
         # Same year
@@ -4,6 +4,7 @@ import pytest
 import time_machine
 from dateutil import tz
 
+from .inputs import Inputs
 from .time import Time
 
 
@@ -45,6 +46,13 @@ from .time import Time
             time(1),
             0.5,
         ),
+        (
+            "Spanning across midnight before midnight",
+            time(20),
+            time(6),
+            time(22),
+            0.2,
+        ),
     ],
 )
 def test_percentage_between(name, start, end, time: time, expected):
@@ -57,3 +65,24 @@ def test_percentage_between(name, start, end, time: time, expected):
         actual = Time.percentage_between(start, end)
 
         assert expected == actual
+
+
+@pytest.mark.parametrize(
+    "name,start,end,time,expected",
+    [
+        ("Next change at end when within", time(8), time(17), time(12), datetime(2020, 11, 11, 17)),
+        ("Next change at start when before", time(8), time(17), time(6), datetime(2020, 11, 11, 8)),
+        ("Next change at start tomorrow when after", time(8), time(17), time(18), datetime(2020, 11, 12, 8)),
+        ("Next change at end tomorrow across midnight", time(22), time(3), time(23), datetime(2020, 11, 12, 3)),
+    ],
+)
+def test_between_records_next_change(name, start, end, time: time, expected):
+    print(name)
+
+    date = datetime(2020, 11, 11, time.hour, time.minute, tzinfo=tz.tzlocal())
+
+    with time_machine.travel(date, tick=False):
+        with Inputs.record() as reads:
+            Time.between(start, end)
+
+        assert reads.next_change == expected.replace(tzinfo=tz.tzlocal())
@@ -0,0 +1,254 @@
+from __future__ import annotations
+
+import base64
+import hashlib
+import os
+import select
+import socket
+import ssl
+import struct
+from typing import Callable, Dict, List, Optional, Tuple, Union
+from urllib.parse import urlparse
+
+_GUID = "258EAFA5-E914-47DA-95CA-C5AB0DC85B11"
+_READ_TIMEOUT = 120
+
+OPCODE_CONTINUATION = 0x0
+OPCODE_TEXT = 0x1
+OPCODE_BINARY = 0x2
+OPCODE_CLOSE = 0x8
+OPCODE_PING = 0x9
+OPCODE_PONG = 0xA
+
+
+class WebSocketError(Exception):
+    def __init__(self, message: str, status: Optional[int] = None) -> None:
+        super().__init__(message)
+        self.status = status
+
+
+class WebSocket:
+    """A minimal websocket client (RFC 6455) for receiving messages from an event stream.
+
+    Answers pings, and pings the server itself when it has been quiet for a while to find dead connections.
+    """
+
+    def __init__(
+        self,
+        url: str,
+        headers: Optional[Dict[str, str]] = None,
+        timeout: float = 10,
+        verify: Union[bool, str] = True,
+    ) -> None:
+        """
+        Args:
+            url (str): ws:// or wss://
+            timeout (float): Seconds to wait when connecting
+            verify (bool|str): Verify the server's certificate, or the path of a CA bundle/certificate to verify it with.
+                Only turn it off for a server you trust on a network you trust
+        """
+        self.url = url
+        self.headers = headers if headers else {}
+        self.timeout = timeout
+        self.verify = verify
+        self._socket: Optional[socket.socket] = None
+        self._buffer = bytearray()
+
+    def __enter__(self) -> WebSocket:
+        return self
+
+    def __exit__(self, *args) -> None:
+        self.close()
+
+    def connect(self) -> None:
+        """Connect and upgrade to a websocket. Raises WebSocketError with the status code if the server refuses"""
+        url = urlparse(self.url)
+        secure = url.scheme == "wss"
+        host = url.hostname or ""
+        port = url.port if url.port else (443 if secure else 80)
+
+        sock = socket.create_connection((host, port), timeout=self.timeout)
+        if secure:
+            if isinstance(self.verify, str):
+                context = ssl.create_default_context(cafile=self.verify)
+            else:
+                context = ssl.create_default_context()
+            if self.verify is False:
+                context.check_hostname = False
+                context.verify_mode = ssl.CERT_NONE
+            sock = context.wrap_socket(sock, server_hostname=host)
+        self._socket = sock
+        self._buffer = bytearray()
+
+        key = base64.b64encode(os.urandom(16)).decode()
+        path = url.path or "/"
+        if url.query:
+            path += f"?{url.query}"
+        lines = [
+            f"GET {path} HTTP/1.1",
+            f"Host: {url.netloc}",
+            "Upgrade: websocket",
+            "Connection: Upgrade",
+            f"Sec-WebSocket-Key: {key}",
+            "Sec-WebSocket-Version: 13",
+        ]
+        lines.extend(f"{name}: {value}" for name, value in self.headers.items())
+        sock.sendall(("\r\n".join(lines) + "\r\n\r\n").encode())
+
+        status, headers = self._read_response()
+        if status != 101:
+            self.close()
+            raise WebSocketError(f"Upgrade to websocket failed - status code: {status}", status)
+        if headers.get("sec-websocket-accept") != accept_key(key):
+            self.close()
+            raise WebSocketError("Invalid Sec-WebSocket-Accept from the server")
+
+    def _read_response(self) -> Tuple[int, Dict[str, str]]:
+        status_line = self._read_line()
+        parts = status_line.split(" ", 2)
+        if len(parts) < 2 or not parts[1].isdigit():
+            raise WebSocketError(f"Invalid response from the server: {status_line.strip()}")
+
+        headers: Dict[str, str] = {}
+        while True:
+            line = self._read_line().strip()
+            if not line:
+                break
+            name, _, value = line.partition(":")
+            headers[name.strip().lower()] = value.strip()
+        return int(parts[1]), headers
+
+    def _read_line(self) -> str:
+        while b"\n" not in self._buffer:
+            chunk = self._socket.recv(4096)
+            if not chunk:
+                raise WebSocketError("The server closed the connection")
+            self._buffer.extend(chunk)
+        end = self._buffer.index(b"\n") + 1
+        line = bytes(self._buffer[:end])
+        del self._buffer[:end]
+        return line.decode("latin-1")
+
+    def _read(self, length: int) -> bytes:
+        """Read length bytes, or fewer when the server has closed the connection"""
+        while len(self._buffer) < length:
+            chunk = self._socket.recv(max(4096, length - len(self._buffer)))
+            if not chunk:
+                break
+            self._buffer.extend(chunk)
+        data = bytes(self._buffer[:length])
+        del self._buffer[:length]
+        return data
+
+    def _wait_for_data(self) -> bool:
+        """Wait until the server sends something. Returns False if it has been quiet for a while"""
+        if self._buffer or (isinstance(self._socket, ssl.SSLSocket) and self._socket.pending()):
+            return True
+        readable, _, _ = select.select([self._socket], [], [], _READ_TIMEOUT)
+        return len(readable) > 0
+
+    def receive(self) -> Optional[str]:
+        """Wait for the next message. Returns None when the server closes the connection"""
+        fragments: List[bytes] = []
+        pinged = False
+        while True:
+            if not self._wait_for_data():
+                if pinged:
+                    raise WebSocketError("No answer from the server")
+                self._send(OPCODE_PING, b"")
+                pinged = True
+                continue
+
+            pinged = False
+            frame = read_frame(self._read)
+            if frame is None:
+                return None
+
+            fin, opcode, payload = frame
+            if opcode in (OPCODE_TEXT, OPCODE_BINARY, OPCODE_CONTINUATION):
+                fragments.append(payload)
+                if fin:
+                    return b"".join(fragments).decode("utf-8", errors="replace")
+            elif opcode == OPCODE_PING:
+                self._send(OPCODE_PONG, payload)
+            elif opcode == OPCODE_CLOSE:
+                self._send(OPCODE_CLOSE, payload[:2])
+                return None
+
+    def _send(self, opcode: int, payload: bytes) -> None:
+        self._socket.sendall(encode_frame(opcode, payload, mask=True))
+
+    def close(self) -> None:
+        if self._socket:
+            self._socket.close()
+            self._socket = None
+
+
+def accept_key(key: str) -> str:
+    """The Sec-WebSocket-Accept the server answers for the Sec-WebSocket-Key"""
+    return base64.b64encode(hashlib.sha1((key + _GUID).encode()).digest()).decode()
+
+
+def encode_frame(opcode: int, payload: bytes, mask: bool) -> bytes:
+    """A single (final) frame. Clients need to mask the frames they send, servers must not"""
+    header = bytes([0x80 | opcode])
+    mask_bit = 0x80 if mask else 0
+    length = len(payload)
+    if length < 126:
+        header += bytes([mask_bit | length])
+    elif length < 1 << 16:
+        header += bytes([mask_bit | 126]) + struct.pack("!H", length)
+    else:
+        header += bytes([mask_bit | 127]) + struct.pack("!Q", length)
+
+    if not mask:
+        return header + payload
+    mask_key = os.urandom(4)
+    return header + mask_key + _apply_mask(payload, mask_key)
+
+
+def read_frame(read: Callable[[int], bytes]) -> Optional[Tuple[bool, int, bytes]]:
+    """Read the next frame. Returns if it's the final fragment, the opcode and the payload, or None when closed
+
+    Args:
+        read: Reads up to the number of bytes, fewer when the connection is closed
+    """
+    header = _read_exactly(read, 2)
+    if header is None:
+        return None
+
+    fin = header[0] & 0x80 != 0
+    opcode = header[0] & 0x0F
+    masked = header[1] & 0x80 != 0
+    length = header[1] & 0x7F
+    if length == 126:
+        extended = _read_exactly(read, 2)
+        if extended is None:
+            return None
+        length = struct.unpack("!H", extended)[0]
+    elif length == 127:
+        extended = _read_exactly(read, 8)
+        if extended is None:
+            return None
+        length = struct.unpack("!Q", extended)[0]
+
+    mask_key = _read_exactly(read, 4) if masked else b""
+    payload = _read_exactly(read, length)
+    if mask_key is None or payload is None:
+        return None
+    if masked:
+        payload = _apply_mask(payload, mask_key)
+    return fin, opcode, payload
+
+
+def _read_exactly(read: Callable[[int], bytes], length: int) -> Optional[bytes]:
+    data = read(length) if length > 0 else b""
+    if len(data) < length:
+        return None
+    return data
+
+
+def _apply_mask(payload: bytes, mask_key: bytes) -> bytes:
+    # XOR everything as one integer, much faster than byte by byte
+    repeated = (mask_key * (len(payload) // 4 + 1))[: len(payload)]
+    return (int.from_bytes(payload, "big") ^ int.from_bytes(repeated, "big")).to_bytes(len(payload), "big")
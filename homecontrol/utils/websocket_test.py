@@ -0,0 +1,120 @@
+import io
+import shutil
+import socket
+import ssl
+import subprocess
+import threading
+
+import pytest
+
+from .websocket import (
+    OPCODE_CLOSE,
+    OPCODE_CONTINUATION,
+    OPCODE_PING,
+    OPCODE_PONG,
+    OPCODE_TEXT,
+    WebSocket,
+    accept_key,
+    encode_frame,
+    read_frame,
+)
+
+
+@pytest.mark.parametrize(
+    "name,length,mask",
+    [
+        ("empty", 0, False),
+        ("short", 125, False),
+        ("16 bit length", 126, False),
+        ("64 bit length", 1 << 16, False),
+        ("masked", 1000, True),
+    ],
+)
+def test_encode_and_read_frame(name: str, length: int, mask: bool) -> None:
+    print(name)
+    payload = bytes(i % 256 for i in range(length))
+    frame = encode_frame(OPCODE_TEXT, payload, mask)
+
+    assert read_frame(io.BytesIO(frame).read) == (True, OPCODE_TEXT, payload)
+    assert (payload in frame) != mask or length == 0
+
+
+def test_read_frame_returns_none_when_closed_in_the_middle() -> None:
+    frame = encode_frame(OPCODE_TEXT, b"hello", mask=False)
+
+    assert read_frame(io.BytesIO(frame[:-1]).read) is None
+
+
+def test_receive() -> None:
+    client, server = socket.socketpair()
+    websocket = WebSocket("ws://localhost")
+    websocket._socket = client
+
+    with websocket, server:
+        # A message in two fragments with a ping in between
+        server.sendall(bytes([OPCODE_TEXT]) + bytes([5]) + b"hello")
+        server.sendall(encode_frame(OPCODE_PING, b"ping", mask=False))
+        server.sendall(encode_frame(OPCODE_CONTINUATION, b" world", mask=False))
+        server.sendall(encode_frame(OPCODE_CLOSE, b"\x03\xe8", mask=False))
+
+        assert websocket.receive() == "hello world"
+        assert websocket.receive() is None
+
+        reader = server.makefile("rb")
+        assert read_frame(reader.read) == (True, OPCODE_PONG, b"ping")
+        assert read_frame(reader.read) == (True, OPCODE_CLOSE, b"\x03\xe8")
+
+
+@pytest.fixture
+def tls_server(tmp_path):
+    """A websocket server with a self-signed certificate for localhost"""
+    if not shutil.which("openssl"):
+        pytest.skip("openssl is needed to create a certificate")
+    cert = tmp_path / "cert.pem"
+    key = tmp_path / "key.pem"
+    subprocess.run(
+        ["openssl", "req", "-x509", "-newkey", "rsa:2048", "-nodes", "-days", "1", "-subj", "/CN=localhost"]
+        + ["-addext", "subjectAltName=DNS:localhost", "-keyout", str(key), "-out", str(cert)],
+        check=True,
+        capture_output=True,
+    )
+    context = ssl.SSLContext(ssl.PROTOCOL_TLS_SERVER)
+    context.load_cert_chain(cert, key)
+    server = socket.create_server(("127.0.0.1", 0))
+
+    def serve() -> None:
+        while True:
+            try:
+                connection, _ = server.accept()
+            except OSError:
+                return
+            try:
+                with context.wrap_socket(connection, server_side=True) as tls:
+                    request = tls.recv(4096).decode()
+                    websocket_key = request.split("Sec-WebSocket-Key: ")[1].split("\r\n")[0]
+                    tls.sendall(
+                        (
+                            "HTTP/1.1 101 Switching Protocols\r\nUpgrade: websocket\r\nConnection: Upgrade\r\n"
+                            f"Sec-WebSocket-Accept: {accept_key(websocket_key)}\r\n\r\n"
+                        ).encode()
+                    )
+            except (OSError, IndexError):
+                pass
+
+    threading.Thread(target=serve, daemon=True).start()
+    yield f"wss://localhost:{server.getsockname()[1]}", str(cert)
+    server.close()
+
+
+def test_verifies_the_certificate_by_default(tls_server) -> None:
+    url, _ = tls_server
+
+    with pytest.raises(ssl.SSLCertVerificationError):
+        WebSocket(url).connect()
+
+
+def test_trusts_a_self_signed_certificate_from_a_file(tls_server) -> None:
+    url, cert = tls_server
+
+    with WebSocket(url, verify=cert) as websocket:
+        websocket.connect()
@@ -6,6 +6,7 @@ from dateutil import tz
 from flask import abort, jsonify
 from flask.wrappers import Response
 
+from ..smart_interfaces.hue.dispatcher import Dispatcher, Priority
 from ..utils.executor import DelayedExecutor, TimedExecutor
 
 _DELAY_STR_REGEX = re.compile(r"^(\d+)_?([a-zA-Z])?$")
@@ -36,6 +37,8 @@ def execute(
     if "time" in body:
         time = get_time(body["time"])
 
+    action = _interactive(action)
+
     # Delayed
     if delay != 0:
         delayed_executor = DelayedExecutor(
@@ -59,6 +62,16 @@ def execute(
         action(*args, **kwargs)
 
 
+def _interactive(action: Callable) -> Callable:
+    """Send the bridge commands of the action before commands from the controllers"""
+
+    def run(*args, **kwargs) -> Any:
+        with Dispatcher.priority(Priority.interactive):
+            return action(*args, **kwargs)
+
+    return run
+
+
 def trim_name(names: Union[List[str], str]) -> Union[List[str], str]:
     """Trims the name from the web API, specifically from IFTTT (removes extra "the ")"""
 
@@ -133,5 +146,5 @@ def get_time(time_str: str) -> Union[datetime, None]:
         return time
 
 
-def success() -> Response:
-    return jsonify({"success": True})
+def success(value: bool = True) -> Response:
+    return jsonify({"success": value})
@@ -6,6 +6,7 @@ from homecontrol.webapi.util import get_json
 
 from ..core.entities.color import Color
 from ..smart_interfaces import SmartInterfaces
+from ..smart_interfaces.hue.dispatcher import Dispatcher
 from . import execute, get_delay, success, trim_name
 
 color_blueprint = Blueprint("color", __package__)
@@ -49,7 +50,9 @@ def color() -> Response:
         transition_time = get_delay(body["transition_time"])
         kwargs["transition_time"] = transition_time
 
-    for interface in interfaces:
-        execute(body, interface.color, args=args, kwargs=kwargs)
+    # Send to all interfaces in parallel
+    with Dispatcher.batch() as batch:
+        for interface in interfaces:
+            execute(body, interface.color, args=args, kwargs=kwargs)
 
-    return success()
+    return success(batch.success)
@@ -5,6 +5,7 @@ from flask.wrappers import Response
 from homecontrol.webapi.util import get_json
 
 from ..smart_interfaces import SmartInterfaces
+from ..smart_interfaces.hue.dispatcher import Dispatcher
 from . import execute, get_delay, success, trim_name
 
 dim_blueprint = Blueprint("dim", __package__)
@@ -44,12 +45,14 @@ def dim() -> Response:
     if "transition_time" in body:
         transition_time = get_delay(body["transition_time"])
 
-    for interface in interfaces:
-        execute(
-            body,
-            interface.dim,
-            args=[value],
-            kwargs={"transition_time": transition_time},
-        )
-
-    return success()
+    # Send to all interfaces in parallel
+    with Dispatcher.batch() as batch:
+        for interface in interfaces:
+            execute(
+                body,
+                interface.dim,
+                args=[value],
+                kwargs={"transition_time": transition_time},
+            )
+
+    return success(batch.success)
@@ -8,6 +8,7 @@ from .effect import effect_blueprint, get_effects_blueprint
 from .info import get_info_blueprint
 from .kill import kill_blueprint
 from .log import log_blueprint
+from .metrics import metrics_blueprint
 from .mood import mood_blueprint
 from .power import power_blueprint
 
@@ -31,6 +32,7 @@ def run_api() -> None:
     # GET
     api.register_blueprint(get_info_blueprint)
     api.register_blueprint(get_effects_blueprint)
+    api.register_blueprint(metrics_blueprint)
 
     # POST
     api.register_blueprint(power_blueprint)
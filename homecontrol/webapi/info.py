@@ -21,6 +21,11 @@ def get_info() -> Response:
             "kitchen": Sensors.kitchen_light.get_light_name_from_level().name,
         },
         "network": {
+            "people": {
+                "someone": Network.is_someone_home(),
+                "matteus": Network.is_matteus_home(),
+                "emma": Network.is_emma_home(),
+            },
             "guests": {
                 "any": Network.is_guest_home(),
                 "both": Network.is_guest_home(GuestOf.both),
@@ -0,0 +1,84 @@
+from typing import List
+
+from flask import Blueprint, Response
+
+from ..controllers.controller import Controller
+from ..smart_interfaces.hue.api import Api
+from ..smart_interfaces.hue.dispatcher import Dispatcher
+from ..smart_interfaces.hue.shadow_state import ShadowState
+from ..utils.histogram import Histogram
+
+metrics_blueprint = Blueprint("metrics", __package__)
+
+
+@metrics_blueprint.route("/metrics", methods=["GET"])
+def get_metrics() -> Response:
+    """Controller and Hue bridge statistics in the Prometheus text format"""
+    lines: List[str] = []
+
+    _add_help(lines, "homecontrol_tick_seconds", "histogram", "Time of one pass over all controllers")
+    _add_histogram(lines, "homecontrol_tick_seconds", "", Controller.tick_time)
+
+    _add_help(lines, "homecontrol_controller_update_seconds", "histogram", "Time of a controller's update()")
+    for controller in Controller.controllers:
+        labels = f'controller="{_escape(controller.name)}"'
+        _add_histogram(lines, "homecontrol_controller_update_seconds", labels, controller.stats.update_time)
+
+    for name, help in [
+        ("state_changes", "Times a controller turned its lights on or off"),
+        ("brightness_changes", "Times a controller changed its brightness"),
+        ("color_changes", "Times a controller changed its color"),
+        ("bridge_calls", "Commands to lights and groups from a controller, before merging"),
+    ]:
+        metric = f"homecontrol_controller_{name}_total"
+        _add_help(lines, metric, "counter", help)
+        for controller in Controller.controllers:
+            lines.append(f'{metric}{{controller="{_escape(controller.name)}"}} {getattr(controller.stats, name)}')
+
+    for name, attribute, help in [
+        ("calls", "calls", "Calls to the Hue bridge"),
+        ("errors", "errors", "Failed calls to the Hue bridge"),
+        ("seconds", "total_time", "Time of the calls to the Hue bridge"),
+    ]:
+        metric = f"homecontrol_hue_api_{name}_total"
+        _add_help(lines, metric, "counter", help)
+        for method, api_stats in Api.stats.items():
+            lines.append(f'{metric}{{method="{method}"}} {getattr(api_stats, attribute)}')
+
+    _add_help(lines, "homecontrol_hue_commands_total", "counter", "Hue commands that were sent, suppressed or merged")
+    for result in ["sent", "suppressed", "merged"]:
+        lines.append(f'homecontrol_hue_commands_total{{result="{result}"}} {getattr(ShadowState.stats, result)}')
+
+    for metric, type, attribute, help in [
+        ("homecontrol_hue_queue_depth", "gauge", "depth", "Commands waiting in the dispatcher"),
+        ("homecontrol_hue_queue_sent_total", "counter", "sent", "Commands taken from the dispatcher queue"),
+    ]:
+        _add_help(lines, metric, type, help)
+        for priority, lane_stats in Dispatcher.stats.items():
+            lines.append(f'{metric}{{lane="{priority.name}"}} {getattr(lane_stats, attribute)}')
+
+    _add_help(lines, "homecontrol_hue_queue_wait_seconds", "histogram", "Time from queueing a command until it's sent")
+    for priority, lane_stats in Dispatcher.stats.items():
+        _add_histogram(lines, "homecontrol_hue_queue_wait_seconds", f'lane="{priority.name}"', lane_stats.wait_time)
+
+    return Response("\n".join(lines) + "\n", mimetype="text/plain; version=0.0.4")
+
+
+def _add_help(lines: List[str], metric: str, type: str, help: str) -> None:
+    lines.append(f"# HELP {metric} {help}")
+    lines.append(f"# TYPE {metric} {type}")
+
+
+def _add_histogram(lines: List[str], metric: str, labels: str, histogram: Histogram) -> None:
+    prefix = f"{labels}," if labels else ""
+    for bucket, count in histogram.cumulative_counts():
+        lines.append(f'{metric}_bucket{{{prefix}le="{bucket}"}} {count}')
+    lines.append(f'{metric}_bucket{{{prefix}le="+Inf"}} {histogram.count}')
+
+    labels = f"{{{labels}}}" if labels else ""
+    lines.append(f"{metric}_sum{labels} {histogram.sum}")
+    lines.append(f"{metric}_count{labels} {histogram.count}")
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace('"', '\\"')
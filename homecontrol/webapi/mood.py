@@ -3,6 +3,7 @@ from flask.wrappers import Response
 from homecontrol.webapi.util import get_json
 
 from ..smart_interfaces import SmartInterfaces
+from ..smart_interfaces.hue.dispatcher import Dispatcher
 from ..smart_interfaces.moods import Mood, Moods
 from . import execute, success, trim_name
 
@@ -28,11 +29,13 @@ def mood() -> Response:
         abort(404, f"Didn't find a mood with the name {body['mood']}.")
     mood: Mood = mood_enum.value
 
-    for interface in interfaces:
-        execute(
-            body,
-            interface.mood,
-            args=[mood],
-        )
+    # Send to all interfaces in parallel
+    with Dispatcher.batch() as batch:
+        for interface in interfaces:
+            execute(
+                body,
+                interface.mood,
+                args=[mood],
+            )
 
-    return success()
+    return success(batch.success)
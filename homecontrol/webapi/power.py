@@ -4,6 +4,7 @@ from homecontrol.webapi.util import get_json
 from tealprint import TealPrint
 
 from ..smart_interfaces import SmartInterfaces
+from ..smart_interfaces.hue.dispatcher import Dispatcher
 from . import execute, success, trim_name
 
 power_blueprint = Blueprint("power", __package__)
@@ -28,19 +29,21 @@ def power() -> Response:
     if isinstance(body["value"], str):
         body["value"] = str(body["value"]).lower()
 
-    for interface in interfaces:
-        if body["value"] == "on" or body["value"] == 1:
-            action = interface.turn_on
-        elif body["value"] == "off" or body["value"] == 0:
-            action = interface.turn_off
-        elif body["value"] == "toggle":
-            action = interface.toggle
-        else:
-            abort(
-                400,
-                'field "value" has invalid value. Valid values are: "on"/"off"/1/0/"toggle"',
-            )
-
-        execute(body, action)
-
-    return success()
+    # Send to all interfaces in parallel
+    with Dispatcher.batch() as batch:
+        for interface in interfaces:
+            if body["value"] == "on" or body["value"] == 1:
+                action = interface.turn_on
+            elif body["value"] == "off" or body["value"] == 0:
+                action = interface.turn_off
+            elif body["value"] == "toggle":
+                action = interface.toggle
+            else:
+                abort(
+                    400,
+                    'field "value" has invalid value. Valid values are: "on"/"off"/1/0/"toggle"',
+                )
+
+            execute(body, action)
+
+    return success(batch.success)
@@ -18,12 +18,11 @@ setup(
     packages=find_packages(),
     entry_points={"console_scripts": [f"{project_slug}=homecontrol.__main__:main"]},
     include_package_data=True,
-    data_files=[("config", [f"config/{project_slug}-example.cfg"])],
+    data_files=[("config", [f"config/{project_slug}-example.cfg", f"config/{project_slug}-rules-example.cfg"])],
     install_requires=[
         "apscheduler",
         "blulib",
         "requests",
-        "pyunifi",
         "flask",
         "tealprint",
     ],